@@ -0,0 +1,199 @@
+'''
+Bulk ingest of SEC's companyfacts.zip archive.
+
+SEC publishes every XBRL fact reported by every filer as one JSON file per
+company in companyfacts.zip. Reading that archive from disk fills
+edgarfilings for the whole universe without a single request to EDGAR. The
+zip is read one member at a time so memory stays bounded by the largest
+company, and each 10-K and 10-Q found in it goes through the same concept
+priority rules as a parsed instance document.
+'''
+import time
+import json
+import zipfile
+import logging
+from collections import deque
+from .xbrl_class import XBRL
+from .xbrl_concepts import FUNDAMENTAL_CONCEPTS
+from .filing_batch import FilingBatch
+
+# Forms loaded into edgarfilings, the same ones CompanyData reads from edgarindex
+FACT_FORMS = ('10-K','10-Q')
+
+# Concepts XBRL.GetCurrentPeriodAndContextInformation picks the duration context from
+DURATION_CONCEPTS = [
+    'us-gaap:CashAndCashEquivalentsPeriodIncreaseDecrease',
+    'us-gaap:CashPeriodIncreaseDecrease',
+    'us-gaap:NetIncomeLoss'
+]
+
+# Only facts for these concepts are kept
+NEEDED_CONCEPTS = frozenset(concept for spec in FUNDAMENTAL_CONCEPTS.values() for concept in spec['concepts']) | frozenset(DURATION_CONCEPTS)
+
+def groupFactsByFiling(company):
+    '''
+    Collect the facts of each 10-K and 10-Q in a company's companyfacts JSON.
+    company -> (dict) one member of companyfacts.zip
+    Returns accession -> {'fy', 'fp', 'form', 'facts'} where facts is a list \
+    of (concept, start, end, value), start being None for instants.
+    '''
+    filings = {}
+    for taxonomy, concepts in company.get('facts',{}).items():
+        for name, concept in concepts.items():
+            conceptName = '%s:%s' % (taxonomy,name)
+            if conceptName not in NEEDED_CONCEPTS:
+                continue
+            # Monetary facts first so they win over the same concept in other units
+            units = sorted(concept.get('units',{}).items(),key=lambda item: item[0] != 'USD')
+            for unit, facts in units:
+                for fact in facts:
+                    if fact.get('form') not in FACT_FORMS or 'accn' not in fact:
+                        continue
+                    filing = filings.get(fact['accn'])
+                    if filing is None:
+                        filing = filings[fact['accn']] = {'fy': fact.get('fy'), 'fp': fact.get('fp'), 'form': fact['form'], 'facts': []}
+                    filing['facts'].append((conceptName,fact.get('start'),fact['end'],fact.get('val')))
+    return filings
+
+def resolveFiling(cik,entityName,accession,filing,logger):
+    '''
+    Pick the balance sheet date and year to date period of one filing and return its edgarfilings fields.
+    cik -> (int) Central Index Key of the company
+    entityName -> (str) company name from companyfacts
+    accession -> (str) accession number with dashes
+    filing -> (dict) one entry from groupFactsByFiling
+    logger -> (logging object)
+    Returns the fields, or None if the filing has no fact for its period.
+    '''
+    facts = filing['facts']
+    # Filings also report prior periods for comparison, the latest end date is the filing's own period
+    periodEnd = max(end for _, _, end, _ in facts)
+    # Like GetCurrentPeriodAndContextInformation the year to date duration is the one starting earliest
+    durationStarts = [start for concept, start, end, _ in facts if start is not None and end == periodEnd and concept in DURATION_CONCEPTS]
+    if len(durationStarts) == 0:
+        durationStarts = [start for _, start, end, _ in facts if start is not None and end == periodEnd]
+    startYTD = min(durationStarts) if len(durationStarts) > 0 else None
+    instantContext = 'companyfacts_I_%s' % periodEnd
+    durationContext = 'companyfacts_D_%s_%s' % (startYTD,periodEnd) if startYTD is not None else None
+    factIndex = {}
+    for concept, start, end, value in facts:
+        if end != periodEnd or value is None:
+            continue
+        if start is None:
+            key = (concept,instantContext)
+        elif start == startYTD:
+            key = (concept,durationContext)
+        else:
+            continue
+        # The first fact for a key wins like the fact index of a parsed document
+        if key not in factIndex:
+            factIndex[key] = (value,False)
+    if len(factIndex) == 0:
+        return None
+    fields = {
+        'EntityRegistrantName': entityName,
+        'EntityCentralIndexKey': str(cik).zfill(10),
+        'DocumentFiscalYearFocus': None if filing['fy'] is None else str(filing['fy']),
+        'DocumentFiscalPeriodFocus': filing['fp'],
+        'DocumentType': filing['form'],
+        'BalanceSheetDate': periodEnd,
+        'IncomeStatementPeriodYTD': startYTD,
+        'ContextForInstants': instantContext,
+        'ContextForDurations': durationContext
+    }
+    return XBRL.fromFacts(factIndex,fields,logger).fields
+
+def companyFactsBatch(company,logger=None):
+    '''
+    Turn one company's companyfacts JSON into a FilingBatch with a row per 10-K and 10-Q.
+    company -> (dict) one member of companyfacts.zip
+    logger -> (logging object)
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    filings = groupFactsByFiling(company)
+    batch = FilingBatch(max(len(filings),1))
+    for accession, filing in filings.items():
+        fields = resolveFiling(company.get('cik'),company.get('entityName'),accession,filing,logger)
+        if fields is not None:
+            batch.append(fields,accession.replace('-',''))
+    return batch
+
+def readMember(path,name,logger=None):
+    '''
+    Read one member of companyfacts.zip into a FilingBatch. Module level so it can run in a ProcessPoolExecutor.
+    path -> (str) location of companyfacts.zip
+    name -> (str) member to read, e.g. CIK0000320193.json
+    logger -> (logging object)
+    '''
+    with zipfile.ZipFile(path) as archive:
+        with archive.open(name) as member:
+            company = json.load(member)
+    return companyFactsBatch(company,logger)
+
+def memberNames(path):
+    '''
+    Names of the company files in companyfacts.zip.
+    path -> (str) location of companyfacts.zip
+    '''
+    with zipfile.ZipFile(path) as archive:
+        return [info.filename for info in archive.infolist() if info.filename.endswith('.json')]
+
+def iterCompanyFacts(path,executor=None,readAhead=8,logger=None):
+    '''
+    Yield a FilingBatch per company in companyfacts.zip, one member at a time.
+    path -> (str) location of companyfacts.zip
+    executor -> (ProcessPoolExecutor) pool to read members in. Reads in \
+                this process if None
+    readAhead -> (int) most members being read by the pool at once
+    logger -> (logging object)
+    '''
+    names = memberNames(path)
+    if executor is None:
+        with zipfile.ZipFile(path) as archive:
+            for name in names:
+                with archive.open(name) as member:
+                    company = json.load(member)
+                yield companyFactsBatch(company,logger)
+        return
+    pending = deque()
+    for name in names:
+        pending.append(executor.submit(readMember,path,name))
+        if len(pending) >= readAhead:
+            yield pending.popleft().result()
+    while len(pending) > 0:
+        yield pending.popleft().result()
+
+def loadCompanyFacts(path,databaseHandler,logger=None,executor=None,readAhead=8,chunkSize=10000):
+    '''
+    Load every 10-K and 10-Q in companyfacts.zip into edgarfilings. Filings \
+    already in the table are left as they are.
+    path -> (str) location of companyfacts.zip
+    databaseHandler -> (databaseHandler) connection to copy with
+    logger -> (logging object)
+    executor -> (ProcessPoolExecutor) pool to read members in, this process \
+                if None
+    readAhead -> (int) most members being read by the pool at once
+    chunkSize -> (int) rows sent to the database at a time
+    Returns (companies, filings) read.
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    startTime = time.time()
+    companies = 0
+    filings = 0
+    chunk = FilingBatch(chunkSize)
+    for batch in iterCompanyFacts(path,executor,readAhead,logger):
+        companies += 1
+        chunk.extend(batch)
+        if len(chunk) >= chunkSize:
+            databaseHandler.copy_edgarfilings(chunk)
+            filings += len(chunk)
+            chunk = FilingBatch(chunkSize)
+            logger.info('companyfacts: %s companies, %s filings loaded' % (companies,filings))
+    if len(chunk) > 0:
+        databaseHandler.copy_edgarfilings(chunk)
+        filings += len(chunk)
+    duration = time.time() - startTime
+    logger.info('companyfacts: loaded %s filings from %s companies in %.1fs (%.0f filings/s)' % (filings,companies,duration,filings/duration if duration > 0 else 0))
+    return companies, filings
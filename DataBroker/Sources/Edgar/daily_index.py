@@ -0,0 +1,101 @@
+'''
+Incremental refresh of edgarindex from EDGAR's daily index.
+
+SEC publishes the filings accepted each business day in
+daily-index/YYYY/QTRn/master.YYYYMMDD.idx, a few hundred kilobytes per day
+against the tens of megabytes of a year of quarterly indexes. Fetching only
+the days after the newest filing in edgarindex keeps the nightly job to a
+handful of small requests, and the quarterly reload is left for the weekly
+reconciliation of the whole table.
+'''
+import logging
+from datetime import date, timedelta
+from .sec_client import fetch
+
+DAILY_INDEX_URL = 'https://www.sec.gov/Archives/edgar/daily-index/%s/QTR%s/master.%s.idx'
+
+def dailyIndexUrl(day):
+    '''
+    Address of the daily master index of a day.
+    day -> (datetime.date) day the filings were accepted on
+    '''
+    return DAILY_INDEX_URL % (day.year,(day.month-1)//3+1,day.strftime('%Y%m%d'))
+
+def businessDays(start,end):
+    '''
+    Weekdays from start to end, both included. EDGAR publishes no daily index on weekends.
+    start -> (datetime.date) first day
+    end -> (datetime.date) last day
+    '''
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+def parseDailyIndex(lines):
+    '''
+    Turn the lines of a master index into edgarindex rows: CIK, NAME, \
+    FILING_TYPE, FILING_DATE, TXT_LINK, HTML_lINK, like the quarterly \
+    index files written by edgar.download_index.
+    lines -> (iterable) text lines of master.YYYYMMDD.idx
+    '''
+    started = False
+    for line in lines:
+        if not started:
+            # Rows start after the dashed line under the header
+            started = line.startswith('-----')
+            continue
+        fields = line.rstrip('\r\n').split('|')
+        if len(fields) != 5:
+            continue
+        cik, name, form, filed, link = fields
+        if len(filed) == 8:
+            filed = '%s-%s-%s' % (filed[:4],filed[4:6],filed[6:])
+        yield [cik,name,form,filed,link,link.replace('.txt','-index.html')]
+
+def fetchDailyIndex(day,logger=None):
+    '''
+    Download the daily master index of a day.
+    day -> (datetime.date) day to download
+    logger -> (logging object)
+    Returns the edgarindex rows, or None if there is no index for the day \
+    (a holiday, or a day not published yet).
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    url = dailyIndexUrl(day)
+    response = fetch(url)
+    if response.status_code in (403,404):
+        logger.debug('No daily index for %s' % day)
+        return None
+    response.raise_for_status()
+    rows = list(parseDailyIndex(response.text.splitlines()))
+    logger.info('Daily index %s: %s filings, %s bytes' % (day,len(rows),len(response.content)))
+    return rows
+
+def iterDailyIndexRows(days,logger=None):
+    '''
+    Stream the edgarindex rows of several days, one day at a time.
+    days -> (iterable) datetime.date of each day to download
+    logger -> (logging object)
+    '''
+    for day in days:
+        rows = fetchDailyIndex(day,logger)
+        if rows is not None:
+            yield from rows
+
+def dailyIndexDays(lastEntry,today=None,maxDays=14):
+    '''
+    Days to fetch after the newest filing in edgarindex. The newest day is \
+    fetched again since filings accepted late may be missing from it.
+    lastEntry -> (datetime.date) newest FILING_DATE in edgarindex
+    today -> (datetime.date) last day to fetch, today if None
+    maxDays -> (int) most days to fetch. Returns None when edgarindex is \
+               empty or further behind, for the quarterly reload to fill in
+    '''
+    if today is None:
+        today = date.today()
+    if lastEntry is None or (today - lastEntry).days > maxDays:
+        return None
+    return list(businessDays(lastEntry,today))
@@ -1,135 +1,477 @@
-import sys
+import io
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
+from psycopg2 import sql
 import os
-from os.path import exists
-import csv
+from .get_edgar_index import iterIndexRows, indexFileManifest, batches
+from .filing_batch import EDGARFILINGS_COLUMNS, FilingBatch
 import logging
-import datetime
 import time
+import threading
 
 logger = logging.getLogger(__name__)
+
+# Process wide pool of warm connections shared by every databaseHandler, see configurePool
+pool = None
+poolSettings = None
+poolPid = None
+poolLock = threading.Lock()
+
+# Seconds a handler waits for a borrowed connection to come back to a full pool
+POOL_TIMEOUT = 60
+
+class BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    def __init__(self,minconn,maxconn,*args,timeout=POOL_TIMEOUT,**kwargs):
+        '''
+        ThreadedConnectionPool whose getconn waits for a connection to be \
+        returned when all of them are borrowed, instead of raising PoolError \
+        at once.
+        minconn -> (int) connections kept open once returned
+        maxconn -> (int) most connections open at once
+        timeout -> (float) seconds to wait before raising PoolError
+        '''
+        super().__init__(minconn,maxconn,*args,**kwargs)
+        self.timeout = timeout
+        # One slot per connection that may be borrowed at a time
+        self.slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self,key=None):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.pool.PoolError("no pooled connection returned within %ss" % self.timeout)
+        try:
+            return super().getconn(key)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self,conn=None,key=None,close=False):
+        try:
+            super().putconn(conn,key,close)
+        finally:
+            # The connection is no longer borrowed even if the pool refused it, e.g. because it was closed
+            self.slots.release()
+
+def configurePool(params_dic={},minConnections=1,maxConnections=4,timeout=POOL_TIMEOUT):
+    '''
+    Share a pool of connections between the databaseHandlers of this \
+    process. The pool opens on first use so the app starts even while \
+    Postgres is down. Handlers connect on their own while no pool is \
+    configured.
+    params_dic -> Dict with keys host, port, database, user, \
+                            password for Postgres database
+    minConnections -> (int) connections kept open once returned
+    maxConnections -> (int) most connections open at once. Handlers \
+                      wait for a connection once all are borrowed
+    timeout -> (float) seconds a handler waits for a connection before \
+               the attempt fails
+    '''
+    global poolSettings
+    closePool()
+    poolSettings = (dict(params_dic),minConnections,maxConnections,timeout)
+    logger.info('Postgres connection pool: %s to %s connections' % (minConnections,maxConnections))
+
+def getPool(params_dic):
+    '''
+    Return this process's pool if one is configured for these connection \
+    parameters, or None. A forked worker gets its own pool instead of \
+    sharing the parent's sockets.
+    params_dic -> Dict of the connection wanted
+    '''
+    global pool, poolPid
+    if poolSettings is None or poolSettings[0] != params_dic:
+        return None
+    if pool is None or poolPid != os.getpid():
+        with poolLock:
+            if pool is None or poolPid != os.getpid():
+                params, minConnections, maxConnections, timeout = poolSettings
+                pool = BlockingConnectionPool(minConnections,maxConnections,timeout=timeout,**params)
+                poolPid = os.getpid()
+    return pool
+
+def closePool():
+    '''
+    Close every connection of the pool, if there is one.
+    '''
+    global pool, poolPid
+    with poolLock:
+        if pool is not None and poolPid == os.getpid() and not pool.closed:
+            pool.closeall()
+        pool = None
+        poolPid = None
+
+def latestPeriodicFilingSql(source):
+    '''
+    SQL bringing latest_periodic_filing up to date with the 10-Ks and 10-Qs \
+    of a table shaped like edgarindex. A company's row for a form only \
+    changes for a later filing, so running it again changes nothing.
+    source -> (sql.Composable) table to read, edgarindex or its staging table
+    '''
+    return sql.SQL('''
+        INSERT INTO public.latest_periodic_filing ("CIK","FILING_TYPE","ACCESSION","FILING_DATE","NAME","TXT_LINK","HTML_lINK")
+        SELECT DISTINCT ON ("CIK","FILING_TYPE") "CIK", "FILING_TYPE", replace(substring("TXT_LINK" from '([^/]+)\\.txt$'),'-',''), "FILING_DATE", "NAME", "TXT_LINK", "HTML_lINK"
+        FROM {} WHERE "FILING_TYPE" IN ('10-K','10-Q') AND "CIK" IS NOT NULL AND "FILING_DATE" IS NOT NULL
+        ORDER BY "CIK", "FILING_TYPE", "FILING_DATE" DESC, "TXT_LINK" DESC
+        ON CONFLICT ("CIK","FILING_TYPE") DO UPDATE SET "ACCESSION" = EXCLUDED."ACCESSION", "FILING_DATE" = EXCLUDED."FILING_DATE", "NAME" = EXCLUDED."NAME", "TXT_LINK" = EXCLUDED."TXT_LINK", "HTML_lINK" = EXCLUDED."HTML_lINK"
+        WHERE (EXCLUDED."FILING_DATE", EXCLUDED."TXT_LINK") > (latest_periodic_filing."FILING_DATE", latest_periodic_filing."TXT_LINK");
+    ''').format(source)
+
 class databaseHandler:
-    def __init__(self,params_dic={}):
+    def __init__(self,params_dic={},attempts=3):
         '''
         Database wrapper for common SQL queries and handling database connection.
         params_dic -> Dict with keys host, port, database, user, \
                             password for Postgres database
+        attempts -> (int) tries to get a working connection before giving up
         logger -> logging object
         '''
         self.params = params_dic
         self.logger = logger
         self.conn = None
         self.cur = None
-        self.batch_size = 1000000
+        # Pool the connection was borrowed from, None if it was opened directly
+        self.pool = None
+        self.attempts = attempts
+        # Rows per COPY, bounds the memory of a load
+        self.batch_size = 100000
         self.connect()
 
     def connect(self):
         '''
-        Connect to the PostgreSQL database server
+        Connect to the PostgreSQL database server, borrowing a connection \
+        from the pool when one is configured for the same database. Pooled \
+        connections are checked first and replaced if they are broken. \
+        Raises an exception if no working connection is found.
         '''
+        for attempt in range(self.attempts):
+            try:
+                connectionPool = getPool(self.params)
+                if connectionPool is not None:
+                    self.logger.debug('Borrowing a connection from the pool...')
+                    # Idle connections may all have died with the server, replace them until one answers
+                    for _ in range(connectionPool.maxconn + 1):
+                        self.conn = connectionPool.getconn()
+                        self.pool = connectionPool
+                        if self.isHealthy():
+                            break
+                        self.logger.warning('Discarding broken pooled connection')
+                        self.release(close=True)
+                    if self.conn is None:
+                        continue
+                else:
+                    self.logger.debug('Connecting to the PostgreSQL database...')
+                    self.conn = psycopg2.connect(**self.params)
+                    self.pool = None
+                self.cur = self.conn.cursor()
+                self.logger.debug("Connection successful")
+                return
+            except (Exception, psycopg2.DatabaseError) as error:
+                self.logger.error("Error: %s" % error)
+                self.release(close=True)
+                time.sleep(attempt)
+        raise Exception("Could not connect to the PostgreSQL database after %s attempts" % self.attempts)
+
+    def isHealthy(self):
+        '''
+        Whether the connection is open and answers a query.
+        '''
+        if self.conn is None or self.conn.closed:
+            return False
         try:
-            # connect to the PostgreSQL server
-            self.logger.debug('Connecting to the PostgreSQL database...')
-            self.conn = psycopg2.connect(**self.params)
-            self.cur = self.conn.cursor()
-        except (Exception, psycopg2.DatabaseError) as error:
-            self.logger.error(error)
-            sys.exit(1)
-        self.logger.debug("Connection successful")
-        return
-
-    def composeSqlColumnsPlaceholders(self,dataSample=[]):
-        '''
-        Takes list and create string of placeholders for each entry in list for execute_mogrify.
-        dataSample -> (list) List of columns to insert
-        '''
-        result = "("
-        i = 1
-        while i <= len(dataSample):
-            result += "%s,"
-            i += 1
-        result = result[:-1] + ")"
-        return result
-    
+            with self.conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            self.conn.rollback()
+            return True
+        except (Exception, psycopg2.DatabaseError):
+            return False
+
+    def release(self,close=False):
+        '''
+        Give the connection back to the pool, or close it when it is not pooled.
+        close -> (boolean) close a pooled connection instead of keeping it
+        '''
+        try:
+            if self.cur is not None and not self.cur.closed:
+                self.cur.close()
+            if self.conn is not None:
+                if self.pool is not None and not self.pool.closed:
+                    if not self.conn.closed and not close:
+                        # Leave nothing open for the next borrower
+                        try:
+                            self.conn.rollback()
+                        except (Exception, psycopg2.DatabaseError):
+                            close = True
+                    self.pool.putconn(self.conn,close=close or self.conn.closed != 0)
+                elif not self.conn.closed:
+                    self.conn.close()
+        finally:
+            # Released once, calling release again does nothing
+            self.conn = None
+            self.cur = None
+            self.pool = None
+
+    def rollback(self):
+        '''
+        Roll back the failed transaction, reconnecting if the connection was lost.
+        '''
+        if self.conn is not None and not self.conn.closed:
+            try:
+                self.conn.rollback()
+                return
+            except (Exception, psycopg2.DatabaseError) as error:
+                self.logger.error("Error: %s" % error)
+        self.logger.warning('Lost the database connection, reconnecting')
+        self.release(close=True)
+        self.connect()
+
+    def composeCopyBuffer(self,rows,nullValue=None):
+        '''
+        Takes rows and writes them in COPY text format, with None written as NULL.
+        rows -> (list) rows in table column order
+        nullValue -> (str) string value to also write as NULL
+        '''
+        buffer = io.StringIO()
+        for row in rows:
+            values = []
+            for value in row:
+                if value is None or (nullValue is not None and value == nullValue):
+                    values.append('\\N')
+                else:
+                    values.append(str(value).replace('\\','\\\\').replace('\t','\\t').replace('\n','\\n').replace('\r','\\r'))
+            buffer.write('\t'.join(values))
+            buffer.write('\n')
+        buffer.seek(0)
+        return buffer
+
     def execute_mogrify(self,index,table=None):
         '''
-        Takes dataframe and inserts the data into the provided table using execute_mogrify.
-        index -> (Dataframe) data to insert into database
+        Takes rows and loads them into the provided table with COPY, see copy_into. Kept under this name for the callers that used the old INSERT builder.
+        index -> (list) rows to insert into database
         table -> (str) Name of Postgres Table
         '''
         if table is not None:
+            if table == "edgarfilings":
+                return self.copy_edgarfilings(index)
             if table == "edgarindex":
-                if (len(index) > 0):
-                    str_placholders = self.\
-                        composeSqlColumnsPlaceholders(dataSample=index[0])
-                    for i in range(0, len(index), self.batch_size):
-                        args_str = ','.join(self.cur.mogrify(str_placholders,row).decode('utf-8') for row in index[i:i+self.batch_size])
-                        self.logger.info(f"Inserting master index from EDGAR")
-                        try:
-                            self.cur.execute('INSERT INTO "edgarindex" VALUES' + args_str)
-                            self.conn.commit()
-                        except (Exception, psycopg2.DatabaseError) as error:
-                            self.logger.error("Error: %s" % error)
-                            self.conn.rollback()
+                return self.copy_edgarindex(index)
             if table == "edgartickerindex":
-                #index['date'] = datetime.date.today().strftime('%Y-%m-%d')
-                if (len(index) > 0):
-                    str_placholders = self.\
-                        composeSqlColumnsPlaceholders(dataSample=index[0])
-                    self.logger.info("Inserting %s tickers from recent SEC Filings into  edgartickerindex" % (len(index)))
-                    index
-                    for i in range(0, len(index), self.batch_size):
-                        args_str = ','.join(self.cur.mogrify(str_placholders,row).decode('utf-8') for row in index[i:i+self.batch_size])
-                        try:
-                            self.cur.execute('INSERT INTO "edgartickerindex" VALUES' + args_str)
-                            self.conn.commit()
-                        except (Exception, psycopg2.DatabaseError) as error:
-                            self.logger.error("Error: %s" % error)
-                            self.conn.rollback()
-            if table == "edgarfilings":
-                if (len(index) > 0):
-                    str_placholders = self.\
-                        composeSqlColumnsPlaceholders(dataSample=index[0])
-                    for i in range(0, len(index)+1, self.batch_size):
-                        if ((i+self.batch_size) < len(index)):
-                            batch_max = i+self.batch_size
-                        elif (i+self.batch_size >= len(index)):
-                            batch_max = len(index)-1
-                        if len(index) == 1:
-                            batch_max = 1
-                        tuples = [tuple(x) for x in index[i:batch_max]]
-                        values = [self.cur.mogrify(str_placholders, tup).decode('utf8') for tup in tuples]
-                        args_str = ",".join(values)
-                        args_str = args_str.replace("\'NULL\'","NULL")
-                        self.logger.info("Inserting filing data from Edgar...")
-                        self.logger.debug('INSERT INTO public.edgarfilings VALUES %s ON CONFLICT ON CONSTRAINT accession DO NOTHING;' % args_str)
-                        try:
-                            self.cur.execute('INSERT INTO public.edgarfilings VALUES %s ON CONFLICT ON CONSTRAINT accession DO NOTHING;' % args_str)
-                            self.conn.commit()
-                        except (Exception, psycopg2.DatabaseError) as error:
-                            self.logger.error("Error: %s" % error)
-                            self.conn.rollback()
-            else:
-                if (len(index) > 0):
-                    str_placholders = self.\
-                        composeSqlColumnsPlaceholders(dataSample=index[0])
-                    for i in range(0, len(index)+1, self.batch_size):
-                        if ((i+self.batch_size) < len(index)):
-                            batch_max = i+self.batch_size
-                        elif (i+self.batch_size >= len(index)):
-                            batch_max = len(index)-1
-                        if len(index) == 1:
-                            batch_max = 1
-                        tuples = [tuple(x) for x in index[i:batch_max]]
-                        values = [self.cur.mogrify(str_placholders, tup).decode('utf8') for tup in tuples]
-                        args_str = ",".join(values)
-                        args_str = args_str.replace("\'NULL\'","NULL")
-                        self.logger.info("Inserting filing data from Edgar...")
-                        self.logger.debug('INSERT INTO public.\'%s\' VALUES %s ON CONFLICT DO NOTHING;' % (table,args_str))
+                return self.copy_edgartickerindex(index)
+            return self.copy_into(table,index)
         else:
             raise Exception("Need to provide table for execute_mogrify.")
 
+    def createStaging(self,table):
+        '''
+        Create a temporary staging table shaped like a table in this session. It is emptied on every commit.
+        table -> (str) Name of Postgres table
+        '''
+        staging = sql.Identifier('%s_staging' % table)
+        self.cur.execute(sql.SQL('CREATE TEMP TABLE IF NOT EXISTS {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;').format(staging,sql.Identifier('public',table)))
+        return staging
+
+    def tableColumns(self,table):
+        '''
+        Names of a table's columns in table order.
+        table -> (str) Name of Postgres table
+        '''
+        self.cur.execute(sql.SQL('SELECT * FROM {} LIMIT 0').format(sql.Identifier('public',table)))
+        return [column[0] for column in self.cur.description]
+
+    def copy_into(self,table,rows,conflict=None,nullValue=None,chunkSize=None,key=None,afterMerge=None,columns=None,raiseErrors=False):
+        '''
+        Bulk load rows with COPY FROM STDIN into a staging table, then merge \
+        them into the table, one bounded chunk and one transaction at a time.
+        table -> (str) Name of Postgres table
+        rows -> (iterable) rows in table column order with None for nulls, \
+                can be a generator, or a FilingBatch for edgarfilings
+        conflict -> (str) ON CONFLICT clause of the merge, DO NOTHING on any \
+                    constraint if None
+        nullValue -> (str) string value that also means NULL, like the \
+                     'NULL' placeholder of the XBRL class
+        chunkSize -> (int) rows per COPY, batch_size if None
+        key -> (str) column identifying a row. When given only rows whose \
+               key is not in the table yet are merged, through an anti-join, \
+               for tables without a unique constraint to conflict on
+        afterMerge -> (function) takes the staging table and returns SQL \
+                      to run after each merge, in the same transaction
+        columns -> (list) names of the columns the rows hold, for rows that \
+                   do not fill every column of the table
+        raiseErrors -> (boolean) raise the error after rolling back instead \
+                       of only logging it, for callers that must know whether \
+                       every row was loaded. Chunks merged before the error \
+                       stay committed
+        Returns the number of rows added to the table.
+        '''
+        chunkSize = chunkSize or self.batch_size
+        conflict = sql.SQL(conflict or 'ON CONFLICT DO NOTHING')
+        startTime = time.time()
+        copied = 0
+        inserted = 0
+        try:
+            staging = self.createStaging(table)
+            target = sql.Identifier('public',table)
+            if columns is None:
+                columnList = sql.SQL('')
+                selectList = sql.SQL('s.*')
+            else:
+                columnList = sql.SQL(' ({})').format(sql.SQL(', ').join(sql.Identifier(column) for column in columns))
+                selectList = sql.SQL(', ').join(sql.SQL('s.{}').format(sql.Identifier(column)) for column in columns)
+            copySql = sql.SQL('COPY {}{} FROM STDIN').format(staging,columnList).as_string(self.conn)
+            if key is None:
+                mergeSql = sql.SQL('INSERT INTO {}{} SELECT {} FROM {} s {};').format(target,columnList,selectList,staging,conflict)
+            else:
+                mergeSql = sql.SQL('INSERT INTO {target}{columns} SELECT DISTINCT ON (s.{key}) {select} FROM {staging} s WHERE NOT EXISTS (SELECT 1 FROM {target} t WHERE t.{key} = s.{key});').format(target=target,columns=columnList,select=selectList,staging=staging,key=sql.Identifier(key))
+            if isinstance(rows,FilingBatch):
+                # Written from the columns without building rows
+                chunks = ((rows.toCopyBuffer(start,start+chunkSize,nullValue),min(chunkSize,len(rows)-start)) for start in range(0,len(rows),chunkSize))
+            else:
+                chunks = ((self.composeCopyBuffer(chunk,nullValue),len(chunk)) for chunk in batches(rows,chunkSize))
+            for buffer, count in chunks:
+                self.cur.copy_expert(copySql,buffer)
+                self.cur.execute(mergeSql)
+                inserted += self.cur.rowcount
+                if afterMerge is not None:
+                    self.cur.execute(afterMerge(staging))
+                self.conn.commit()
+                copied += count
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
+            if raiseErrors:
+                raise
+        duration = time.time() - startTime
+        if copied > 0:
+            self.logger.info("Copied %s rows into %s, %s new, in %.1fs (%.0f rows/s)" % (copied,table,inserted,duration,copied/duration if duration > 0 else 0))
+        return inserted
+
+    def copy_edgarindex(self,rows,chunkSize=None,raiseErrors=False):
+        '''
+        Bulk load index rows into edgarindex, skipping filings already in \
+        the table, and keep latest_periodic_filing up to date with them.
+        rows -> (iterable) CIK, NAME, FILING_TYPE, FILING_DATE, TXT_LINK, \
+                HTML_lINK rows, can be a generator
+        chunkSize -> (int) rows per COPY, batch_size if None
+        raiseErrors -> (boolean) raise if the load fails, see copy_into
+        Returns the number of rows added to edgarindex.
+        '''
+        # The table comes with the migrations, loads before them only fill edgarindex
+        afterMerge = latestPeriodicFilingSql if self.hasTable("latest_periodic_filing") else None
+        return self.copy_into("edgarindex",rows,chunkSize=chunkSize,key="TXT_LINK",afterMerge=afterMerge,raiseErrors=raiseErrors)
+
+    def hasTable(self,table):
+        '''
+        Whether a table exists in the public schema.
+        table -> (str) Name of Postgres table
+        '''
+        try:
+            self.cur.execute('SELECT to_regclass(%s)',('public.%s' % table,))
+            found = self.cur.fetchone()[0] is not None
+            self.conn.commit()
+            return found
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
+            return False
+
+    def copy_edgarfilings(self,rows,update=False):
+        '''
+        Bulk load rows into edgarfilings, skipping accession numbers already in the table.
+        rows -> (FilingBatch) parsed filings, or an iterable of rows in \
+                edgarfilings column order with None for nulls
+        update -> (boolean) overwrite filings already in the table instead, \
+                  for filings that were parsed again
+        '''
+        conflict = 'ON CONFLICT ON CONSTRAINT accession DO NOTHING'
+        if update:
+            columns = [column for column in EDGARFILINGS_COLUMNS if column != "Accession"]
+            conflict = sql.SQL('ON CONFLICT ON CONSTRAINT accession DO UPDATE SET {}').format(sql.SQL(', ').join(sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(column)) for column in columns)).as_string(self.conn)
+        return self.copy_into("edgarfilings",rows,conflict,nullValue='NULL')
+
+    def getFundamentalIndexEntries(self,ciks,force=False):
+        '''
+        Get the 10-K and 10-Q index entries of many companies in one query, \
+        by joining edgarindex to a temporary table of their CIKs.
+        ciks -> (list) Central Index Keys, as strings or integers
+        force -> (boolean) include filings already in edgarfilings
+        Returns the rows as (CIK, NAME, FILING_TYPE, FILING_DATE, HTML_lINK).
+        '''
+        ciks = sorted(set(int(cik) for cik in ciks))
+        if len(ciks) == 0:
+            return []
+        # Accession number of the filing index page, without dashes like in edgarfilings
+        notIngested = '' if force else '''
+            AND NOT EXISTS (SELECT 1 FROM public.edgarfilings f WHERE f."Accession" = replace(substring(i."HTML_lINK" from '([^/]+)-index\\.html$'),'-',''))'''
+        hasLatest = self.hasTable("latest_periodic_filing")
+        try:
+            self.cur.execute('CREATE TEMP TABLE IF NOT EXISTS plan_ciks ("CIK" bigint PRIMARY KEY) ON COMMIT DELETE ROWS;')
+            self.cur.copy_expert('COPY plan_ciks FROM STDIN',self.composeCopyBuffer([cik] for cik in ciks))
+            if hasLatest:
+                # Companies that never filed a 10-K or 10-Q are dropped with a key lookup each before edgarindex is read
+                self.cur.execute('DELETE FROM plan_ciks c WHERE NOT EXISTS (SELECT 1 FROM public.latest_periodic_filing l WHERE l."CIK" = c."CIK");')
+                if self.cur.rowcount > 0:
+                    self.logger.info("%s of %s CIKs have no 10-K or 10-Q" % (self.cur.rowcount,len(ciks)))
+            self.cur.execute('ANALYZE plan_ciks;')
+            self.cur.execute('''
+                SELECT i."CIK", i."NAME", i."FILING_TYPE", i."FILING_DATE", i."HTML_lINK"
+                FROM public.edgarindex i JOIN plan_ciks c ON c."CIK" = i."CIK"
+                WHERE i."FILING_TYPE" IN ('10-K','10-Q')%s
+            ''' % notIngested)
+            rows = self.cur.fetchall()
+            self.conn.commit()
+            return rows
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
+            return []
+
+    def getTickerMap(self):
+        '''
+        Return CIK -> ticker for every company in edgartickerindex, with CIKs as strings without leading zeros.
+        '''
+        try:
+            self.cur.execute('SELECT * FROM public.edgartickerindex')
+            return {str(int(row[0])): row[1] for row in self.cur.fetchall() if row[0] is not None}
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
+            return {}
+
+    def copy_edgartickerindex(self,rows):
+        '''
+        Bulk load tickers into edgartickerindex, skipping companies already in the table.
+        rows -> (list) [CIK, ticker, link] rows
+        Returns the number of rows added to edgartickerindex.
+        '''
+        try:
+            # The rows only fill the first three columns, which are positional elsewhere, so take their names from the table
+            columns = self.tableColumns("edgartickerindex")[:3]
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
+            return 0
+        return self.copy_into("edgartickerindex",rows,columns=columns)
+
+    def upsert_edgartickerindex(self,new,changed):
+        '''
+        Insert new companies into edgartickerindex and update the ticker of changed ones, through a temporary staging table.
+        new -> (list) [CIK, ticker, link] rows of companies not in the table
+        changed -> (list) [CIK, ticker, link] rows of companies whose ticker changed
+        '''
+        if len(new) + len(changed) == 0:
+            return
+        try:
+            # Columns are positional elsewhere, so take their names from the table
+            cik, ticker, link = [sql.Identifier(column) for column in self.tableColumns("edgartickerindex")[:3]]
+            staging = self.createStaging("edgartickerindex")
+            self.cur.copy_expert(sql.SQL('COPY {} ({},{},{}) FROM STDIN').format(staging,cik,ticker,link).as_string(self.conn),self.composeCopyBuffer(new + changed))
+            self.cur.execute(sql.SQL('UPDATE public.edgartickerindex t SET {ticker} = s.{ticker}, {link} = s.{link} FROM {staging} s WHERE t.{cik} = s.{cik};').format(cik=cik,ticker=ticker,link=link,staging=staging))
+            self.cur.execute(sql.SQL('INSERT INTO public.edgartickerindex SELECT s.* FROM {staging} s WHERE NOT EXISTS (SELECT 1 FROM public.edgartickerindex t WHERE t.{cik} = s.{cik});').format(cik=cik,staging=staging))
+            self.conn.commit()
+            self.logger.info("Upserted %s new and %s changed tickers into edgartickerindex" % (len(new),len(changed)))
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
+
     def getLastDate(self,table,column):
         '''
         Get largest date in Postgres table.
@@ -144,7 +486,7 @@ class databaseHandler:
             return lastDate
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error("Error: %s" % error)
-            self.conn.rollback()
+            self.rollback()
             return None
         
     def getFirstDate(self,table,column):
@@ -161,75 +503,99 @@ class databaseHandler:
             return lastDate
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error("Error: %s" % error)
-            self.conn.rollback()
+            self.rollback()
             return None
 
-    def getNewIndexEntries(self):
-        '''
-        Go through master index file and search for entries not in our database.
-        '''
-        file_exists = exists("./index/master.csv")
-        if (file_exists):
-            with open("./index/master.csv") as file:
-                # Passing the TSV file to 
-                # reader() function
-                # with tab delimiter
-                # This function will
-                # read data from file
-                tsv_file = csv.reader(file, delimiter="|")
-
-                # Getting today's date
-                todays_Date = datetime.date.fromtimestamp(time.time())
-                i = 0
-                #for row in tsv_file: i += 1
-                lastEntry = self.getLastDate("edgarindex","FILING_DATE")
-                firstEntry = self.getFirstDate("edgarindex","FILING_DATE")
-                self.logger.info('To Add: ' + str(i))
-                self.logger.info('First Entry: ' + str(firstEntry))
-                self.logger.info('Last Entry: ' + str(lastEntry))
-                self.logger.info('Today\'s Date: ' + str(todays_Date))
-                self.logger.info(firstEntry)
-                self.logger.info(lastEntry)
-                filingsToCheckDate = [row for row in tsv_file]
-                dates = [row[3] for row in filingsToCheckDate]
-                self.logger.info('Length of filingsToCheckDate:')
-                self.logger.info(str(len(filingsToCheckDate)))
-                self.tsv_results = []
-                if lastEntry is not None:
-                    self.tsv_results = [row for row in filingsToCheckDate if (datetime.date.fromisoformat(row[3]) > lastEntry and datetime.date.fromisoformat(row[3])+datetime.timedelta(days=2)  <= todays_Date) or (datetime.date.fromisoformat(row[3]) < firstEntry)]
-                    '''for row in filingsToCheckDate:
-                        rowDate = datetime.date.fromisoformat(row[3])
-                        if  ( rowDate > lastEntry ):
-                                #and \
-                            #rowDate+datetime.timedelta(days=2)  <= todays_Date):#\
-                                #or \
-                            #(datetime.date.fromisoformat(row[3]) < firstEntry):
-                                self.tsv_results.append(row)'''
-                    '''self.logger.info('Length of first test:')
-                    self.logger.info(str(len(
-                        [row for row in tsv_file if (datetime.date.fromisoformat(row[3]) > lastEntry and datetime.date.fromisoformat(row[3])+datetime.timedelta(days=2)  <= todays_Date)])))
-                    self.logger.info('Length of second test:')
-                    self.logger.info(str(len(
-                        [row for row in tsv_file if (datetime.date.fromisoformat(row[3]) < firstEntry)])))'''
-                else:
-                    self.tsv_results = filingsToCheckDate
-            self.logger.info('Length of tsv_results:')
-            self.logger.info(str(len(self.tsv_results)))
-            self.logger.info(str(dates[-10:]))
-            self.execute_mogrify(self.tsv_results,"edgarindex")
-            #Linux
-            os.system('rm -rf ./index/master.csv')
-        else:
+    def getNewIndexEntries(self,files=[],batchSize=50000):
+        '''
+        Reconcile edgarindex with quarterly index files. Only quarters whose file changed since it was last loaded, or that have fewer rows in edgarindex than in the file, are streamed again, and only their filings missing from edgarindex are inserted.
+        files -> (list) paths of the quarterly index files, see get_edgar_index
+        batchSize -> (int) rows copied at a time
+        '''
+        if len(files) == 0:
             self.logger.info("")
-            self.logger.info("No Master.csv to insert")
-        return
+            self.logger.info("No index files to insert")
+            return 0
+        manifests = self.getIndexManifests()
+        counts = self.getIndexQuarterCounts()
+        self.logger.info('Index Files: ' + str(len(files)))
+        added = 0
+        reloaded = 0
+        for path in files:
+            quarter, rows, digest = indexFileManifest(path)
+            inTable = counts.get(quarter,0)
+            if manifests.get(quarter) == (rows,digest) and inTable >= rows:
+                if inTable > rows:
+                    self.logger.warning('%s has %s rows in edgarindex but %s in its index file' % (quarter,inTable,rows))
+                continue
+            self.logger.info('%s: %s rows in index file, %s in edgarindex, reloading' % (quarter,rows,inTable))
+            try:
+                added += self.copy_edgarindex(iterIndexRows([path]),chunkSize=batchSize,raiseErrors=True)
+            except (Exception, psycopg2.DatabaseError) as error:
+                # Without a manifest the quarter is streamed again next time
+                self.logger.error("Error: %s not fully loaded, %s" % (quarter,error))
+                continue
+            self.saveIndexManifest(quarter,rows,digest)
+            reloaded += 1
+        self.logger.info('Quarters reloaded: %s of %s' % (reloaded,len(files)))
+        self.logger.info('Index entries added: ' + str(added))
+        return added
+
+    def getIndexManifests(self):
+        '''
+        Return quarter -> (rows, hash) of the index files last loaded into edgarindex.
+        '''
+        try:
+            self.cur.execute('''
+                CREATE TABLE IF NOT EXISTS public.edgarindexmanifest ("QUARTER" text PRIMARY KEY, "ROWS" bigint NOT NULL, "HASH" text NOT NULL, "LOADED" timestamp with time zone DEFAULT now());
+            ''')
+            self.cur.execute('SELECT "QUARTER","ROWS","HASH" FROM public.edgarindexmanifest')
+            manifests = {quarter: (rows,digest) for quarter, rows, digest in self.cur.fetchall()}
+            self.conn.commit()
+            return manifests
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
+            return {}
+
+    def getIndexQuarterCounts(self):
+        '''
+        Return quarter -> number of edgarindex rows filed in it, with quarters named like the index files, e.g. 2022-QTR1.
+        '''
+        try:
+            self.cur.execute('''
+                SELECT EXTRACT(YEAR FROM "FILING_DATE")::int, EXTRACT(QUARTER FROM "FILING_DATE")::int, count(*)
+                FROM public.edgarindex GROUP BY 1, 2
+            ''')
+            return {'%s-QTR%s' % (year,quarter): count for year, quarter, count in self.cur.fetchall()}
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
+            return {}
+
+    def saveIndexManifest(self,quarter,rows,digest):
+        '''
+        Record the row count and hash of a quarterly index file once it is loaded.
+        quarter -> (str) quarter of the file, e.g. 2022-QTR1
+        rows -> (int) rows in the file
+        digest -> (str) SHA-256 of the file
+        '''
+        try:
+            self.cur.execute('''
+                INSERT INTO public.edgarindexmanifest ("QUARTER","ROWS","HASH") VALUES (%s,%s,%s)
+                ON CONFLICT ("QUARTER") DO UPDATE SET "ROWS" = EXCLUDED."ROWS", "HASH" = EXCLUDED."HASH", "LOADED" = now();
+            ''',(quarter,rows,digest))
+            self.conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error("Error: %s" % error)
+            self.rollback()
 
     def exit(self):
         '''
-        Exit class and close Postgres connection
+        Exit class and return the Postgres connection to the pool, or close it
         '''
-        self.cur.close()
-        self.conn.close()
+        pooled = self.pool is not None
+        self.release()
         self.logger.info('Db Exit Status:')
         self.logger.info('Psycopg2:')
-        self.logger.info(self.conn.closed)
\ No newline at end of file
+        self.logger.info('returned to pool' if pooled else 'closed')
@@ -0,0 +1,291 @@
+'''
+Columnar results for many parsed XBRL filings.
+
+Numeric fields are kept as float64 NumPy arrays with a null mask and the dei
+metadata as string columns, so the same batch can be loaded into the
+edgarfilings table or handed to pandas without converting row by row.
+'''
+import io
+import logging
+from itertools import repeat
+import numpy as np
+import pandas as pd
+from .xbrl_class import XBRL
+
+# dei metadata and context ids, stored as strings
+INFO_COLUMNS = [
+    "EntityRegistrantName",
+    "FiscalYear",
+    "EntityCentralIndexKey",
+    "EntityFilerCategory",
+    "TradingSymbol",
+    "DocumentFiscalYearFocus",
+    "DocumentFiscalPeriodFocus",
+    "DocumentType",
+    "BalanceSheetDate",
+    "IncomeStatementPeriodYTD",
+    "ContextForInstants",
+    "ContextForDurations"
+]
+
+# Fundamentals and ratios, stored as float64
+NUMERIC_COLUMNS = [
+    "Assets",
+    "CurrentAssets",
+    "NoncurrentAssets",
+    "LiabilitiesAndEquity",
+    "Liabilities",
+    "CurrentLiabilities",
+    "NoncurrentLiabilities",
+    "CommitmentsAndContingencies",
+    "TemporaryEquity",
+    "Equity",
+    "EquityAttributableToNoncontrollingInterest",
+    "EquityAttributableToParent",
+    "Revenues",
+    "CostOfRevenue",
+    "GrossProfit",
+    "OperatingExpenses",
+    "CostsAndExpenses",
+    "OtherOperatingIncome",
+    "OperatingIncomeLoss",
+    "NonoperatingIncomeLoss",
+    "InterestAndDebtExpense",
+    "IncomeBeforeEquityMethodInvestments",
+    "IncomeFromEquityMethodInvestments",
+    "IncomeFromContinuingOperationsBeforeTax",
+    "IncomeTaxExpenseBenefit",
+    "IncomeFromContinuingOperationsAfterTax",
+    "IncomeFromDiscontinuedOperations",
+    "ExtraordaryItemsGainLoss",
+    "NetIncomeLoss",
+    "NetIncomeAvailableToCommonStockholdersBasic",
+    "PreferredStockDividendsAndOtherAdjustments",
+    "NetIncomeAttributableToNoncontrollingInterest",
+    "NetIncomeAttributableToParent",
+    "OtherComprehensiveIncome",
+    "ComprehensiveIncome",
+    "ComprehensiveIncomeAttributableToParent",
+    "ComprehensiveIncomeAttributableToNoncontrollingInterest",
+    "NonoperatingIncomeLossPlusInterestAndDebtExpense",
+    "NonoperatingIncomePlusInterestAndDebtExpensePlusIncomeFromEquityMethodInvestments",
+    "NetCashFlow",
+    "NetCashFlowsOperating",
+    "NetCashFlowsInvesting",
+    "NetCashFlowsFinancing",
+    "NetCashFlowsOperatingContinuing",
+    "NetCashFlowsInvestingContinuing",
+    "NetCashFlowsFinancingContinuing",
+    "NetCashFlowsOperatingDiscontinued",
+    "NetCashFlowsInvestingDiscontinued",
+    "NetCashFlowsFinancingDiscontinued",
+    "NetCashFlowsDiscontinued",
+    "ExchangeGainsLosses",
+    "NetCashFlowsContinuing",
+    "SGR",
+    "ROA",
+    "ROE",
+    "ROS"
+]
+
+# Column order of the edgarfilings table
+EDGARFILINGS_COLUMNS = INFO_COLUMNS + NUMERIC_COLUMNS + ["Accession"]
+
+# Rows formatted at a time by FilingBatch.toCopyBuffer, bounds the memory of the formatted columns
+COPY_BLOCK_ROWS = 10000
+
+# Characters escaped in COPY text format
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+class FilingContent:
+    def __init__(self,content=None,url=None):
+        '''
+        Minimal stand in for a requests response so downloaded filings can be sent to another process.
+        content -> (bytes) body of the instance document
+        url -> (str) address the document was downloaded from
+        '''
+        self.content = content
+        self.url = url
+
+def parseFiling(content,url,logger=None):
+    '''
+    Parse an XBRL instance document and return its fields. Module level so it can run in a ProcessPoolExecutor.
+    content -> (bytes) body of the instance document
+    url -> (str) address the document was downloaded from
+    logger -> (logging object)
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    data = XBRL(xbrl_content=FilingContent(content,url),tradingsymbol=False,logger=logger)
+    return data.fields
+
+def hasFilingData(fields):
+    '''
+    Whether a parse found any dei or fundamental field, as opposed to only \
+    the placeholders XBRL fills in for a document that is not an instance, \
+    such as an error page.
+    fields -> (dict) fields from the XBRL class
+    '''
+    return any(value not in (None,'NULL','Not Provided','N/A') for value in fields.values())
+
+def parseFilings(filings,logger=None,executor=None):
+    '''
+    Parse many XBRL instance documents into one FilingBatch, in the order given.
+    filings -> (iterable) (accession, content, url) of each instance document
+    logger -> (logging object)
+    executor -> (ProcessPoolExecutor) pool to parse in. Parses in this \
+                process if None
+    '''
+    batch = FilingBatch()
+    if executor is None:
+        for accession, content, url in filings:
+            batch.append(parseFiling(content,url,logger),accession)
+        return batch
+    futures = [(accession,executor.submit(parseFiling,content,url,logger)) for accession, content, url in filings]
+    for accession, future in futures:
+        batch.append(future.result(),accession)
+    return batch
+
+class FilingBatch:
+    def __init__(self,capacity=64):
+        '''
+        Columnar store of the fields of parsed filings.
+        capacity -> (int) number of rows to allocate up front, grows as needed
+        '''
+        self.length = 0
+        # One column per numeric field, contiguous in memory
+        self.values = np.zeros((capacity,len(NUMERIC_COLUMNS)),dtype=np.float64,order='F')
+        self.nulls = np.ones((capacity,len(NUMERIC_COLUMNS)),dtype=bool,order='F')
+        self.strings = {column: np.full(capacity,None,dtype=object) for column in INFO_COLUMNS + ["Accession"]}
+        self.numericIndex = {column: i for i, column in enumerate(NUMERIC_COLUMNS)}
+
+    def __len__(self):
+        return self.length
+
+    def grow(self,capacity):
+        '''
+        Reallocate the columns to hold at least capacity rows.
+        capacity -> (int) number of rows needed
+        '''
+        capacity = max(capacity,2*self.values.shape[0])
+        values = np.zeros((capacity,len(NUMERIC_COLUMNS)),dtype=np.float64,order='F')
+        nulls = np.ones((capacity,len(NUMERIC_COLUMNS)),dtype=bool,order='F')
+        values[:self.length] = self.values[:self.length]
+        nulls[:self.length] = self.nulls[:self.length]
+        self.values = values
+        self.nulls = nulls
+        for column in self.strings:
+            strings = np.full(capacity,None,dtype=object)
+            strings[:self.length] = self.strings[column][:self.length]
+            self.strings[column] = strings
+
+    def append(self,fields,accession=None):
+        '''
+        Add the fields of one parsed filing as a row.
+        fields -> (dict) fields from the XBRL class
+        accession -> (str) accession number, taken from fields if None
+        '''
+        if self.length == self.values.shape[0]:
+            self.grow(self.length+1)
+        row = self.length
+        for column, i in self.numericIndex.items():
+            value = fields.get(column)
+            if value is None:
+                continue
+            try:
+                self.values[row,i] = float(value)
+                self.nulls[row,i] = False
+            except (TypeError, ValueError):
+                pass
+        if accession is None:
+            accession = fields.get("Accession")
+        for column in INFO_COLUMNS:
+            value = fields.get(column)
+            if value is not None:
+                self.strings[column][row] = str(value)
+        self.strings["Accession"][row] = None if accession is None else str(accession)
+        self.length += 1
+
+    def extend(self,batch):
+        '''
+        Add every row of another FilingBatch.
+        batch -> (FilingBatch) rows to add
+        '''
+        if self.length + len(batch) > self.values.shape[0]:
+            self.grow(self.length + len(batch))
+        end = self.length + len(batch)
+        self.values[self.length:end] = batch.values[:len(batch)]
+        self.nulls[self.length:end] = batch.nulls[:len(batch)]
+        for column in self.strings:
+            self.strings[column][self.length:end] = batch.strings[column][:len(batch)]
+        self.length = end
+
+    def column(self,name):
+        '''
+        Return the values of a column. Numeric columns come back as (values, null mask).
+        name -> (str) field name
+        '''
+        if name in self.numericIndex:
+            i = self.numericIndex[name]
+            return self.values[:self.length,i], self.nulls[:self.length,i]
+        if name in self.strings:
+            return self.strings[name][:self.length]
+        raise Exception("Unknown filing column: %s" % name)
+
+    def toDataFrame(self):
+        '''
+        Return the batch as a DataFrame with NaN for null numeric values, for analytics.
+        '''
+        values = np.where(self.nulls[:self.length],np.nan,self.values[:self.length])
+        frame = pd.DataFrame(values,columns=NUMERIC_COLUMNS)
+        for column in self.strings:
+            frame[column] = self.strings[column][:self.length]
+        return frame[EDGARFILINGS_COLUMNS]
+
+    def toRows(self,start=0,end=None):
+        '''
+        Return the batch as rows in edgarfilings column order with None for nulls.
+        start -> (int) first row
+        end -> (int) row to stop before, the end of the batch if None
+        '''
+        end = self.length if end is None else min(end,self.length)
+        values = self.values[start:end].astype(object)
+        values[self.nulls[start:end]] = None
+        columns = [self.strings[column][start:end] for column in INFO_COLUMNS]
+        columns += [values[:,i] for i in range(len(NUMERIC_COLUMNS))]
+        columns.append(self.strings["Accession"][start:end])
+        return [list(row) for row in zip(*columns)]
+
+    def toCopyBuffer(self,start=0,end=None,nullValue=None):
+        '''
+        Write rows in edgarfilings column order in COPY text format for \
+        database loading, straight from the columns. Each column of a block \
+        of rows is formatted on its own and the columns are then joined \
+        into lines.
+        start -> (int) first row
+        end -> (int) row to stop before, the end of the batch if None
+        nullValue -> (str) string value to also write as NULL
+        '''
+        end = self.length if end is None else min(end,self.length)
+        buffer = io.StringIO()
+        for blockStart in range(start,end,COPY_BLOCK_ROWS):
+            blockEnd = min(blockStart+COPY_BLOCK_ROWS,end)
+            columns = []
+            for column in EDGARFILINGS_COLUMNS:
+                if column in self.numericIndex:
+                    i = self.numericIndex[column]
+                    values = self.values[blockStart:blockEnd,i].astype(object)
+                    values[self.nulls[blockStart:blockEnd,i]] = '\\N'
+                    # str() of a Python float, the text the row path wrote
+                    columns.append(map(str,values))
+                    continue
+                values = self.strings[column][blockStart:blockEnd]
+                present = ~pd.isna(values)
+                if nullValue is not None:
+                    present &= values != nullValue
+                text = np.full(blockEnd-blockStart,'\\N',dtype=object)
+                text[present] = list(map(str.translate,values[present],repeat(COPY_ESCAPES)))
+                columns.append(text)
+            buffer.writelines(map('%s\n'.__mod__,map('\t'.join,zip(*columns))))
+        buffer.seek(0)
+        return buffer
@@ -0,0 +1,113 @@
+'''
+Find the documents of a filing from its folder listing.
+
+Every filing folder under /Archives/edgar/data/ has an index.json listing its
+files, which is enough to pick out the XBRL instance document by name. When
+the names are ambiguous FilingSummary.xml lists the files the XBRL was built
+from, and the filing index HTML page is only scraped as a last resort.
+'''
+import re
+import json
+from lxml import etree
+from .sec_client import fetchMany
+
+# Linkbases, schemas and rendered reports that sit next to the instance document
+NOT_INSTANCE = re.compile(r'(_(cal|def|lab|pre|ref)\.xml$)|(^R\d+\.xml$)|(^FilingSummary\.xml$)',re.IGNORECASE)
+
+def folderPath(htmlLink):
+    '''
+    Path of the filing folder for an edgarindex HTML_lINK.
+    htmlLink -> (str) 'edgar/data/<cik>/<accession>-index.html'
+    '''
+    directory = htmlLink[:htmlLink.rindex('/')]
+    accession = htmlLink[htmlLink.rindex('/')+1:htmlLink.rindex('-')].replace('-','')
+    return '/Archives/%s/%s' % (directory,accession)
+
+def instanceFromIndexJson(content):
+    '''
+    Return (instance link, has FilingSummary.xml, has xml files) from a folder's index.json. The link is None if no file is clearly the instance document.
+    content -> (bytes) body of index.json
+    '''
+    directory = json.loads(content)['directory']
+    names = [item['name'] for item in directory.get('item',[])]
+    hasSummary = 'FilingSummary.xml' in names
+    candidates = [name for name in names if name.lower().endswith('.xml') and not NOT_INSTANCE.search(name)]
+    # Instance extracted from an inline XBRL document
+    extracted = [name for name in candidates if name.lower().endswith('_htm.xml')]
+    if len(extracted) == 1:
+        return directory['name'] + '/' + extracted[0], hasSummary, True
+    if len(candidates) == 1:
+        return directory['name'] + '/' + candidates[0], hasSummary, True
+    return None, hasSummary, len(candidates) > 0
+
+def instanceFromFilingSummary(content,folder):
+    '''
+    Return the instance link listed in a FilingSummary.xml, or None.
+    content -> (bytes) body of FilingSummary.xml
+    folder -> (str) path of the filing folder
+    '''
+    root = etree.fromstring(content)
+    for node in root.iter('File'):
+        name = (node.text or '').strip()
+        if name.lower().endswith('.xml') and not NOT_INSTANCE.search(name):
+            return folder + '/' + name
+    return None
+
+def discoverLinks(htmlLinks,fallback,needPrimary=False,logger=None):
+    '''
+    Find the document to read for each filing. The instance document is \
+    found from index.json, then FilingSummary.xml, then by scraping the \
+    filing index page with fallback.
+    htmlLinks -> (list) edgarindex HTML_lINK of each filing
+    fallback -> (function) takes the bytes of a filing index page and \
+                returns a link or None
+    needPrimary -> (boolean) scrape the index page for the primary document \
+                   of filings without XBRL. They are left out otherwise
+    logger -> (logging object)
+    Returns (links, counts) where links maps HTML_lINK to a link and counts \
+    says how many filings each source resolved.
+    '''
+    links = {}
+    counts = {'index.json': 0, 'FilingSummary.xml': 0, 'html': 0}
+    summaryUrls = {}
+    htmlUrls = {}
+    jsonUrls = {'https://www.sec.gov%s/index.json' % folderPath(htmlLink): htmlLink for htmlLink in htmlLinks}
+    for url, response, error in fetchMany(jsonUrls):
+        htmlLink = jsonUrls[url]
+        link, hasSummary, hasXml = None, False, False
+        if error is None and response.status_code == 200:
+            try:
+                link, hasSummary, hasXml = instanceFromIndexJson(response.content)
+            except (ValueError, KeyError) as parseError:
+                if logger is not None: logger.debug('Bad index.json %s: %s' % (url,parseError))
+        if link is not None:
+            links[htmlLink] = link
+            counts['index.json'] += 1
+        elif hasSummary:
+            summaryUrls['https://www.sec.gov%s/FilingSummary.xml' % folderPath(htmlLink)] = htmlLink
+        elif error is not None or response.status_code != 200 or hasXml or needPrimary:
+            htmlUrls['https://www.sec.gov/Archives/' + htmlLink] = htmlLink
+    for url, response, error in fetchMany(summaryUrls):
+        htmlLink = summaryUrls[url]
+        link = None
+        if error is None and response.status_code == 200:
+            try:
+                link = instanceFromFilingSummary(response.content,folderPath(htmlLink))
+            except etree.XMLSyntaxError as parseError:
+                if logger is not None: logger.debug('Bad FilingSummary.xml %s: %s' % (url,parseError))
+        if link is not None:
+            links[htmlLink] = link
+            counts['FilingSummary.xml'] += 1
+        else:
+            htmlUrls['https://www.sec.gov/Archives/' + htmlLink] = htmlLink
+    for url, response, error in fetchMany(htmlUrls):
+        if error is not None:
+            if logger is not None: logger.error("Error: %s %s" % (url,error))
+            continue
+        link = fallback(response.content)
+        if link is not None:
+            links[htmlUrls[url]] = link
+            counts['html'] += 1
+    if logger is not None:
+        logger.info('Links found from index.json: %s, FilingSummary.xml: %s, index page: %s' % (counts['index.json'],counts['FilingSummary.xml'],counts['html']))
+    return links, counts
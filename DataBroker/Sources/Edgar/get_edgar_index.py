@@ -1,26 +1,103 @@
 import edgar
 import os
-from datetime import datetime
+import re
+import csv
+import hashlib
 import logging
+from .sec_client import USER_AGENT
 
 logger = logging.getLogger(__name__)
 
-def get_edgar_index(year=2022,endYear=None):
+# Quarterly index files written by edgar.download_index, e.g. 2022-QTR1.tsv
+INDEX_FILE = re.compile(r'^(\d{4})-QTR([1-4])\.tsv$')
+
+def get_edgar_index(year=2022,endYear=None,directory="./index"):
     '''
     Get index of EDGAR filings going back to beginning of provided year.
     year -> (int) year to start at
+    endYear -> (int) last year to keep, every year since year if None
+    directory -> (str) folder the quarterly index files are written to
+    Returns the paths of the quarterly index files to load, oldest first.
     '''
-    user_agent = "FTC edward@ftc.com"
-    edgar.download_index("./index", year, user_agent, skip_all_present_except_last=False)
+    edgar.download_index(directory, year, USER_AGENT, skip_all_present_except_last=False)
 
-    #Linux
     logger.info(endYear)
-    if endYear is not None:
-        yearsToGet = range(year,endYear+1,1)
-        logger.info('Years To Get: ' + str(yearsToGet))
-        files = os.listdir("./index/")
-        for file in files:
-            if int(file[:4]) not in yearsToGet:
-                os.system('rm -rf ./index/%s' % str(file))
-    os.system('cat ./index/*.tsv > ./index/master.csv')
-    os.system('rm -rf ./index/*.tsv')
\ No newline at end of file
+    files = indexFiles(directory,year,endYear)
+    # Quarters outside the requested years are not loaded
+    removeIndexFiles(sorted(set(indexFiles(directory)) - set(files)))
+    logger.info('Quarters To Load: ' + str(len(files)))
+    return files
+
+def indexFiles(directory="./index",year=None,endYear=None):
+    '''
+    Paths of the quarterly index files in a folder between two years, oldest first.
+    directory -> (str) folder holding the index files
+    year -> (int) first year, no lower bound if None
+    endYear -> (int) last year, no upper bound if None
+    '''
+    files = []
+    for file in os.listdir(directory):
+        match = INDEX_FILE.match(file)
+        if match is None:
+            continue
+        fileYear = int(match.group(1))
+        if (year is None or fileYear >= year) and (endYear is None or fileYear <= endYear):
+            files.append((fileYear,int(match.group(2)),os.path.join(directory,file)))
+    return [path for _, _, path in sorted(files)]
+
+def iterIndexRows(files):
+    '''
+    Stream the rows of quarterly index files one at a time: CIK, NAME, \
+    FILING_TYPE, FILING_DATE, TXT_LINK, HTML_lINK.
+    files -> (list) paths of the index files
+    '''
+    for path in files:
+        with open(path,newline='',encoding='utf-8') as file:
+            for row in csv.reader(file,delimiter='|'):
+                if len(row) == 6:
+                    yield row
+
+def indexFileManifest(path):
+    '''
+    Read a quarterly index file once for what edgarindexmanifest records of it.
+    path -> (str) location of the index file, e.g. ./index/2022-QTR1.tsv
+    Returns (quarter, rows, hash) where quarter is named like the file, e.g. \
+    2022-QTR1, rows counts the distinct TXT_LINKs of the rows iterIndexRows \
+    yields and hash is the SHA-256 of the file.
+    '''
+    digest = hashlib.sha256()
+    links = set()
+    with open(path,'rb') as file:
+        for line in file:
+            digest.update(line)
+            # Same rule as iterIndexRows, index fields hold no quotes or line breaks
+            if line.count(b'|') == 5:
+                # edgarindex keeps one row per TXT_LINK, so repeated links would never all be in the table
+                links.add(line.split(b'|')[4])
+    return os.path.basename(path)[:-len('.tsv')], len(links), digest.hexdigest()
+
+def batches(rows,size=50000):
+    '''
+    Group rows into lists of at most size rows.
+    rows -> (iterable) rows to group
+    size -> (int) rows per list
+    '''
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
+
+def removeIndexFiles(files):
+    '''
+    Delete quarterly index files once they are loaded.
+    files -> (list) paths of the index files
+    '''
+    for path in files:
+        try:
+            os.remove(path)
+        except OSError as error:
+            logger.debug('Could not remove %s: %s' % (path,error))
@@ -0,0 +1,256 @@
+'''
+Persistent cache of EDGAR responses.
+
+Bodies are stored compressed and named by the SHA-256 of their content, so
+the same document fetched through two urls is only kept once. A small
+metadata file per url points at its body and keeps the ETag and
+Last-Modified headers. Filing folders under /Archives/edgar/data/ never
+change once published and are served from the cache without going to the
+network. Anything else is revalidated with a conditional GET.
+'''
+import os
+import io
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+def isImmutable(url):
+    '''
+    Whether a url points into a published filing folder, which never changes.
+    url -> (str) address of the resource
+    '''
+    return urlparse(url).path.lstrip('/').startswith('Archives/edgar/data/')
+
+class CachedEntry:
+    def __init__(self,cache,url,meta):
+        '''
+        A url found in the cache.
+        cache -> (HttpCache) cache the entry belongs to
+        url -> (str) address of the resource
+        meta -> (dict) metadata stored for the url
+        '''
+        self.cache = cache
+        self.url = url
+        self.meta = meta
+
+    def validators(self):
+        '''
+        Headers for a conditional GET of this url.
+        '''
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('lastModified'):
+            headers['If-Modified-Since'] = self.meta['lastModified']
+        return headers
+
+    def response(self):
+        '''
+        Build a requests.Response from the cached body, or None if the body is gone.
+        '''
+        content = self.cache.readBody(self.meta['body'])
+        if content is None:
+            return None
+        response = requests.Response()
+        response._content = content
+        response._content_consumed = True
+        response.status_code = 200
+        response.url = self.url
+        response.headers = CaseInsensitiveDict()
+        if self.meta.get('contentType'):
+            response.headers['Content-Type'] = self.meta['contentType']
+        if self.meta.get('etag'):
+            response.headers['ETag'] = self.meta['etag']
+        if self.meta.get('lastModified'):
+            response.headers['Last-Modified'] = self.meta['lastModified']
+        response.encoding = get_encoding_from_headers(response.headers)
+        # Callers that stream read from raw
+        response.raw = io.BytesIO(content)
+        response.fromCache = True
+        return response
+
+class HttpCache:
+    def __init__(self,directory='../data/http_cache',maxBytes=2*1024*1024*1024,logger=None):
+        '''
+        On-disk cache of EDGAR responses.
+        directory -> (str) folder to keep the cache in
+        maxBytes -> (int) size the cache is trimmed back to, least recently \
+                    used urls first
+        logger -> (logging object)
+        '''
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        # Responses are stored from fetchMany's worker threads
+        self.lock = threading.RLock()
+        self.metaDir = os.path.join(directory,'meta')
+        self.bodyDir = os.path.join(directory,'body')
+        os.makedirs(self.metaDir,exist_ok=True)
+        os.makedirs(self.bodyDir,exist_ok=True)
+        # url key -> (last used time, body hash)
+        self.entries = {}
+        # body hash -> compressed size
+        self.bodies = {}
+        # body hash -> url keys pointing at it
+        self.references = {}
+        for entry in os.scandir(self.bodyDir):
+            if entry.is_file() and entry.name.endswith('.z'):
+                self.bodies[entry.name[:-2]] = entry.stat().st_size
+        for entry in os.scandir(self.metaDir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                try:
+                    with open(entry.path) as file:
+                        body = json.load(file)['body']
+                except (OSError, ValueError, KeyError):
+                    continue
+                key = entry.name[:-5]
+                self.entries[key] = (entry.stat().st_mtime,body)
+                self.references.setdefault(body,set()).add(key)
+        self.totalBytes = sum(self.bodies.values())
+        if self.totalBytes > self.maxBytes:
+            self.evict()
+
+    def urlKey(self,url):
+        '''
+        File name for the metadata of a url.
+        url -> (str) address of the resource
+        '''
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def metaPath(self,key):
+        return os.path.join(self.metaDir,'%s.json' % key)
+
+    def bodyPath(self,body):
+        return os.path.join(self.bodyDir,'%s.z' % body)
+
+    def writeFile(self,path,data):
+        '''
+        Write a file through a temporary name so readers never see half of it.
+        path -> (str) file to write
+        data -> (bytes) content
+        '''
+        tmpPath = path + '.%s.tmp' % os.getpid()
+        with open(tmpPath,'wb') as file:
+            file.write(data)
+        os.replace(tmpPath,path)
+
+    def lookup(self,url):
+        '''
+        Return the CachedEntry for a url, or None if it is not cached.
+        url -> (str) address of the resource
+        '''
+        with self.lock:
+            key = self.urlKey(url)
+            if key not in self.entries:
+                return None
+            try:
+                with open(self.metaPath(key)) as file:
+                    meta = json.load(file)
+                # Mark the url as recently used
+                os.utime(self.metaPath(key))
+            except (OSError, ValueError):
+                self.forget(key)
+                return None
+            self.entries[key] = (os.path.getmtime(self.metaPath(key)),meta['body'])
+            return CachedEntry(self,url,meta)
+
+    def readBody(self,body):
+        '''
+        Return the decompressed content stored under a body hash, or None if it is missing.
+        body -> (str) SHA-256 of the content
+        '''
+        try:
+            with open(self.bodyPath(body),'rb') as file:
+                return zlib.decompress(file.read())
+        except (OSError, zlib.error):
+            return None
+
+    def store(self,url,response):
+        '''
+        Save a 200 response for a url.
+        url -> (str) address the response was requested from
+        response -> (requests.Response) response with its body read
+        '''
+        with self.lock:
+            content = response.content
+            body = hashlib.sha256(content).hexdigest()
+            key = self.urlKey(url)
+            try:
+                if body not in self.bodies:
+                    data = zlib.compress(content,6)
+                    self.writeFile(self.bodyPath(body),data)
+                    self.bodies[body] = len(data)
+                    self.totalBytes += len(data)
+                meta = {
+                    'url': url,
+                    'body': body,
+                    'etag': response.headers.get('ETag'),
+                    'lastModified': response.headers.get('Last-Modified'),
+                    'contentType': response.headers.get('Content-Type'),
+                }
+                self.writeFile(self.metaPath(key),json.dumps(meta).encode('utf-8'))
+            except OSError as error:
+                self.logger.debug('HTTP cache write failed for %s: %s' % (url,error))
+                return
+            if key in self.entries and self.entries[key][1] != body:
+                self.release(key,self.entries[key][1])
+            self.entries[key] = (os.path.getmtime(self.metaPath(key)),body)
+            self.references.setdefault(body,set()).add(key)
+            if self.totalBytes > self.maxBytes:
+                self.evict()
+
+    def release(self,key,body):
+        '''
+        Drop a url's reference to a body and delete the body once nothing points at it.
+        key -> (str) url key
+        body -> (str) SHA-256 of the content
+        '''
+        keys = self.references.get(body,set())
+        keys.discard(key)
+        if len(keys) == 0:
+            self.references.pop(body,None)
+            self.totalBytes -= self.bodies.pop(body,0)
+            try:
+                os.remove(self.bodyPath(body))
+            except OSError:
+                pass
+
+    def forget(self,key):
+        '''
+        Remove a url from the cache.
+        key -> (str) url key
+        '''
+        if key in self.entries:
+            self.release(key,self.entries.pop(key)[1])
+        try:
+            os.remove(self.metaPath(key))
+        except OSError:
+            pass
+
+    def evict(self):
+        '''
+        Remove least recently used urls until the cache is within its size limit.
+        '''
+        for key, _ in sorted(self.entries.items(),key=lambda item: item[1][0]):
+            if self.totalBytes <= self.maxBytes:
+                break
+            self.forget(key)
+            self.evictions += 1
+
+    def logStats(self,logger=None):
+        '''
+        Log hit, revalidation and miss counts.
+        logger -> (logging object) logger to use instead of the cache's own
+        '''
+        logger = logger if logger is not None else self.logger
+        logger.info('HTTP cache hits: %s, revalidated: %s, misses: %s, evictions: %s, urls: %s (%s bytes)' % (self.hits,self.revalidated,self.misses,self.evictions,len(self.entries),self.totalBytes))
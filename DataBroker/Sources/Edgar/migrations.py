@@ -0,0 +1,350 @@
+'''
+Versioned schema migrations for the EDGAR tables.
+
+Each migration has a version number and runs once, in order, in its own
+transaction. The versions applied are recorded in edgarschemaversion so the
+app can run migrate at every startup. An advisory lock keeps several workers
+starting together from running the same migration twice. checkHotQueries
+then asks Postgres how it would run the queries the jobs depend on and
+warns about any that would scan a whole table.
+'''
+import logging
+import datetime
+import psycopg2
+from psycopg2 import sql
+from .database import latestPeriodicFilingSql
+
+# Tables with fewer rows than this are cheaper to read whole, so the planner may skip their indexes
+SMALL_TABLE_ROWS = 10000
+
+# Key of the advisory lock held while migrating
+MIGRATION_LOCK = 72010117
+
+# Partitions of edgarindex are named after their year, e.g. edgarindex_2023
+PARTITION_NAME = 'edgarindex_%s'
+
+EDGARINDEX_INDEXES = [
+    # CompanyData and planFilings look up one company's 10-Ks and 10-Qs, recentTickers also matches on FILING_DATE
+    'CREATE INDEX IF NOT EXISTS edgarindex_cik_type_date ON public.edgarindex ("CIK","FILING_TYPE","FILING_DATE")',
+    # getLastDate, getFirstDate, the daily index watermark and date ranges of recentTickers
+    'CREATE INDEX IF NOT EXISTS edgarindex_filing_date ON public.edgarindex ("FILING_DATE")'
+]
+
+def dropDuplicates(table,column):
+    '''
+    SQL deleting all but one row for each value of a column.
+    table -> (str) table to clean up
+    column -> (str) column that should be unique
+    '''
+    return 'DELETE FROM public.%s a USING public.%s b WHERE a."%s" = b."%s" AND a.ctid < b.ctid' % (table,table,column,column)
+
+def addConstraint(table,name,definition):
+    '''
+    Return a step adding a constraint unless the table already has one by that name.
+    table -> (str) table to alter
+    name -> (str) name of the constraint
+    definition -> (str) constraint definition, e.g. UNIQUE ("Accession")
+    '''
+    def step(cur):
+        cur.execute('SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND conname = %s',('public.%s' % table,name))
+        if cur.fetchone() is None:
+            cur.execute('ALTER TABLE public.%s ADD CONSTRAINT %s %s' % (table,name,definition))
+    return step
+
+def isPartitioned(cur):
+    '''
+    Whether edgarindex is a partitioned table.
+    cur -> (cursor) open cursor
+    '''
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('public.edgarindex')")
+    row = cur.fetchone()
+    return row is not None and row[0] == 'p'
+
+def createYearPartition(cur,year):
+    '''
+    Add the partition of edgarindex holding one year of filings.
+    cur -> (cursor) open cursor
+    year -> (int) year of the partition
+    '''
+    cur.execute('CREATE TABLE IF NOT EXISTS public.%s PARTITION OF public.edgarindex FOR VALUES FROM (\'%s-01-01\') TO (\'%s-01-01\')' % (PARTITION_NAME % year,year,year+1))
+
+def uniqueTxtLink(cur):
+    '''
+    Make TXT_LINK identify a row of edgarindex. A partitioned edgarindex \
+    can only enforce keys that include FILING_DATE, so it gets a plain \
+    index for the loader's anti-join instead.
+    cur -> (cursor) open cursor
+    '''
+    cur.execute(dropDuplicates('edgarindex','TXT_LINK'))
+    if isPartitioned(cur):
+        cur.execute('CREATE INDEX IF NOT EXISTS edgarindex_txt_link ON public.edgarindex ("TXT_LINK")')
+    else:
+        cur.execute('CREATE UNIQUE INDEX IF NOT EXISTS edgarindex_txt_link ON public.edgarindex ("TXT_LINK")')
+
+def copyPrivileges(cur,source,target):
+    '''
+    Give a table the owner and grants of another one.
+    cur -> (cursor) open cursor
+    source -> (str) table in the public schema to copy from
+    target -> (str) table in the public schema to copy to
+    '''
+    cur.execute('''
+        SELECT pg_get_userbyid(c.relowner), a.grantee, a.privilege_type, a.is_grantable
+        FROM pg_class c LEFT JOIN LATERAL aclexplode(c.relacl) a ON true WHERE c.oid = to_regclass(%s)
+    ''',('public.%s' % source,))
+    grants = cur.fetchall()
+    owner = sql.Identifier(grants[0][0])
+    targetTable = sql.Identifier('public',target)
+    cur.execute(sql.SQL('ALTER TABLE {} OWNER TO {}').format(targetTable,owner))
+    for _, grantee, privilege, grantable in grants:
+        if grantee is None:
+            continue
+        cur.execute('SELECT CASE WHEN %s = 0 THEN NULL ELSE pg_get_userbyid(%s) END',(grantee,grantee))
+        role = cur.fetchone()[0]
+        cur.execute(sql.SQL('GRANT {} ON {} TO {}{}').format(sql.SQL(privilege),targetTable,sql.SQL('PUBLIC') if role is None else sql.Identifier(role),sql.SQL(' WITH GRANT OPTION' if grantable else '')))
+
+def partitionEdgarIndex(cur):
+    '''
+    Move edgarindex into a table partitioned by year of FILING_DATE, with a \
+    default partition for rows outside every year. Queries on a date range \
+    only read the years they cover and old years can be detached whole. \
+    Column defaults, NOT NULL and CHECK constraints, storage settings, \
+    comments, extended statistics, the owner and grants are carried over \
+    and the indexes are built again. Triggers, row security policies and \
+    views on edgarindex are not, views have to be recreated.
+    cur -> (cursor) open cursor
+    '''
+    if isPartitioned(cur):
+        return
+    cur.execute('SELECT EXTRACT(YEAR FROM MIN("FILING_DATE"))::int, EXTRACT(YEAR FROM MAX("FILING_DATE"))::int FROM public.edgarindex')
+    first, last = cur.fetchone()
+    today = datetime.date.today()
+    first = first or today.year
+    last = max(last or today.year,today.year+1)
+    cur.execute('ALTER TABLE public.edgarindex RENAME TO edgarindex_unpartitioned')
+    # Unique indexes cannot carry over, a partitioned table can only enforce keys that include FILING_DATE
+    cur.execute('CREATE TABLE public.edgarindex (LIKE public.edgarindex_unpartitioned INCLUDING ALL EXCLUDING INDEXES) PARTITION BY RANGE ("FILING_DATE")')
+    copyPrivileges(cur,'edgarindex_unpartitioned','edgarindex')
+    for year in range(first,last+1):
+        createYearPartition(cur,year)
+    cur.execute('CREATE TABLE public.edgarindex_default PARTITION OF public.edgarindex DEFAULT')
+    cur.execute('INSERT INTO public.edgarindex SELECT * FROM public.edgarindex_unpartitioned')
+    # Dropping the old table drops its indexes, so their names are free again
+    cur.execute('DROP TABLE public.edgarindex_unpartitioned')
+    for statement in EDGARINDEX_INDEXES:
+        cur.execute(statement)
+    uniqueTxtLink(cur)
+
+def createLatestPeriodicFiling(cur):
+    '''
+    Create latest_periodic_filing, the latest 10-K and 10-Q of each company, \
+    and fill it from edgarindex. databaseHandler.copy_edgarindex keeps it up \
+    to date afterwards.
+    cur -> (cursor) open cursor
+    '''
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS public.latest_periodic_filing ("CIK" bigint NOT NULL, "FILING_TYPE" text NOT NULL, "ACCESSION" text,
+            "FILING_DATE" date, "NAME" text, "TXT_LINK" text, "HTML_lINK" text, PRIMARY KEY ("CIK","FILING_TYPE"));
+    ''')
+    cur.execute(latestPeriodicFilingSql(sql.Identifier('public','edgarindex')))
+    # recentTickers reads the companies that filed since a date
+    cur.execute('CREATE INDEX IF NOT EXISTS latest_periodic_filing_date ON public.latest_periodic_filing ("FILING_DATE")')
+
+# (version, description, tables it needs, steps). A step is SQL or a function of a cursor
+MIGRATIONS = [
+    (1,'Indexes for the edgarindex lookups by company and date',['edgarindex'],EDGARINDEX_INDEXES + ['ANALYZE public.edgarindex']),
+    (2,'One row per filing in edgarindex',['edgarindex'],[uniqueTxtLink]),
+    (3,'One row per company in edgartickerindex',['edgartickerindex'],[
+        dropDuplicates('edgartickerindex','CIK'),
+        addConstraint('edgartickerindex','edgartickerindex_cik','UNIQUE ("CIK")'),
+        'ANALYZE public.edgartickerindex'
+    ]),
+    (4,'One row per accession number in edgarfilings',['edgarfilings'],[
+        dropDuplicates('edgarfilings','Accession'),
+        addConstraint('edgarfilings','accession','UNIQUE ("Accession")'),
+        'ANALYZE public.edgarfilings'
+    ]),
+    # Version 5 partitioned edgarindex, which is now left to migrate's partitionIndex flag so later versions never depend on it
+    (6,'Latest 10-K and 10-Q of each company',['edgarindex'],[createLatestPeriodicFiling,'ANALYZE public.latest_periodic_filing'])
+]
+
+# Only applied when asked for, after the versioned migrations. Whether edgarindex is partitioned is read from the catalog instead of a version, see migrate
+PARTITION_STEPS = ('Partition edgarindex by year',['edgarindex'],[partitionEdgarIndex,'ANALYZE public.edgarindex'])
+
+def appliedVersions(cur):
+    '''
+    Versions already applied to this database.
+    cur -> (cursor) open cursor
+    '''
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS public.edgarschemaversion ("VERSION" integer PRIMARY KEY, "DESCRIPTION" text, "APPLIED" timestamp with time zone DEFAULT now());
+    ''')
+    cur.execute('SELECT "VERSION" FROM public.edgarschemaversion')
+    return set(row[0] for row in cur.fetchall())
+
+def missingTables(cur,tables):
+    '''
+    Tables of a migration that do not exist yet.
+    cur -> (cursor) open cursor
+    tables -> (list) table names in the public schema
+    '''
+    missing = []
+    for table in tables:
+        cur.execute('SELECT to_regclass(%s)',('public.%s' % table,))
+        if cur.fetchone()[0] is None:
+            missing.append(table)
+    return missing
+
+def runSteps(cur,steps):
+    '''
+    Run the steps of a migration.
+    cur -> (cursor) open cursor
+    steps -> (list) SQL or functions of a cursor
+    '''
+    for step in steps:
+        if callable(step):
+            step(cur)
+        else:
+            cur.execute(step)
+
+def migrate(databaseHandler,partitionIndex=False,logger=None):
+    '''
+    Apply the migrations this database does not have yet, oldest first. \
+    A migration whose tables do not exist yet is left for the next start.
+    databaseHandler -> (databaseHandler) connection to migrate with
+    partitionIndex -> (boolean) also partition edgarindex by year once \
+                      every migration has been applied, see PARTITION_STEPS
+    logger -> (logging object)
+    Returns the versions applied.
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    conn = databaseHandler.conn
+    cur = databaseHandler.cur
+    migrations = sorted(MIGRATIONS,key=lambda migration: migration[0])
+    applied = []
+    complete = True
+    cur.execute('SELECT pg_advisory_lock(%s)',(MIGRATION_LOCK,))
+    try:
+        done = appliedVersions(cur)
+        conn.commit()
+        for version, description, tables, steps in migrations:
+            if version in done:
+                continue
+            missing = missingTables(cur,tables)
+            if len(missing) > 0:
+                logger.warning('Migration %s (%s) waits for tables %s' % (version,description,', '.join(missing)))
+                complete = False
+                continue
+            logger.info('Migration %s: %s' % (version,description))
+            try:
+                runSteps(cur,steps)
+                cur.execute('INSERT INTO public.edgarschemaversion ("VERSION","DESCRIPTION") VALUES (%s,%s)',(version,description))
+                conn.commit()
+                applied.append(version)
+            except (Exception, psycopg2.DatabaseError) as error:
+                logger.error("Migration %s failed: %s" % (version,error))
+                conn.rollback()
+                complete = False
+                break
+        description, tables, steps = PARTITION_STEPS
+        if partitionIndex and complete and not isPartitioned(cur) and len(missingTables(cur,tables)) == 0:
+            logger.info(description)
+            try:
+                runSteps(cur,steps)
+                conn.commit()
+            except (Exception, psycopg2.DatabaseError) as error:
+                logger.error("%s failed: %s" % (description,error))
+                conn.rollback()
+        if isPartitioned(cur):
+            # Filings of the coming year get their own partition before they arrive
+            today = datetime.date.today()
+            for year in (today.year,today.year+1):
+                createYearPartition(cur,year)
+            conn.commit()
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error("Error: %s" % error)
+        conn.rollback()
+    finally:
+        cur.execute('SELECT pg_advisory_unlock(%s)',(MIGRATION_LOCK,))
+        conn.commit()
+    return applied
+
+# Queries the jobs depend on, written like the code that runs them
+HOT_QUERIES = {
+    'fundamentalData': 'SELECT "CIK", "NAME", "FILING_TYPE", "FILING_DATE", "HTML_lINK" FROM public.edgarindex WHERE "FILING_TYPE" IN (\'10-K\',\'10-Q\') AND "CIK" = 320193',
+    'recentTickers': '''SELECT DISTINCT ON (l."CIK") l."CIK", l."HTML_lINK" FROM public.latest_periodic_filing l
+        WHERE l."FILING_DATE" > CURRENT_DATE - 7 AND NOT EXISTS (SELECT 1 FROM public.edgartickerindex t WHERE t."CIK" = l."CIK")
+        ORDER BY l."CIK", l."FILING_DATE" DESC''',
+    'planFilings': 'SELECT 1 FROM public.latest_periodic_filing WHERE "CIK" = 320193',
+    'getLastDate': 'SELECT MAX("FILING_DATE") FROM public.edgarindex',
+    'getFirstDate': 'SELECT MIN("FILING_DATE") FROM public.edgarindex',
+    'indexAntiJoin': 'SELECT 1 FROM public.edgarindex WHERE "TXT_LINK" = \'edgar/data/320193/0000320193-23-000106.txt\'',
+    'filingsAntiJoin': 'SELECT 1 FROM public.edgarfilings WHERE "Accession" = \'000032019323000106\''
+}
+
+def isLargeTable(relation):
+    '''
+    Whether a relation is edgarfilings, latest_periodic_filing, edgarindex or \
+    one of its partitions.
+    relation -> (str) table name from a plan
+    '''
+    return relation in ('edgarfilings','edgarindex','latest_periodic_filing') or relation.startswith('edgarindex_')
+
+def estimatedRows(cur,relation):
+    '''
+    Number of rows the planner expects in a table.
+    cur -> (cursor) open cursor
+    relation -> (str) table name from a plan
+    '''
+    cur.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",('public.%s' % relation,))
+    row = cur.fetchone()
+    return row[0] if row is not None else 0
+
+def planScans(plan,scans=None):
+    '''
+    Collect the scans of an EXPLAIN (FORMAT JSON) plan.
+    plan -> (dict) a plan node
+    scans -> (list) list to add (node type, relation, index) to
+    '''
+    if scans is None:
+        scans = []
+    if 'Relation Name' in plan or 'Index Name' in plan:
+        scans.append((plan['Node Type'],plan.get('Relation Name'),plan.get('Index Name')))
+    for child in plan.get('Plans',[]):
+        planScans(child,scans)
+    return scans
+
+def checkHotQueries(databaseHandler,logger=None):
+    '''
+    EXPLAIN each hot query and check that it reads edgarindex, or its \
+    partitions, and edgarfilings through an index. Small tables like \
+    edgartickerindex may be read whole.
+    databaseHandler -> (databaseHandler) connection to check with
+    logger -> (logging object)
+    Returns query name -> list of (node type, relation) read without an \
+    index, empty when the query only uses indexes.
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    report = {}
+    for name, query in HOT_QUERIES.items():
+        try:
+            databaseHandler.cur.execute('EXPLAIN (FORMAT JSON) ' + query)
+            plan = databaseHandler.cur.fetchone()[0][0]['Plan']
+            databaseHandler.conn.rollback()
+        except (Exception, psycopg2.DatabaseError) as error:
+            logger.warning('Could not explain %s: %s' % (name,error))
+            databaseHandler.conn.rollback()
+            continue
+        scans = planScans(plan)
+        # A bitmap heap scan reads the rows its bitmap index scan found
+        unindexed = [(node,relation) for node, relation, index in scans if index is None and node != 'Bitmap Heap Scan' and relation is not None and isLargeTable(relation) and estimatedRows(databaseHandler.cur,relation) >= SMALL_TABLE_ROWS]
+        databaseHandler.conn.rollback()
+        report[name] = unindexed
+        if len(unindexed) > 0:
+            logger.warning('Hot query %s reads without an index: %s' % (name,', '.join('%s on %s' % scan for scan in unindexed)))
+        else:
+            indexes = sorted(set(index for _, _, index in scans if index is not None))
+            logger.info('Hot query %s uses %s' % (name,', '.join(indexes) if len(indexes) > 0 else 'only small tables'))
+    return report
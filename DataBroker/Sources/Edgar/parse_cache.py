@@ -0,0 +1,199 @@
+'''
+On-disk cache of parsed filings keyed by accession number.
+
+Filings in the EDGAR archives never change once published, so the fields
+parsed from an instance document can be reused on every later run. Each
+entry is one small binary file holding the edgarfilings fields, and the
+least recently used entries are removed once the cache grows past its size
+limit. Entries record the version of the parse rules they were made with, so
+a change to the parser or the concept map turns them into misses.
+'''
+import os
+import json
+import struct
+import hashlib
+import logging
+import numpy as np
+from .filing_batch import INFO_COLUMNS, NUMERIC_COLUMNS
+from .xbrl_class import PARSER_VERSION
+from .xbrl_concepts import FUNDAMENTAL_CONCEPTS
+
+MAGIC = b'EPC2'
+HEADER = struct.Struct('<4sHHQ')
+STRING_LENGTH = struct.Struct('<i')
+
+def parseRulesVersion():
+    '''
+    Version of the rules fields are parsed with: PARSER_VERSION and a hash \
+    of the concept map, as one 64 bit number.
+    '''
+    rules = json.dumps([PARSER_VERSION,FUNDAMENTAL_CONCEPTS],sort_keys=True).encode('utf-8')
+    return int.from_bytes(hashlib.sha256(rules).digest()[:8],'little')
+
+RULES_VERSION = parseRulesVersion()
+
+def encodeFields(fields):
+    '''
+    Pack the edgarfilings fields of a parsed filing into bytes.
+    fields -> (dict) fields from the XBRL class
+    '''
+    values = np.zeros(len(NUMERIC_COLUMNS),dtype='<f8')
+    nulls = np.ones(len(NUMERIC_COLUMNS),dtype=bool)
+    for i, column in enumerate(NUMERIC_COLUMNS):
+        value = fields.get(column)
+        if value is None:
+            continue
+        try:
+            values[i] = float(value)
+            nulls[i] = False
+        except (TypeError, ValueError):
+            pass
+    parts = [HEADER.pack(MAGIC,len(NUMERIC_COLUMNS),len(INFO_COLUMNS),RULES_VERSION),values.tobytes(),np.packbits(nulls).tobytes()]
+    for column in INFO_COLUMNS:
+        value = fields.get(column)
+        if value is None:
+            parts.append(STRING_LENGTH.pack(-1))
+        else:
+            value = str(value).encode('utf-8')
+            parts.append(STRING_LENGTH.pack(len(value)))
+            parts.append(value)
+    return b''.join(parts)
+
+def decodeFields(data):
+    '''
+    Unpack bytes written by encodeFields, or return None if they are from \
+    another layout or were parsed with other rules.
+    data -> (bytes) cache entry
+    '''
+    if len(data) < HEADER.size:
+        return None
+    magic, numericCount, infoCount, rulesVersion = HEADER.unpack_from(data,0)
+    if magic != MAGIC or numericCount != len(NUMERIC_COLUMNS) or infoCount != len(INFO_COLUMNS) or rulesVersion != RULES_VERSION:
+        return None
+    offset = HEADER.size
+    values = np.frombuffer(data,dtype='<f8',count=numericCount,offset=offset)
+    offset += 8*numericCount
+    maskBytes = (numericCount+7)//8
+    nulls = np.unpackbits(np.frombuffer(data,dtype=np.uint8,count=maskBytes,offset=offset))[:numericCount].astype(bool)
+    offset += maskBytes
+    fields = {}
+    for i, column in enumerate(NUMERIC_COLUMNS):
+        fields[column] = None if nulls[i] else float(values[i])
+    for column in INFO_COLUMNS:
+        length = STRING_LENGTH.unpack_from(data,offset)[0]
+        offset += STRING_LENGTH.size
+        if length < 0:
+            fields[column] = None
+        else:
+            fields[column] = data[offset:offset+length].decode('utf-8')
+            offset += length
+    return fields
+
+class ParseCache:
+    def __init__(self,directory='../data/parse_cache',maxBytes=512*1024*1024,logger=None):
+        '''
+        Cache of parsed filing fields on disk keyed by accession number.
+        directory -> (str) folder to keep the cache entries in
+        maxBytes -> (int) size the cache is trimmed back to, least recently \
+                    used entries first
+        logger -> (logging object)
+        '''
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory,exist_ok=True)
+        # accession -> (last used time, size in bytes)
+        self.entries = {}
+        self.totalBytes = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.bin'):
+                stat = entry.stat()
+                self.entries[entry.name[:-4]] = (stat.st_mtime,stat.st_size)
+                self.totalBytes += stat.st_size
+
+    def path(self,accession):
+        '''
+        Location of the cache entry for an accession number.
+        accession -> (str) accession number without dashes
+        '''
+        return os.path.join(self.directory,'%s.bin' % accession)
+
+    def get(self,accession):
+        '''
+        Return the cached fields of a filing, or None on a miss.
+        accession -> (str) accession number without dashes
+        '''
+        fields = None
+        if accession in self.entries:
+            try:
+                with open(self.path(accession),'rb') as file:
+                    fields = decodeFields(file.read())
+                if fields is None:
+                    # Written with another layout or other parse rules, the filing is parsed again
+                    self.forget(accession)
+                else:
+                    # Mark the entry as recently used
+                    os.utime(self.path(accession))
+                    self.entries[accession] = (os.path.getmtime(self.path(accession)),self.entries[accession][1])
+            except OSError as error:
+                self.logger.debug('Parse cache read failed for %s: %s' % (accession,error))
+                self.forget(accession)
+                fields = None
+        if fields is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return fields
+
+    def put(self,accession,fields):
+        '''
+        Store the fields of a parsed filing and evict old entries if the cache is over its size limit.
+        accession -> (str) accession number without dashes
+        fields -> (dict) fields from the XBRL class
+        '''
+        data = encodeFields(fields)
+        tmpPath = self.path(accession) + '.%s.tmp' % os.getpid()
+        try:
+            with open(tmpPath,'wb') as file:
+                file.write(data)
+            os.replace(tmpPath,self.path(accession))
+        except OSError as error:
+            self.logger.debug('Parse cache write failed for %s: %s' % (accession,error))
+            return
+        if accession in self.entries:
+            self.totalBytes -= self.entries[accession][1]
+        self.entries[accession] = (os.path.getmtime(self.path(accession)),len(data))
+        self.totalBytes += len(data)
+        if self.totalBytes > self.maxBytes:
+            self.evict()
+
+    def forget(self,accession):
+        '''
+        Drop an entry from the index and remove its file.
+        accession -> (str) accession number without dashes
+        '''
+        if accession in self.entries:
+            self.totalBytes -= self.entries.pop(accession)[1]
+        try:
+            os.remove(self.path(accession))
+        except OSError:
+            pass
+
+    def evict(self):
+        '''
+        Remove least recently used entries until the cache is within its size limit.
+        '''
+        for accession, _ in sorted(self.entries.items(),key=lambda item: item[1][0]):
+            if self.totalBytes <= self.maxBytes:
+                break
+            self.forget(accession)
+            self.evictions += 1
+
+    def logStats(self):
+        '''
+        Log hit and miss counts.
+        '''
+        self.logger.info('Parse cache hits: %s, misses: %s, evictions: %s, entries: %s (%s bytes)' % (self.hits,self.misses,self.evictions,len(self.entries),self.totalBytes))
@@ -1,40 +1,43 @@
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import pandas.io.sql as sqlio
 from .xbrl_class import XBRL
 from .database import databaseHandler
-from ratelimiter import RateLimiter
+from .sec_client import fetch, fetchMany, requestCount, logHttpCacheStats
+from .filing_links import discoverLinks
 import os
 
 class recentTickers:
-    def __init__(self,date='2021-12-01',databaseHandler=databaseHandler,downloadHTML=False,logger=None):
+    def __init__(self,date='2021-12-01',databaseHandler=databaseHandler,downloadHTML=False,logger=None,skipCiks=None):
         '''
         Class to get ticker symbols from EDGAR 10-K and 10-Q filings going back to given date.
         date -> (str) Date 'YYY-mm-dd'
         databaseHandler -> (Object) Database handler
         downloadHTML -> (boolean) whether to download non XML filings
         logger -> (Object) logging object
+        skipCiks -> (set) CIKs, as strings without leading zeros, whose \
+                    tickers came from a bulk file and need no filings read
         '''
-        # THREE REQUESTS ARE MADE PER FILING SO RATE IS ACTUALLY 3X THEN WHAT THE LIMITER IS SET TO. CURRENT EDGAR RATE LIMIT IS 10 PER SECOND
-        self.rate_limiter = RateLimiter(max_calls=2,period=1,callback=self.execute_mogrify_tickers)
         if databaseHandler.conn is not None:
-            mostRecentCiksSql = "SELECT  ei.\"CIK\", ei.\"NAME\", ei.\"FILING_TYPE\", ei.\"FILING_DATE\", ei.\"TXT_LINK\", ei.\"HTML_lINK\" \
-                FROM (SELECT \"CIK\", \"FILING_TYPE\", \"FILING_DATE\" AS \
-                    \"MOST_RECENT_FILING\" FROM PUBLIC.EDGARINDEX WHERE \
-                    \"FILING_DATE\" > '%s' AND (\"FILING_TYPE\"='10-Q' OR \
-                    \"FILING_TYPE\"='10-K') GROUP BY \"CIK\",\"FILING_TYPE\", \
-                    \"FILING_DATE\") r INNER JOIN PUBLIC.EDGARINDEX ei \
-                    ON ei.\"CIK\" = r.\"CIK\" AND ei.\"FILING_DATE\" = r.\
-                    \"MOST_RECENT_FILING\" AND ei.\"FILING_TYPE\" = r.\"FILING_TYPE\" WHERE ei.\"CIK\" NOT IN (SELECT \"CIK\" FROM PUBLIC.EDGARTICKERINDEX) ORDER BY \"MOST_RECENT_FILING\";" % date
+            if databaseHandler.hasTable("latest_periodic_filing"):
+                # Latest 10-K or 10-Q of each company without a ticker, read from latest_periodic_filing by key instead of grouping edgarindex
+                source = "PUBLIC.LATEST_PERIODIC_FILING l"
+            else:
+                # The migrations have not created it yet, read the 10-Ks and 10-Qs of edgarindex instead
+                logger.warning("latest_periodic_filing does not exist, reading edgarindex")
+                source = "PUBLIC.EDGARINDEX l"
+            mostRecentCiksSql = "SELECT \"CIK\", \"NAME\", \"FILING_TYPE\", \"FILING_DATE\", \"TXT_LINK\", \"HTML_lINK\" \
+                FROM (SELECT DISTINCT ON (l.\"CIK\") l.\"CIK\", l.\"NAME\", l.\"FILING_TYPE\", l.\"FILING_DATE\", \
+                    l.\"TXT_LINK\", l.\"HTML_lINK\" FROM %s WHERE l.\"FILING_TYPE\" IN ('10-K','10-Q') AND l.\"FILING_DATE\" > '%s' \
+                    AND NOT EXISTS (SELECT 1 FROM PUBLIC.EDGARTICKERINDEX t WHERE t.\"CIK\" = l.\"CIK\") \
+                    ORDER BY l.\"CIK\", l.\"FILING_DATE\" DESC) r ORDER BY \"FILING_DATE\";" % (source,date)
             self.logger = logger
             self.date = date
             self.downloadHTML = downloadHTML
-            self.headers = {
-                'User-Agent': 'FTC edward@ftc.com',
-            }
             self.mostRecentCiksLinks = sqlio.read_sql_query(mostRecentCiksSql,databaseHandler.conn,index_col="CIK")
+            if skipCiks:
+                covered = [str(int(cik)) in skipCiks for cik in self.mostRecentCiksLinks.index]
+                self.mostRecentCiksLinks = self.mostRecentCiksLinks[[not skip for skip in covered]]
+                logger.info("Filings left to read after the bulk ticker map: %s (%s covered)" % (len(self.mostRecentCiksLinks),sum(covered)))
             self.alreadyHaveCiks = []
             self.inDatabaseCiksSql = "SELECT \"CIK\" FROM PUBLIC.EDGARTICKERINDEX"
             self.inDatabaseCiks = sqlio.read_sql_query(self.inDatabaseCiksSql,databaseHandler.conn,index_col="CIK")
@@ -45,6 +48,12 @@ class recentTickers:
             self.alreadyHaveCiks += list(self.inDatabaseCiks.index.values)
             self.databaseHandler = databaseHandler
             self.mostRecentTickers = []
+            # Tickers are inserted in batches of this size as they are found
+            self.flushSize = 100
+            # Header only parses of instance documents and how many of them had to read the whole document
+            self.headerParses = 0
+            self.headerFallbacks = 0
+            self.headerBytesRead = 0
             self.run()
         else:
             raise Exception("No Postgres Connection Provided")
@@ -54,61 +63,21 @@ class recentTickers:
         '''
         Function to run workflow to get ticker symbols from EDGAR 10-K and 10-Q filings going back to given date.
         '''
+        # HTML_lINK -> CIK
+        htmlLinks = {}
         for index,filing in self.mostRecentCiksLinks.iterrows():
-            cik = index
-            url = 'https://www.sec.gov/Archives/' + filing.HTML_lINK
-            r = self.fetchSecLink(url,self.headers)
-            res = BeautifulSoup(r.content, 'html.parser')
-
-            rows = res.findAll("tr")
-            
-            linkOptions = {}
-            for row in rows:
-                desc = row.select("td:nth-of-type(2)") 
-                typeFiling = row.select("td:nth-of-type(4)")
-                if (len(desc) >= 1):
-                    desc = desc[0].text.upper()
-                    if (desc.find('10-K') >= 0):
-                            start = desc.find('10-K')
-                            linkOptions[str(desc[start:start+4])] = row.select('a')[0].get('href')
-                    elif desc.find('10-Q') >= 0:
-                        start = desc.find('10-Q')
-                        linkOptions[str(desc[start:start+4])] = row.select('a')[0].get('href')
-                    elif desc.find('XBRL INSTANCE DOCUMENT') >= 0:
-                        start = desc.find('XBRL INSTANCE DOCUMENT')
-                        linkOptions[str(desc[start:start+4])] = row.select('a')[0].get('href')
-                if (len(typeFiling) >= 1):
-                    typeFiling = typeFiling[0].text.upper()
-                    if (typeFiling.find('10-K') >= 0 \
-                        or typeFiling.find('10-Q') >= 0  \
-                        or typeFiling.find('XML') >= 0) :
-                            linkOptions[typeFiling] = row.select('a')[0].get('href')
-            if(len(linkOptions) > 1):
-                if "XML" in linkOptions:
-                    link = linkOptions["XML"]
-                    linkOptions.clear()
-                elif "XBRL" in linkOptions:
-                    link = linkOptions["XBRL"]
-                    linkOptions.clear()
-                elif "10-K" in linkOptions:
-                    link = linkOptions["10-K"]
-                    linkOptions.clear()
-                elif "10-Q" in linkOptions:
-                    link = linkOptions["10-Q"]
-                    linkOptions.clear()
-                else:
-                    self.logger.error("Error: Can't recognize key: " + str(linkOptions))
-            elif(len(linkOptions) == 1):
-                linkKey = list(linkOptions.keys())
-                link = linkOptions[linkKey[0]]
-                linkOptions.clear()
-
+            htmlLinks[filing.HTML_lINK] = index
+        links, counts = discoverLinks(htmlLinks,self.findDocumentLink,needPrimary=self.downloadHTML,logger=self.logger)
+        # Instance document url -> CIK
+        docUrls = {}
+        for htmlLink, link in links.items():
+            cik = htmlLinks[htmlLink]
             docUrl = 'https://www.sec.gov/' + link
 
             if(docUrl.find('.xml') == -1):
                 # Write Files to Local Folder if not xml
                 if self.downloadHTML:
-                    docRequest = self.fetchSecLink(docUrl,self.headers)
+                    docRequest = self.fetchSecLink(docUrl)
                     filename = link[(link.rindex('/')+1):]
                     firstDirToMake = "./recentTickers"
                     isFirstDir = os.path.isdir(firstDirToMake)
@@ -126,38 +95,103 @@ class recentTickers:
                         fileToWrite.write(docRequest.content)
                         fileToWrite.close()
             else:
-                docRequest = self.fetchSecLink(docUrl,headers=self.headers)
+                docUrls[docUrl] = cik
+        # Only the dei cover page is read so the documents are streamed and XBRL stops reading early
+        try:
+            for docUrl, docRequest, error in fetchMany(docUrls,stream=True):
+                cik = docUrls[docUrl]
+                if error is not None:
+                    self.logger.error("Error: %s %s" % (docUrl,error))
+                    continue
+                if not docRequest.ok:
+                    # Rate limit and missing document pages are not instance documents
+                    self.logger.error("Error: %s returned %s" % (docUrl,docRequest.status_code))
+                    docRequest.close()
+                    continue
                 data = XBRL(xbrl_content=docRequest, tradingsymbol=True,logger=self.logger)
+                self.headerParses += 1
+                self.headerBytesRead += data.bytesRead
+                if data.headerFallback:
+                    self.headerFallbacks += 1
                 if data.fields['TradingSymbol'] != 'N/A' and data.fields['TradingSymbol'] != 'Not Provided' and ['TradingSymbol'] != 'NON-XML':
                     if cik not in self.alreadyHaveCiks:
                         self.mostRecentTickers.append([cik,data.fields['TradingSymbol'],docUrl])
                         self.alreadyHaveCiks.append(cik)
+                        if len(self.mostRecentTickers) >= self.flushSize:
+                            self.execute_mogrify_tickers()
                 else:
                     self.logger.info(f'')
                     self.logger.info(f'CIK: {cik}')
                     self.logger.info(f'Symbol: {data.fields["TradingSymbol"]}')
                     self.logger.info(f'')
-        self.databaseHandler.execute_mogrify(index=self.mostRecentTickers,\
-            table="edgartickerindex")#,date=self.date)
+        finally:
+            # Keep the tickers found since the last flush even if the run stops early
+            self.databaseHandler.execute_mogrify(index=self.mostRecentTickers,\
+                table="edgartickerindex")#,date=self.date)
+        if self.headerParses > 0:
+            self.logger.info('Header only parses: %s' % self.headerParses)
+            self.logger.info('Bytes read: %s' % self.headerBytesRead)
+            self.logger.info('Full parse fallbacks: %s (%.1f%%)' % (self.headerFallbacks,100.0*self.headerFallbacks/self.headerParses))
+        self.logger.info('EDGAR requests: %s' % requestCount())
+        logHttpCacheStats(self.logger)
         return self.mostRecentTickers
 
-    def fetchSecLink(self,link,headers):
+    def findDocumentLink(self,content):
+        '''
+        Find the XBRL instance, 10-K or 10-Q document in a filing index page.
+        content -> (bytes) html of the filing index page
+        '''
+        res = BeautifulSoup(content, 'html.parser')
+
+        rows = res.findAll("tr")
+        
+        linkOptions = {}
+        for row in rows:
+            desc = row.select("td:nth-of-type(2)") 
+            typeFiling = row.select("td:nth-of-type(4)")
+            if (len(desc) >= 1):
+                desc = desc[0].text.upper()
+                if (desc.find('10-K') >= 0):
+                        start = desc.find('10-K')
+                        linkOptions[str(desc[start:start+4])] = row.select('a')[0].get('href')
+                elif desc.find('10-Q') >= 0:
+                    start = desc.find('10-Q')
+                    linkOptions[str(desc[start:start+4])] = row.select('a')[0].get('href')
+                elif desc.find('XBRL INSTANCE DOCUMENT') >= 0:
+                    start = desc.find('XBRL INSTANCE DOCUMENT')
+                    linkOptions[str(desc[start:start+4])] = row.select('a')[0].get('href')
+            if (len(typeFiling) >= 1):
+                typeFiling = typeFiling[0].text.upper()
+                if (typeFiling.find('10-K') >= 0 \
+                    or typeFiling.find('10-Q') >= 0  \
+                    or typeFiling.find('XML') >= 0) :
+                        linkOptions[typeFiling] = row.select('a')[0].get('href')
+        if(len(linkOptions) > 1):
+            if "XML" in linkOptions:
+                return linkOptions["XML"]
+            elif "XBRL" in linkOptions:
+                return linkOptions["XBRL"]
+            elif "10-K" in linkOptions:
+                return linkOptions["10-K"]
+            elif "10-Q" in linkOptions:
+                return linkOptions["10-Q"]
+            else:
+                self.logger.error("Error: Can't recognize key: " + str(linkOptions))
+        elif(len(linkOptions) == 1):
+            linkKey = list(linkOptions.keys())
+            return linkOptions[linkKey[0]]
+        return None
+
+    def fetchSecLink(self,link):
         '''
-        Function to make requests to EDGAR API with rate_limiter.
+        Function to make requests to EDGAR API. sec_client applies the rate limit.
         link -> (str) address to filing to request
-        header -> (dict) headers to send in API requests
         '''
-        session = requests.Session()
-        retry = Retry(connect=3, backoff_factor=0.5)
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        with self.rate_limiter:
-            return session.get(link,headers=headers)
+        return fetch(link)
 
-    def execute_mogrify_tickers(self,until):
+    def execute_mogrify_tickers(self):
         '''
-        Wrapper function for databaseHandler.execute_mogrify to run as callback for rate_limiter.
+        Wrapper function for databaseHandler.execute_mogrify to insert the tickers found so far.
         '''
         self.databaseHandler.execute_mogrify(index=self.mostRecentTickers,table="edgartickerindex")#,date=self.date)
         self.mostRecentTickers.clear()
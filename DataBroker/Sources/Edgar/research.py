@@ -1,157 +1,125 @@
-from cmath import log
 from bs4 import BeautifulSoup
-from numpy import append
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-import pandas.io.sql as sqlio
 import os
-from .xbrl_class import XBRL
+import collections
+from concurrent.futures import Future
+from .filing_batch import FilingBatch, parseFiling, hasFilingData, EDGARFILINGS_COLUMNS
 from .database import databaseHandler
-from ratelimiter import RateLimiter
+from .sec_client import fetchMany, requestCount, logHttpCacheStats
+from .filing_links import discoverLinks
 import pandas as pd
 
+PLAN_COLUMNS = ["CIK","NAME","FILING_TYPE","FILING_DATE","HTML_lINK"]
+
+def addPlanColumns(filings):
+    '''
+    Add the folder name and accession number of each filing, computed from \
+    HTML_lINK for every row at once.
+    filings -> (DataFrame) edgarindex entries with an HTML_lINK column
+    '''
+    # e.g. edgar/data/320193/0000320193-23-000106-index.html
+    fileName = filings['HTML_lINK'].str.rsplit('/',n=1).str[-1]
+    filings['folderName'] = fileName.str[11:-11]
+    filings['accession'] = fileName.str[:-11].str.replace('-','',regex=False)
+    return filings
+
+def planFilings(ciks,databaseHandler,force=False):
+    '''
+    Plan the 10-K and 10-Q filings to fetch for a list of companies with \
+    one query. Filings already in edgarfilings are left out unless forced.
+    ciks -> (list) Central Index Keys from SEC
+    databaseHandler -> (databaseHandler object)
+    force -> (boolean) include filings already in edgarfilings
+    Returns a DataFrame indexed by CIK, with each company's filings \
+    together, newest first, so it can be split without searching.
+    '''
+    rows = databaseHandler.getFundamentalIndexEntries(ciks,force)
+    filings = pd.DataFrame(rows,columns=PLAN_COLUMNS)
+    filings['FILING_TYPE'] = filings['FILING_TYPE'].astype('category')
+    filings = addPlanColumns(filings)
+    filings.sort_values(['CIK','FILING_DATE'],ascending=[True,False],inplace=True,kind='stable')
+    return filings.set_index('CIK')
+
 class CompanyData:
-    def __init__(self,cik=None,databaseHandler=databaseHandler,logger=None,test=True,insert=True):
+    def __init__(self,cik=None,databaseHandler=databaseHandler,logger=None,test=True,insert=True,executor=None,parseCache=None,force=False,filings=None):
         '''
         Class to get data from Edgar filings.
         cik -> (str) Central Index Key from SEC
         databaseHandler -> (databaseHandler object)
         logger -> (logging object)
         test -> (boolean) whether this is a test run
+        executor -> (ProcessPoolExecutor) pool to parse filings in while the \
+                    next ones download. Filings are parsed one after another \
+                    in this process if None
+        parseCache -> (ParseCache) on-disk cache of parsed filings. Filings \
+                      found in it are not downloaded or parsed again
+        force -> (boolean) process filings already in edgarfilings again, \
+                 bypassing the parse cache, and overwrite their rows
+        filings -> (DataFrame) this company's part of planFilings, looked \
+                   up in edgarindex if None
         '''
-        # TWO REQUESTS ARE MADE PER FILING SO RATE IS ACTUALLY 2X THEN WHAT THE LIMITER IS SET TO. CURRENT EDGAR RATE LIMIT IS 10 PER SECOND
-        rate_limiter = RateLimiter(max_calls=4,period=1,callback=self.execute_mogrify_edgarfiling)
         self.insert = insert
+        self.force = force
         self.db = databaseHandler
         self.test = test
-        with rate_limiter:
-            if cik is not None and databaseHandler.conn is not None:
-                self.companyFilingsLoc = self.fundamentalData(cik,databaseHandler.conn)
-                self.companyFilingsLoc.sort_values('FILING_DATE',ascending=False,inplace=True)
-                self.logger = logger
+        self.executor = executor
+        self.parseCache = parseCache
+        if cik is not None and (filings is not None or databaseHandler.conn is not None):
+            if filings is None:
+                filings = self.fundamentalData(cik,databaseHandler.conn,force)
+            self.companyFilingsLoc = filings
+            self.logger = logger
 
-                if len(self.companyFilingsLoc) == 0:
-                    self.logger.info(str(cik)+": No filings found.")
-                    return
+            if len(self.companyFilingsLoc) == 0:
+                self.logger.info(str(cik)+": No new filings found.")
+                return
 
-                self.nullableInsertKeys = [
-                    "EntityRegistrantName",
-                    "FiscalYear",
-                    "EntityCentralIndexKey",
-                    "EntityFilerCategory",
-                    "TradingSymbol",
-                    "DocumentFiscalPeriodFocus",
-                    "DocumentType",
-                    "BalanceSheetDate",
-                    "IncomeStatementPeriodYTD",
-                    "ContextForInstants",
-                    "ContextForDurations",
-                    "Accession"
-                ]
-                self.insertKeys = [
-                    "EntityRegistrantName",
-                    "FiscalYear",
-                    "EntityCentralIndexKey",
-                    "EntityFilerCategory",
-                    "TradingSymbol",
-                    "DocumentFiscalYearFocus",
-                    "DocumentFiscalPeriodFocus",
-                    "DocumentType",
-                    "BalanceSheetDate",
-                    "IncomeStatementPeriodYTD",
-                    "ContextForInstants",
-                    "ContextForDurations",
-                    "Assets",
-                    "CurrentAssets",
-                    "NoncurrentAssets",
-                    "LiabilitiesAndEquity",
-                    "Liabilities",
-                    "CurrentLiabilities",
-                    "NoncurrentLiabilities",
-                    "CommitmentsAndContingencies",
-                    "TemporaryEquity",
-                    "Equity",
-                    "EquityAttributableToNoncontrollingInterest",
-                    "EquityAttributableToParent",
-                    "Revenues",
-                    "CostOfRevenue",
-                    "GrossProfit",
-                    "OperatingExpenses",
-                    "CostsAndExpenses",
-                    "OtherOperatingIncome",
-                    "OperatingIncomeLoss",
-                    "NonoperatingIncomeLoss",
-                    "InterestAndDebtExpense",
-                    "IncomeBeforeEquityMethodInvestments",
-                    "IncomeFromEquityMethodInvestments",
-                    "IncomeFromContinuingOperationsBeforeTax",
-                    "IncomeTaxExpenseBenefit",
-                    "IncomeFromContinuingOperationsAfterTax",
-                    "IncomeFromDiscontinuedOperations",
-                    "ExtraordaryItemsGainLoss",
-                    "NetIncomeLoss",
-                    "NetIncomeAvailableToCommonStockholdersBasic",
-                    "PreferredStockDividendsAndOtherAdjustments",
-                    "NetIncomeAttributableToNoncontrollingInterest",
-                    "NetIncomeAttributableToParent",
-                    "OtherComprehensiveIncome",
-                    "ComprehensiveIncome",
-                    "ComprehensiveIncomeAttributableToParent",
-                    "ComprehensiveIncomeAttributableToNoncontrollingInterest",
-                    "NonoperatingIncomeLossPlusInterestAndDebtExpense",
-                    "NonoperatingIncomePlusInterestAndDebtExpensePlusIncomeFromEquityMethodInvestments",
-                    "NetCashFlow",
-                    "NetCashFlowsOperating",
-                    "NetCashFlowsInvesting",
-                    "NetCashFlowsFinancing",
-                    "NetCashFlowsOperatingContinuing",
-                    "NetCashFlowsInvestingContinuing",
-                    "NetCashFlowsFinancingContinuing",
-                    "NetCashFlowsOperatingDiscontinued",
-                    "NetCashFlowsInvestingDiscontinued",
-                    "NetCashFlowsFinancingDiscontinued",
-                    "NetCashFlowsDiscontinued",
-                    "ExchangeGainsLosses",
-                    "NetCashFlowsContinuing",
-                    "SGR",
-                    "ROA",
-                    "ROE",
-                    "ROS",
-                    "Accession"
-                ]
-                self.toInsert = []
-                self.accessionNumber = {}
+            self.insertKeys = EDGARFILINGS_COLUMNS
+            self.toInsert = FilingBatch()
+            self.accessionNumber = {}
+            # folder name -> fields of filings found in the parse cache
+            self.cachedFields = {}
 
-                # Remember tickers can be found as part of the file name in the headings of 10-K/10-Q
-                i = 0
-                headers = {
-                    'User-Agent': 'FTC edward@ftc.com',
-                }
-                self.links = {}
-                for index, filing in self.companyFilingsLoc.iterrows():
-                    url = 'https://www.sec.gov/Archives/' + filing.HTML_lINK
-                    r = requests.get(url,headers=headers)
-                    res = BeautifulSoup(r.content, 'html.parser')
-                    rows = res.findAll("tr")
-                    self.accessionNumber[str(filing['folderName'])] = filing.HTML_lINK[filing.HTML_lINK.rindex("/")+1:filing.HTML_lINK.rindex("-")].replace('-','')
-                    linkOptions = []
-                    for row in rows:
-                        desc = row.select("td:nth-of-type(2)")
-                        if (len(desc) >= 1):
-                            desc = desc[0].text.upper()
-                            if (desc.find('10-K') >= 0 \
-                                or desc.find('10-Q') >= 0  \
-                                or desc.find('XBRL INSTANCE DOCUMENT') >= 0):
-                                    linkOptions.append(row.select('a')[0].get('href'))
-                    if(len(linkOptions) > 1):
-                        self.links[str(filing['folderName'])] = linkOptions[-1]
-                        linkOptions.clear()
-                    elif(len(linkOptions) == 1):
-                        self.links[str(filing['folderName'])] = linkOptions[0]
-                        linkOptions.clear()
-                    i += 1
-                self.research()
+            # Remember tickers can be found as part of the file name in the headings of 10-K/10-Q
+            self.links = {}
+            # HTML_lINK -> folder name
+            htmlLinks = {}
+            for key, htmlLink, accession in zip(self.companyFilingsLoc['folderName'],self.companyFilingsLoc['HTML_lINK'],self.companyFilingsLoc['accession']):
+                self.accessionNumber[key] = accession
+                # Set in filing order now, the link is filled in when the index page comes back
+                self.links[key] = None
+                if self.parseCache is not None and not self.force:
+                    fields = self.parseCache.get(self.accessionNumber[key])
+                    if fields is not None:
+                        self.cachedFields[key] = fields
+                        continue
+                htmlLinks[htmlLink] = key
+            links, counts = discoverLinks(htmlLinks,self.findDocumentLink,logger=self.logger)
+            for htmlLink, link in links.items():
+                self.links[htmlLinks[htmlLink]] = link
+            self.links = {key: link for key, link in self.links.items() if link is not None or key in self.cachedFields}
+            self.research()
+
+    def findDocumentLink(self,content):
+        '''
+        Find the 10-K, 10-Q or XBRL instance document in a filing index page.
+        content -> (bytes) html of the filing index page
+        '''
+        res = BeautifulSoup(content, 'html.parser')
+        rows = res.findAll("tr")
+        linkOptions = []
+        for row in rows:
+            desc = row.select("td:nth-of-type(2)")
+            if (len(desc) >= 1):
+                desc = desc[0].text.upper()
+                if (desc.find('10-K') >= 0 \
+                    or desc.find('10-Q') >= 0  \
+                    or desc.find('XBRL INSTANCE DOCUMENT') >= 0):
+                        linkOptions.append(row.select('a')[0].get('href'))
+        if(len(linkOptions) > 1):
+            return linkOptions[-1]
+        elif(len(linkOptions) == 1):
+            return linkOptions[0]
+        return None
 
     def research(self,downloadNonXML=False):
         '''
@@ -160,65 +128,108 @@ class CompanyData:
         '''
         cik = self.companyFilingsLoc.iloc[0].name
         isDir = os.path.isdir("../data/%s"%(cik))
-        testIndex = 0
-        headers = {
-            'User-Agent': 'FTC edward@ftc.com',
-        }
-        session = requests.Session()
-        retry = Retry(connect=3, backoff_factor=0.5)
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
         if(not isDir):
             os.makedirs("../data/%s"%(cik))
-        for key in self.links:
-            if(testIndex <= 0):
-                self.logger.info('Accession Numbder: ' + str(self.accessionNumber[key])) 
+        # Folder names that will give a row, in filing order. A test run stops at the first one
+        order = collections.deque()
+        # document url -> folder name
+        docUrls = {}
+        for key, link in self.links.items():
+            if key in self.cachedFields:
+                order.append(key)
+            elif link.find('.xml') >= 0:
+                order.append(key)
+                docUrls['https://www.sec.gov/' + link] = key
+            else:
+                self.logger.info('Non XML File')
+                self.logger.info('Link: ' + 'https://www.sec.gov/' + link)
+                if downloadNonXML:
+                    docUrls['https://www.sec.gov/' + link] = key
+            if self.test and len(order) > 0:
+                break
+        # folder name -> fields, or a future for them while the executor parses
+        results = {key: self.cachedFields[key] for key in order if key in self.cachedFields}
+        self.collectParsedFilings(order,results)
+        for docUrl, docRequest, error in fetchMany(docUrls):
+            key = docUrls[docUrl]
+            if error is not None:
+                self.logger.error("Error: %s %s" % (docUrl,error))
+                results[key] = None
+                continue
+            if not docRequest.ok:
+                # A rate limit or missing document page fails like a download error instead of being parsed
+                self.logger.error("Error: %s returned %s" % (docUrl,docRequest.status_code))
+                results[key] = None
+                continue
+            if(docUrl.find('.xml') == -1):
                 link = self.links[key]
-                docUrl = 'https://www.sec.gov/' + link
-                docRequest = session.get(docUrl,headers=headers)
                 filename = link[(link.rindex('/')+1):]
-                if(docUrl.find('.xml') == -1):
-                    self.logger.info('Non XML File')
-                    self.logger.info('Link: ' + str(docUrl))
-                    if downloadNonXML:
-                        dirToMake = "../data/%s/%s" %(cik,str(key))
-                        isDir = os.path.isdir(dirToMake)
-                        if(not isDir):
-                            os.makedirs(dirToMake)
-                        fileToWrite = open("../data/%s/%s/%s" %(cik,str(key),filename), "wb")
-                        fileToWrite.write(docRequest.content)
-                        fileToWrite.close()
-                        self.logger.info('Downloading...') 
-                        
-                else:
-                    self.logger.info('Reading XML')
-                    self.logger.info('Link: ' + str(docUrl))
-                    self.currentData = XBRL(xbrl_content=docRequest,tradingsymbol=False,logger=self.logger)
-                    self.currentData.fields['Accession'] = self.accessionNumber[key]
-                    structuredData = {}
-                    for key in self.insertKeys:
-                        if key in list(self.currentData.fields.keys()):
-                            structuredData[key] = str(self.currentData.fields[key])
-                        elif key in list(self.nullableInsertKeys):
-                            structuredData[key] = "Null"
-                        else:
-                            structuredData[key] = 0
-                    self.toInsert.append(list(structuredData.values()))
-                    if self.test:
-                        testIndex += 1
+                dirToMake = "../data/%s/%s" %(cik,str(key))
+                isDir = os.path.isdir(dirToMake)
+                if(not isDir):
+                    os.makedirs(dirToMake)
+                fileToWrite = open("../data/%s/%s/%s" %(cik,str(key),filename), "wb")
+                fileToWrite.write(docRequest.content)
+                fileToWrite.close()
+                self.logger.info('Downloading...')
+                continue
+            self.logger.info('Accession Numbder: ' + str(self.accessionNumber[key]))
+            self.logger.info('Reading XML')
+            self.logger.info('Link: ' + str(docUrl))
+            if self.executor is not None:
+                results[key] = self.executor.submit(parseFiling,docRequest.content,docRequest.url,self.logger)
+            else:
+                results[key] = parseFiling(docRequest.content,docRequest.url,self.logger)
+            self.collectParsedFilings(order,results)
+        self.collectParsedFilings(order,results,wait=True)
+        self.logger.info('EDGAR requests: %s' % requestCount())
+        logHttpCacheStats(self.logger)
+        if self.parseCache is not None:
+            self.parseCache.logStats()
         if self.insert:
-            self.logger.info(len(self.toInsert[-1]))
-            self.logger.info(self.toInsert[-1])
+            if len(self.toInsert) > 0:
+                self.logger.info(self.toInsert.toRows(len(self.toInsert)-1)[0])
             self.execute_mogrify_edgarfiling()
 
+    def collectParsedFilings(self,order,results,wait=False):
+        '''
+        Add rows for filings that have been parsed, keeping filing order.
+        order -> (deque) folder names still to add, in filing order
+        results -> (dict) folder name -> fields, a future for them or None \
+                   if the download failed
+        wait -> (boolean) wait for the executor to finish every filing \
+                instead of only taking the finished ones at the front. Only \
+                once every download is done
+        '''
+        while len(order) > 0 and (wait or order[0] in results):
+            fields = results.get(order[0])
+            if isinstance(fields, Future):
+                if not wait and not fields.done():
+                    return
+                fields = fields.result()
+            key = order.popleft()
+            results.pop(key,None)
+            if fields is not None:
+                self.addFilingRow(key,fields)
+
+    def addFilingRow(self,key,fields):
+        '''
+        Add the fields of a parsed filing to the batch for the edgarfilings table.
+        key -> (str) folder name of the filing
+        fields -> (dict) fields from the XBRL class
+        '''
+        self.toInsert.append(fields,self.accessionNumber[key])
+        # A parse that found nothing is not cached so the filing is downloaded again next time
+        if self.parseCache is not None and key not in self.cachedFields and hasFilingData(fields):
+            self.parseCache.put(self.accessionNumber[key],fields)
+
     def execute_mogrify_edgarfiling(self):
         '''
         Wrapper function to run execure_mogrify for the edgar filings table.
         '''
         if len(self.toInsert) > 0:
-            self.db.execute_mogrify(self.toInsert,"edgarfilings")
-            self.toInsert = []
+            self.db.copy_edgarfilings(self.toInsert,update=self.force)
+            self.toInsert = FilingBatch()
             return
 
     def saveEmptyCik(self,cik):
@@ -231,18 +242,14 @@ class CompanyData:
         self.db.conn.commit()
         self.db.execute_mogrify(self.db,[cik],'ciksWithoutFilings')
 
-    def fundamentalData(self, company, conn=None):
+    def fundamentalData(self, company, conn=None, force=False):
         '''
-        Get all 10-K and 10-Q index entries for a specific company.
+        Get the 10-K and 10-Q index entries for a specific company that are not in edgarfilings yet, newest first.
         company -> (str) CIK of company to look up in index
         conn -> connection object from databaseHandler object
+        force -> (boolean) get every entry, including filings already in edgarfilings
         '''
         if conn is not None:
-            fundamentalIndexSql = "SELECT  \"CIK\", \"NAME\", \"FILING_TYPE\", \"FILING_DATE\", \"HTML_lINK\" FROM public.edgarindex WHERE (\"FILING_TYPE\"='10-Q' OR \"FILING_TYPE\"='10-K') AND \"CIK\"=%s ORDER BY \"FILING_DATE\";" % company
-            fundamentalLinks = sqlio.read_sql_query(fundamentalIndexSql,conn,index_col="CIK")
-            fundamentalLinks['folderName'] = ''
-            for index,row in fundamentalLinks.iterrows():
-                row.folderName = row.HTML_lINK[(row.HTML_lINK.rindex('/')+12):-11]
-            return fundamentalLinks
+            return planFilings([company],self.db,force)
         else:
             raise Exception("No Postgres Connection Provided")
\ No newline at end of file
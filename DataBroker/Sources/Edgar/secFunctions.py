@@ -2,18 +2,30 @@ import logging
 import time
 import datetime
 import inspect
-from .get_edgar_index import get_edgar_index
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .get_edgar_index import get_edgar_index, removeIndexFiles
+from .daily_index import dailyIndexDays, iterDailyIndexRows
 from .database import databaseHandler
-from .research import CompanyData
+from .research import CompanyData, planFilings
+from .parse_cache import ParseCache
+from .companyfacts import loadCompanyFacts
+from .statement_datasets import loadStatementDataset
 from .recentTickers import recentTickers
+from .ticker_map import refreshTickerMap
 
 class secFunctions:
-    def __init__(self,postgresParams={},debug=False):
+    def __init__(self,postgresParams={},debug=False,parseWorkers=1,parseCacheDir=None,parseCacheSize=512*1024*1024):
         '''
         Class to perform functions on EDGAR API.
         postgresParams -> (dict) Dict with keys host, port, database, user, \
                             password for Postgres database
         debug -> (boolean) Whether to record debug logs
+        parseWorkers -> (int) Number of processes to parse XBRL filings in \
+                        while the next ones download. 1 parses in this process
+        parseCacheDir -> (str) Folder for the on-disk cache of parsed filings. \
+                         No cache if None
+        parseCacheSize -> (int) Size limit of the parse cache in bytes
         '''
         if debug:
             logging.basicConfig(
@@ -29,6 +41,10 @@ class secFunctions:
             )
         self.log = logging.getLogger(__name__)
         self.postgres = postgresParams
+        self.parseWorkers = parseWorkers
+        self.parseCache = None
+        if parseCacheDir is not None:
+            self.parseCache = ParseCache(parseCacheDir,parseCacheSize,self.log)
         # Connect to Postgres
         self.db = databaseHandler(self.postgres)
         self.startTime = time.time()
@@ -40,12 +56,13 @@ class secFunctions:
         self.log.info(f'Edgar Databroker')
         self.log.info(f'Starting Run at: {self.startTime}')
 
-    def getFyAndFqReports(self,cik=None,test=False,insert=True):
+    def getFyAndFqReports(self,cik=None,test=False,insert=True,force=False):
         '''
         Flow to get 10-K and 10-Q filings for a company.
         cik -> (str) Central Index Key from SEC
         test -> (boolean) whether this is a test run
         insert -> (boolean) whether to insert into database
+        force -> (boolean) process filings already in edgarfilings again
         '''
         if cik is not None:
             startTime = time.time()
@@ -62,16 +79,21 @@ class secFunctions:
             self.log.info(f'Fetching Annual and Fiscal Reports for: {cik}')
             self.log.info(f'Cik: {cik}')
             self.log.info(f'Start: {startTime}')
-            CompanyData(cik,self.db,self.log,test,insert)
+            executor = self.createParseExecutor()
+            try:
+                CompanyData(cik,self.db,self.log,test,insert,executor,self.parseCache,force)
+            finally:
+                if executor is not None: executor.shutdown()
             self.exit()
             return
         
-    def getFyAndFqReportsList(self,ciks=None,test=False,insert=True):
+    def getFyAndFqReportsList(self,ciks=None,test=False,insert=True,force=False):
         '''
         Flow to get 10-K and 10-Q filings for a list of companies.
         cik -> (str) Central Index Key from SEC
         test -> (boolean) whether this is a test run
         insert -> (boolean) whether to insert into database
+        force -> (boolean) process filings already in edgarfilings again
         '''
         if ciks is not None:
             startTime = time.time()
@@ -84,20 +106,33 @@ class secFunctions:
             ''' % (self.caller,startTime))
             self.runId = self.db.cur.fetchone()[0]            
 
-            for cik in ciks:
-                self.log.info('')
-                self.log.info(f'Fetching Annual and Fiscal Reports for: {cik}')
-                self.log.info(f'Cik: {cik}')
-                self.log.info(f'Start: {startTime}')
-                CompanyData(cik,self.db,self.log,test,insert)
-                self.exit()
+            # One query plans every company, each CompanyData gets its own slice
+            plan = planFilings(ciks,self.db,force)
+            companies = plan.index.unique()
+            self.log.info(f'Filings To Fetch: {len(plan)}')
+            self.log.info(f'Companies With New Filings: {len(companies)} of {len(set(ciks))}')
+            executor = self.createParseExecutor()
+            try:
+                for cik, filings in plan.groupby(level=0,sort=False):
+                    self.log.info('')
+                    self.log.info(f'Fetching Annual and Fiscal Reports for: {cik}')
+                    self.log.info(f'Cik: {cik}')
+                    self.log.info(f'Filings: {len(filings)}')
+                    CompanyData(cik,self.db,self.log,test,insert,executor,self.parseCache,force,filings)
+            finally:
+                if executor is not None: executor.shutdown()
+            self.exit()
             return
 
-    def getTickersNotInDb(self,date="2022-01-01"):
+    def getTickersNotInDb(self,date="2022-01-01",tickerFile=None):
         '''
         Parse all 10-K and 10-Q filings going back to a certain date for their tickers and insert into database if not already there.
         date -> (str) "YYYY-MM-dd" Earliest date of filings to parse in \
                 edgarindex
+        tickerFile -> (str) local copy of submissions.zip or \
+                      company_tickers_exchange.json to refresh the ticker \
+                      map from first. Only companies it doesn't cover have \
+                      their filings read
         '''
         startTime = time.time()
 
@@ -113,7 +148,10 @@ class secFunctions:
         self.log.info(f'Getting Tickers Not in DB from:')
         self.log.info(f'Date: {date}')
         self.log.info(f'Start: {startTime}')
-        recentTickers(date=date,databaseHandler=self.db,downloadHTML=False,logger=self.log)
+        coveredCiks = None
+        if tickerFile is not None:
+            coveredCiks = refreshTickerMap(tickerFile,self.db,self.log)
+        recentTickers(date=date,databaseHandler=self.db,downloadHTML=False,logger=self.log,skipCiks=coveredCiks)
         self.exit()
         return
 
@@ -131,26 +169,128 @@ class secFunctions:
         self.log.info(f'Year: {year}')
         self.log.info(f'Start: {startTime}')
         if endYear is None: endYear = datetime.datetime.today().year
-        get_edgar_index(year,endYear)
-        self.db.getNewIndexEntries()
+        files = get_edgar_index(year,endYear)
+        try:
+            self.db.getNewIndexEntries(files)
+        finally:
+            removeIndexFiles(files)
         self.exit()
         return
         
+    def getDailyIndexEntries(self,maxDays=14):
+        '''
+        Add the filings of the days since the newest one in edgarindex from EDGAR's daily index, instead of downloading the year's quarterly indexes again.
+        maxDays -> (int) most days to catch up on. Further behind, or with \
+                   an empty edgarindex, the current year's quarterly \
+                   indexes are reconciled instead
+        '''
+        lastEntry = self.db.getLastDate("edgarindex","FILING_DATE")
+        days = dailyIndexDays(lastEntry,maxDays=maxDays)
+        if days is None:
+            self.log.info(f'edgarindex ends at {lastEntry}, reconciling quarterly indexes instead of daily ones')
+            self.getIndexEntriesOfFilingsMissing(datetime.date.today().year)
+            return
+        startTime = time.time()
+
+        self.caller = inspect.stack()[0][3].upper()
+
+        # Create New Run in RunHistory
+        self.db.cur.execute('''
+            INSERT INTO PUBLIC.financedb_RUNHISTORY ("Process","Startime","SymbolsToFetch") VALUES ('%s','%s',0) RETURNING "Id";
+        ''' % (self.caller,startTime))
+        self.runId = self.db.cur.fetchone()[0]
+
+        self.log.info('')
+        self.log.info(f'Getting Daily Index Entries of SEC Filings Missing from DB')
+        self.log.info(f'Last Entry: {lastEntry}')
+        self.log.info(f'Days: {len(days)}')
+        self.log.info(f'Start: {startTime}')
+        added = self.db.copy_edgarindex(iterDailyIndexRows(days,self.log))
+        self.log.info('Index entries added: ' + str(added))
+        self.exit()
+        return
+
+    def getCompanyFactsBulk(self,path="./index/companyfacts.zip"):
+        '''
+        Load 10-K and 10-Q fundamentals for every company from a local copy of SEC's companyfacts.zip bulk archive instead of downloading each filing.
+        path -> (str) location of companyfacts.zip
+        '''
+        startTime = time.time()
+
+        self.caller = inspect.stack()[0][3].upper()
+
+        # Create New Run in RunHistory
+        self.db.cur.execute('''
+            INSERT INTO PUBLIC.financedb_RUNHISTORY ("Process","Startime","SymbolsToFetch") VALUES ('%s','%s',0) RETURNING "Id";
+        ''' % (self.caller,startTime))
+        self.runId = self.db.cur.fetchone()[0]
+
+        self.log.info('')
+        self.log.info(f'Loading companyfacts bulk archive')
+        self.log.info(f'Path: {path}')
+        self.log.info(f'Start: {startTime}')
+        executor = self.createParseExecutor()
+        try:
+            loadCompanyFacts(path,self.db,self.log,executor,2*max(self.parseWorkers or 1,1))
+        finally:
+            if executor is not None: executor.shutdown()
+        self.exit()
+        return
+
+    def getStatementDatasets(self,path="./index/financial_statements"):
+        '''
+        Backfill 10-K and 10-Q fundamentals from local copies of SEC's quarterly Financial Statement Data Sets.
+        path -> (str) one quarter's zip, e.g. 2023q3.zip, or a folder of them
+        '''
+        startTime = time.time()
+
+        self.caller = inspect.stack()[0][3].upper()
+
+        # Create New Run in RunHistory
+        self.db.cur.execute('''
+            INSERT INTO PUBLIC.financedb_RUNHISTORY ("Process","Startime","SymbolsToFetch") VALUES ('%s','%s',0) RETURNING "Id";
+        ''' % (self.caller,startTime))
+        self.runId = self.db.cur.fetchone()[0]
+
+        if os.path.isdir(path):
+            quarters = sorted(os.path.join(path,file) for file in os.listdir(path) if file.endswith('.zip'))
+        else:
+            quarters = [path]
+        self.log.info('')
+        self.log.info(f'Loading Financial Statement Data Sets')
+        self.log.info(f'Quarters: {len(quarters)}')
+        self.log.info(f'Start: {startTime}')
+        for quarter in quarters:
+            loadStatementDataset(quarter,self.db,self.log)
+        self.exit()
+        return
+
+    def createParseExecutor(self):
+        '''
+        Create the process pool filings are parsed in, or None to parse in this process.
+        '''
+        if self.parseWorkers is None or self.parseWorkers <= 1:
+            return None
+        self.log.info(f'Parse Workers: {self.parseWorkers}')
+        return ProcessPoolExecutor(max_workers=self.parseWorkers)
+
     def exit(self):
         '''
         Function to exit class.
         '''
         self.endTime = time.time()
 
-        # Update RunHistory With EndTime
-        self.db.cur.execute('''
-            UPDATE PUBLIC.financedb_RUNHISTORY
-            SET "Endtime"=%s,
-                "SymbolsInsert"=0,
-            WHERE "Id"=%s
-        ''' % (self.endTime,self.runId))
-
-        self.db.exit()
+        try:
+            # Update RunHistory With EndTime
+            self.db.cur.execute('''
+                UPDATE PUBLIC.financedb_RUNHISTORY
+                SET "Endtime"=%s,
+                    "SymbolsInsert"=0,
+                WHERE "Id"=%s
+            ''' % (self.endTime,self.runId))
+        finally:
+            # Always give the connection back so the pool is not drained
+            self.db.exit()
         self.log.info(f'Ending Run at: {self.endTime}')
         self.log.info(f'Duration: {self.endTime-self.startTime}')
         self.log.info('')
@@ -0,0 +1,402 @@
+'''
+Process wide HTTP session for requests to www.sec.gov.
+
+Every module under DataBroker/Sources/Edgar fetches through here so that
+connections are kept alive and reused, responses are gzip compressed and the
+retry policy and User-Agent header are set in one place. Every request,
+retries included, takes a token from one rate limiter for the whole process
+so overlapping jobs stay under SEC's limit together. The limiter can also be
+shared by every process on a host through a file, or by several hosts through
+Postgres.
+'''
+import os
+import io
+import time
+import fcntl
+import struct
+import logging
+import queue
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import psycopg2
+from .http_cache import HttpCache, isImmutable
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'FTC edward@ftc.com'
+
+HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Connections kept open per host. EDGAR allows 10 requests per second so a
+# handful of open connections is plenty
+POOL_SIZE = 10
+
+# SEC fair access limit in requests per second
+EDGAR_RATE_LIMIT = 10
+
+class TokenBucket:
+    def __init__(self,rate=EDGAR_RATE_LIMIT,capacity=1):
+        '''
+        Token bucket rate limiter shared by threads and asyncio tasks.
+        rate -> (float) tokens added per second
+        capacity -> (int) most tokens that can be saved up. 1 spaces \
+                    requests evenly so no second ever sees more than rate
+        '''
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        '''
+        Take a token and return how many seconds to wait before using it.
+        '''
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity,self.tokens + (now-self.updated)*self.rate)
+            self.updated = now
+            self.tokens -= 1
+            self.count += 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens/self.rate
+
+    def acquire(self):
+        '''
+        Block until a token is available.
+        '''
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquireAsync(self):
+        '''
+        Wait in the event loop until a token is available.
+        '''
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class FileTokenBucket(TokenBucket):
+    def __init__(self,path='/tmp/edgar_rate_limit',rate=EDGAR_RATE_LIMIT):
+        '''
+        Rate limiter shared by every process on a host. The time of the next \
+        free request slot is kept in a small file that is locked while it is \
+        updated.
+        path -> (str) file holding the shared state
+        rate -> (float) requests per second for all processes together
+        '''
+        super().__init__(rate,1)
+        self.path = path
+        self.file = None
+        self.filePid = None
+
+    def reserve(self):
+        '''
+        Take the next free slot across all processes and return how many seconds to wait for it.
+        '''
+        with self.lock:
+            if self.file is None or self.filePid != os.getpid():
+                # Each process needs its own open file for flock to exclude the others
+                self.file = open(self.path,'a+b')
+                self.filePid = os.getpid()
+            fcntl.flock(self.file,fcntl.LOCK_EX)
+            try:
+                self.file.seek(0)
+                data = self.file.read(8)
+                nextSlot = struct.unpack('<d',data)[0] if len(data) == 8 else 0.0
+                now = time.time()
+                slot = max(now,nextSlot)
+                self.file.seek(0)
+                self.file.truncate()
+                self.file.write(struct.pack('<d',slot + 1.0/self.rate))
+                self.file.flush()
+            finally:
+                fcntl.flock(self.file,fcntl.LOCK_UN)
+            self.count += 1
+            return slot - now
+
+class PostgresTokenBucket(TokenBucket):
+    def __init__(self,postgresParams={},rate=EDGAR_RATE_LIMIT,name='edgar'):
+        '''
+        Rate limiter shared by several hosts through a row in Postgres. Slots \
+        are handed out using the database clock so host clocks do not need \
+        to agree.
+        postgresParams -> (dict) Dict with keys host, port, database, user, \
+                            password for Postgres database
+        rate -> (float) requests per second for all hosts together
+        name -> (str) name of the limit, hosts using the same name share it
+        '''
+        super().__init__(rate,1)
+        self.params = postgresParams
+        self.name = name
+        self.conn = None
+        self.connPid = None
+
+    def connect(self):
+        '''
+        Open this process's connection and make sure the limiter row exists.
+        '''
+        self.conn = psycopg2.connect(**self.params)
+        self.conn.autocommit = True
+        self.connPid = os.getpid()
+        with self.conn.cursor() as cur:
+            # The statements run as one transaction, the lock keeps processes starting together from racing to create the table
+            cur.execute('''
+                SELECT pg_advisory_xact_lock(hashtext('public.edgarratelimit'));
+                CREATE TABLE IF NOT EXISTS public.edgarratelimit ("NAME" text PRIMARY KEY, "NEXT_SLOT" double precision NOT NULL);
+                INSERT INTO public.edgarratelimit ("NAME","NEXT_SLOT") VALUES (%s,0) ON CONFLICT ("NAME") DO NOTHING;
+            ''',(self.name,))
+
+    def reserve(self):
+        '''
+        Take the next free slot across all hosts and return how many seconds to wait for it.
+        '''
+        with self.lock:
+            if self.conn is None or self.conn.closed or self.connPid != os.getpid():
+                self.connect()
+            interval = 1.0/self.rate
+            with self.conn.cursor() as cur:
+                # The row lock taken by UPDATE makes this one atomic step
+                cur.execute('''
+                    UPDATE public.edgarratelimit
+                    SET "NEXT_SLOT" = GREATEST("NEXT_SLOT",EXTRACT(EPOCH FROM clock_timestamp())) + %s
+                    WHERE "NAME" = %s
+                    RETURNING "NEXT_SLOT" - %s - EXTRACT(EPOCH FROM clock_timestamp());
+                ''',(interval,self.name,interval))
+                delay = cur.fetchone()[0]
+            self.count += 1
+            return max(delay,0)
+
+limiter = TokenBucket()
+
+def configureRateLimit(mode='process',path='/tmp/edgar_rate_limit',postgresParams={},rate=EDGAR_RATE_LIMIT):
+    '''
+    Choose how the EDGAR rate limit is shared. Call once per process before any requests.
+    mode -> ('process', 'file' or 'postgres') limit this process on its \
+            own, share it with every process on the host through path or \
+            share it with every host through Postgres
+    path -> (str) file holding the shared state in file mode
+    postgresParams -> (dict) connection parameters for postgres mode
+    rate -> (float) requests per second
+    '''
+    global limiter
+    if mode == 'process':
+        limiter = TokenBucket(rate)
+    elif mode == 'file':
+        limiter = FileTokenBucket(path,rate)
+    elif mode == 'postgres':
+        limiter = PostgresTokenBucket(postgresParams,rate)
+    else:
+        raise Exception("Unknown rate limit mode: %s" % mode)
+    logger.info('EDGAR rate limit: %s requests per second shared by %s' % (rate,mode))
+    return limiter
+
+class RateLimitedRetry(Retry):
+    '''
+    Retry policy that takes a token from the rate limiter before each retry.
+    '''
+    def increment(self,*args,**kwargs):
+        retry = super().increment(*args,**kwargs)
+        limiter.acquire()
+        return retry
+
+# On-disk response cache, off until configureHttpCache is called
+httpCache = None
+
+_session = None
+_sessionPid = None
+_lock = threading.Lock()
+
+def createSession():
+    '''
+    Build a session with keep-alive connection pooling, the retry policy and the EDGAR headers.
+    '''
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retry = RateLimitedRetry(total=5, connect=3, read=2, status=3, backoff_factor=0.5, status_forcelist=[429,500,502,503,504], respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def getSession():
+    '''
+    Return the session for this process. A forked worker gets its own session instead of sharing the parent's sockets.
+    '''
+    global _session, _sessionPid
+    if _session is None or _sessionPid != os.getpid():
+        with _lock:
+            if _session is None or _sessionPid != os.getpid():
+                _session = createSession()
+                _sessionPid = os.getpid()
+    return _session
+
+def configureHttpCache(directory=None,maxBytes=2*1024*1024*1024):
+    '''
+    Turn on the on-disk response cache for this process, or off if directory is None.
+    directory -> (str) folder to keep the cache in
+    maxBytes -> (int) size limit of the cache in bytes
+    '''
+    global httpCache
+    httpCache = HttpCache(directory,maxBytes,logger) if directory is not None else None
+    return httpCache
+
+def cachedResponse(url):
+    '''
+    Return (response, entry). response is set when the url can be served from the cache without asking SEC, entry when there is a cached copy to revalidate.
+    url -> (str) address to request
+    '''
+    if httpCache is None:
+        return None, None
+    entry = httpCache.lookup(url)
+    if entry is not None and isImmutable(url):
+        response = entry.response()
+        if response is not None:
+            httpCache.hits += 1
+            return response, None
+        entry = None
+    return None, entry
+
+def networkGet(url,stream=False,headers=None,entry=None):
+    '''
+    GET a url from SEC, revalidating a cached copy and storing the response in the cache.
+    url -> (str) address to request
+    stream -> (boolean) leave the body unread so it can be streamed from \
+              response.raw. Filing documents are still read whole when the \
+              cache is on so they can be stored
+    headers -> (dict) extra headers for this request
+    entry -> (CachedEntry) cached copy to revalidate with a conditional GET
+    '''
+    requestHeaders = headers
+    if entry is not None:
+        requestHeaders = dict(headers or {})
+        requestHeaders.update(entry.validators())
+    response = getSession().get(url,headers=requestHeaders,stream=stream)
+    if httpCache is None:
+        return response
+    if response.status_code == 304 and entry is not None:
+        cached = entry.response()
+        if cached is not None:
+            httpCache.revalidated += 1
+            return cached
+        # The body was evicted after the lookup, ask again without validators for a full copy
+        response.close()
+        limiter.acquire()
+        return networkGet(url,stream,headers=headers,entry=None)
+    httpCache.misses += 1
+    if response.status_code == 200:
+        if not stream:
+            httpCache.store(url,response)
+        elif isImmutable(url):
+            # Filing documents never change so read them whole and cache them, later runs are served from disk. Callers that stream read from raw
+            httpCache.store(url,response)
+            response.raw = io.BytesIO(response.content)
+    return response
+
+def fetch(url,stream=False,headers=None):
+    '''
+    GET a url through the cache, or through the shared session once the rate limiter allows it.
+    url -> (str) address to request
+    stream -> (boolean) leave the body unread so it can be streamed from response.raw
+    headers -> (dict) extra headers for this request
+    '''
+    response, entry = cachedResponse(url)
+    if response is not None:
+        return response
+    limiter.acquire()
+    return networkGet(url,stream,headers,entry)
+
+def requestCount():
+    '''
+    Number of requests, retries included, made by this process so far.
+    '''
+    return limiter.count
+
+def logHttpCacheStats(log=None):
+    '''
+    Log the response cache counters if the cache is on.
+    log -> (logging object)
+    '''
+    if httpCache is not None:
+        httpCache.logStats(log)
+
+async def fetchAsync(url,executor=None,stream=False):
+    '''
+    GET a url without blocking the event loop. The request runs on the shared session in a worker thread.
+    url -> (str) address to request
+    executor -> (ThreadPoolExecutor) threads to run the request in, the \
+                loop's default executor if None
+    stream -> (boolean) leave the body unread so it can be streamed from response.raw
+    '''
+    response, entry = cachedResponse(url)
+    if response is not None:
+        return response
+    await limiter.acquireAsync()
+    return await asyncio.get_running_loop().run_in_executor(executor,networkGet,url,stream,None,entry)
+
+async def _fetchAll(urls,concurrency,results,cancelled,stream=False):
+    '''
+    Fetch every url with at most concurrency requests in flight, putting (url, response, error) on results as each finishes.
+    '''
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def fetchOne(url):
+        async with semaphore:
+            if cancelled.is_set():
+                return
+            try:
+                response = await fetchAsync(url,executor,stream)
+            except Exception as error:
+                results.put((url,None,error))
+                return
+            results.put((url,response,None))
+
+    try:
+        await asyncio.gather(*[fetchOne(url) for url in urls])
+    finally:
+        executor.shutdown(wait=False)
+
+def fetchMany(urls,concurrency=POOL_SIZE,stream=False):
+    '''
+    Fetch many urls at once and yield (url, response, error) as each request completes, not in the order given.
+    urls -> (list) addresses to request
+    concurrency -> (int) most requests in flight at a time. The rate \
+                   limiter still decides how fast they start
+    stream -> (boolean) yield responses with their bodies unread. Each \
+              holds its connection until the caller reads or closes it
+    '''
+    urls = list(urls)
+    if len(urls) == 0:
+        return
+    results = queue.Queue()
+    cancelled = threading.Event()
+    done = object()
+
+    def runLoop():
+        try:
+            asyncio.run(_fetchAll(urls,concurrency,results,cancelled,stream))
+        finally:
+            results.put(done)
+
+    thread = threading.Thread(target=runLoop,daemon=True)
+    thread.start()
+    try:
+        while True:
+            result = results.get()
+            if result is done:
+                break
+            yield result
+    finally:
+        # Stop starting new requests if the caller stops reading
+        cancelled.set()
@@ -0,0 +1,182 @@
+'''
+Bulk load of SEC's Financial Statement Data Sets.
+
+Each quarterly zip (e.g. 2023q3.zip) holds the primary statement facts of
+every filing made that quarter as flat tab separated tables. sub.txt has one
+row per filing and num.txt one row per reported number. num.txt is read in
+chunks that are filtered and joined to the 10-K and 10-Q filings of sub.txt
+with pandas, and the facts left over go through the same concept priority
+rules as a parsed instance document before being copied into edgarfilings.
+'''
+import csv
+import time
+import zipfile
+import logging
+import numpy as np
+import pandas as pd
+from .xbrl_class import XBRL
+from .filing_batch import FilingBatch
+from .companyfacts import FACT_FORMS, DURATION_CONCEPTS, NEEDED_CONCEPTS
+
+SUB_COLUMNS = ['adsh','cik','name','afs','fye','form','period','fy','fp']
+
+# segments only exists in data sets from 2024 on
+NUM_COLUMNS = ['adsh','tag','version','coreg','segments','ddate','qtrs','uom','value']
+
+# Filer status codes of sub.txt and the dei:EntityFilerCategory they stand for
+FILER_CATEGORIES = {
+    '1-LAF': 'Large Accelerated Filer',
+    '2-ACC': 'Accelerated Filer',
+    '3-SRA': 'Smaller Reporting Accelerated Filer',
+    '4-NON': 'Non-accelerated Filer',
+    '5-SML': 'Smaller Reporting Company'
+}
+
+# Tags of the priority lists without their taxonomy prefix
+NEEDED_TAGS = frozenset(concept.split(':')[1] for concept in NEEDED_CONCEPTS)
+DURATION_TAGS = [concept.split(':')[1] for concept in DURATION_CONCEPTS]
+
+def readTable(archive,name,columns,**kwargs):
+    '''
+    Open a tab separated member of a data set zip with pandas.
+    archive -> (zipfile.ZipFile) quarterly data set
+    name -> (str) member to read, sub.txt or num.txt
+    columns -> (list) columns to keep if the member has them
+    kwargs -> extra arguments for pandas.read_csv such as chunksize
+    '''
+    return pd.read_csv(archive.open(name),sep='\t',usecols=lambda column: column in columns,quoting=csv.QUOTE_NONE,encoding='utf-8',encoding_errors='replace',low_memory=False,**kwargs)
+
+def readSubmissions(archive):
+    '''
+    Return the 10-K and 10-Q filings of sub.txt indexed by adsh.
+    archive -> (zipfile.ZipFile) quarterly data set
+    '''
+    subs = readTable(archive,'sub.txt',SUB_COLUMNS,dtype=str)
+    subs = subs[subs['form'].isin(FACT_FORMS) & subs['period'].notna()]
+    subs['period'] = subs['period'].str[:8].astype(np.int64)
+    return subs.set_index('adsh')
+
+def filterFacts(chunk,periods):
+    '''
+    Keep the facts of a num.txt chunk that can fill an edgarfilings field: \
+    needed standard tags of the registrant itself, without dimensions, \
+    ending on the balance sheet date of their filing.
+    chunk -> (DataFrame) rows of num.txt
+    periods -> (Series) balance sheet date of each 10-K and 10-Q by adsh
+    '''
+    keep = chunk['tag'].isin(NEEDED_TAGS) & chunk['coreg'].isna() & chunk['value'].notna()
+    if 'segments' in chunk.columns:
+        keep &= chunk['segments'].isna()
+    # Standard tags have a taxonomy/year version, custom tags the filing's adsh
+    keep &= chunk['version'].str.contains('/',regex=False,na=False)
+    chunk = chunk[keep]
+    period = chunk['adsh'].map(periods)
+    chunk = chunk[period.notna().to_numpy() & (chunk['ddate'].to_numpy() == period.fillna(0).to_numpy())]
+    taxonomy = chunk['version'].str.split('/',n=1).str[0]
+    return pd.DataFrame({
+        'adsh': chunk['adsh'].to_numpy(),
+        'tag': chunk['tag'].to_numpy(),
+        'concept': (taxonomy + ':' + chunk['tag']).to_numpy(),
+        'qtrs': chunk['qtrs'].to_numpy(),
+        'usd': (chunk['uom'] == 'USD').to_numpy(),
+        'value': chunk['value'].to_numpy()
+    })
+
+def yearToDateQuarters(facts):
+    '''
+    Return the length in quarters of each filing's year to date period. \
+    Like GetCurrentPeriodAndContextInformation this is the longest \
+    duration of the cash flow and net income facts, or of any fact if the \
+    filing has none of those.
+    facts -> (DataFrame) output of filterFacts
+    '''
+    durations = facts[facts['qtrs'] > 0]
+    preferred = durations[durations['tag'].isin(DURATION_TAGS)].groupby('adsh')['qtrs'].max()
+    fallback = durations.groupby('adsh')['qtrs'].max()
+    return preferred.combine_first(fallback)
+
+def yearToDateStart(period,quarters):
+    '''
+    Return the start date of a year to date period as an instance document \
+    would give it, the first day after the period end moved back by its \
+    quarters. Data set periods are rounded to the end of a month so the \
+    start is the first day of a month.
+    period -> (str) balance sheet date as YYYY-MM-DD
+    quarters -> (int) length of the period from num.txt qtrs
+    '''
+    return (pd.Period(period,freq='M') - (3*quarters - 1)).start_time.strftime('%Y-%m-%d')
+
+def statementBatch(subs,facts,logger=None):
+    '''
+    Build a FilingBatch with one row per filing from the filtered facts.
+    subs -> (DataFrame) output of readSubmissions
+    facts -> (DataFrame) filtered facts of every chunk
+    logger -> (logging object)
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    ytd = yearToDateQuarters(facts)
+    qtrs = facts['qtrs'].to_numpy()
+    ytdQtrs = facts['adsh'].map(ytd).fillna(-1).to_numpy()
+    facts = facts[(qtrs == 0) | (qtrs == ytdQtrs)]
+    # Dollar amounts first, then the first fact for a concept and context wins
+    facts = facts.sort_values(['adsh','usd'],ascending=[True,False],kind='stable')
+    facts = facts.drop_duplicates(['adsh','concept','qtrs'])
+    factIndexes = {}
+    for adsh, concept, quarters, value in zip(facts['adsh'].to_numpy(),facts['concept'].to_numpy(),facts['qtrs'].to_numpy(),facts['value'].to_numpy()):
+        factIndexes.setdefault(adsh,{})[(concept,'I' if quarters == 0 else 'D')] = (value,False)
+    subs = subs.to_dict('index')
+    batch = FilingBatch(max(len(factIndexes),1))
+    for adsh, factIndex in factIndexes.items():
+        sub = subs[adsh]
+        period = str(sub['period'])
+        period = '%s-%s-%s' % (period[:4],period[4:6],period[6:])
+        instantContext = 'fsds_I_%s' % period
+        startYTD = yearToDateStart(period,int(ytd[adsh])) if adsh in ytd.index else None
+        durationContext = 'fsds_D_%sQ_%s' % (int(ytd[adsh]),period) if adsh in ytd.index else None
+        # Contexts are named after the period so they mean something in the table
+        factIndex = {(concept,instantContext if kind == 'I' else durationContext): fact for (concept,kind), fact in factIndex.items()}
+        fields = {
+            'EntityRegistrantName': sub['name'],
+            'FiscalYear': None if pd.isna(sub['fye']) else '--%s-%s' % (sub['fye'][:2],sub['fye'][2:]),
+            'EntityCentralIndexKey': str(sub['cik']).zfill(10),
+            'EntityFilerCategory': FILER_CATEGORIES.get(sub['afs']),
+            'DocumentFiscalYearFocus': None if pd.isna(sub['fy']) else sub['fy'],
+            'DocumentFiscalPeriodFocus': None if pd.isna(sub['fp']) else sub['fp'],
+            'DocumentType': sub['form'],
+            'BalanceSheetDate': period,
+            'IncomeStatementPeriodYTD': startYTD,
+            'ContextForInstants': instantContext,
+            'ContextForDurations': durationContext
+        }
+        batch.append(XBRL.fromFacts(factIndex,fields,logger).fields,adsh.replace('-',''))
+    return batch
+
+def loadStatementDataset(path,databaseHandler,logger=None,chunkSize=500000):
+    '''
+    Load the 10-K and 10-Q filings of one quarterly Financial Statement Data \
+    Set into edgarfilings. Filings already in the table are left as they are.
+    path -> (str) location of the quarter's zip, e.g. 2023q3.zip
+    databaseHandler -> (databaseHandler) connection to copy with
+    logger -> (logging object)
+    chunkSize -> (int) rows of num.txt read at a time
+    Returns (num.txt rows read, filings loaded).
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    startTime = time.time()
+    rows = 0
+    with zipfile.ZipFile(path) as archive:
+        subs = readSubmissions(archive)
+        periods = subs['period']
+        kept = []
+        dtype = {'adsh': str, 'tag': str, 'version': str, 'coreg': str, 'segments': str, 'uom': str}
+        for chunk in readTable(archive,'num.txt',NUM_COLUMNS,dtype=dtype,chunksize=chunkSize):
+            rows += len(chunk)
+            kept.append(filterFacts(chunk,periods))
+    facts = pd.concat(kept,ignore_index=True) if len(kept) > 0 else filterFacts(pd.DataFrame(columns=NUM_COLUMNS),periods)
+    batch = statementBatch(subs,facts,logger)
+    databaseHandler.copy_edgarfilings(batch)
+    duration = time.time() - startTime
+    logger.info('Financial Statement Data Set %s: %s num.txt rows, %s filings in %.1fs (%.0f rows/s)' % (path,rows,len(batch),duration,rows/duration if duration > 0 else 0))
+    return rows, len(batch)
@@ -0,0 +1,104 @@
+'''
+Ticker map refresh from SEC's bulk company files.
+
+SEC publishes the ticker of every listed filer in company_tickers_exchange.json
+and in each company's file of the nightly submissions.zip archive. Reading a
+local copy of either one is enough to fill edgartickerindex for every company
+they cover, so recentTickers only has to read filings for the rest.
+'''
+import json
+import zipfile
+import logging
+
+TICKERS_URL = 'https://www.sec.gov/files/company_tickers_exchange.json'
+SUBMISSIONS_URL = 'https://data.sec.gov/submissions/CIK%s.json'
+
+def normalizeCik(cik):
+    '''
+    CIK as a string without leading zeros, the form used in edgarindex.
+    cik -> (int or str) Central Index Key
+    '''
+    return str(int(cik))
+
+def readTickerFile(path):
+    '''
+    Return CIK -> (ticker, source url) from company_tickers_exchange.json or company_tickers.json. The first ticker listed for a company is its primary one.
+    path -> (str) location of the file
+    '''
+    with open(path,'rb') as file:
+        content = json.load(file)
+    rows = []
+    if 'fields' in content:
+        # company_tickers_exchange.json: {"fields": [...], "data": [[cik, name, ticker, exchange], ...]}
+        cikColumn = content['fields'].index('cik')
+        tickerColumn = content['fields'].index('ticker')
+        rows = [(row[cikColumn],row[tickerColumn]) for row in content['data']]
+    else:
+        # company_tickers.json: {"0": {"cik_str": ..., "ticker": ..., "title": ...}, ...}
+        rows = [(row['cik_str'],row['ticker']) for row in content.values()]
+    tickers = {}
+    for cik, ticker in rows:
+        if ticker and normalizeCik(cik) not in tickers:
+            tickers[normalizeCik(cik)] = (ticker,TICKERS_URL)
+    return tickers
+
+def readSubmissions(path):
+    '''
+    Return CIK -> (ticker, source url) from submissions.zip, reading one company file at a time.
+    path -> (str) location of submissions.zip
+    '''
+    tickers = {}
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            # CIK##########-submissions-###.json hold older filings only
+            if not info.filename.endswith('.json') or '-submissions-' in info.filename:
+                continue
+            with archive.open(info) as member:
+                company = json.load(member)
+            companyTickers = company.get('tickers') or []
+            if len(companyTickers) > 0 and company.get('cik') is not None:
+                cik = normalizeCik(company['cik'])
+                tickers[cik] = (companyTickers[0],SUBMISSIONS_URL % cik.zfill(10))
+    return tickers
+
+def readTickerMap(path):
+    '''
+    Return CIK -> (ticker, source url) from a local copy of submissions.zip or company_tickers_exchange.json.
+    path -> (str) location of the file
+    '''
+    if path.endswith('.zip'):
+        return readSubmissions(path)
+    return readTickerFile(path)
+
+def diffTickerMap(current,tickers):
+    '''
+    Compare the bulk ticker map with edgartickerindex.
+    current -> (dict) CIK -> ticker already in edgartickerindex
+    tickers -> (dict) CIK -> (ticker, source url) from the bulk file
+    Returns (new rows, changed rows) as [CIK, ticker, source url] lists.
+    '''
+    new = []
+    changed = []
+    for cik, (ticker, link) in tickers.items():
+        if cik not in current:
+            new.append([cik,ticker,link])
+        elif current[cik] != ticker:
+            changed.append([cik,ticker,link])
+    return new, changed
+
+def refreshTickerMap(path,databaseHandler,logger=None):
+    '''
+    Bring edgartickerindex up to date with a bulk ticker file, writing only the companies that are new or changed.
+    path -> (str) location of submissions.zip or company_tickers_exchange.json
+    databaseHandler -> (databaseHandler) connection to write with
+    logger -> (logging object)
+    Returns the set of CIKs the file covers.
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    tickers = readTickerMap(path)
+    current = databaseHandler.getTickerMap()
+    new, changed = diffTickerMap(current,tickers)
+    logger.info('Ticker map %s: %s companies, %s new, %s changed, %s unchanged' % (path,len(tickers),len(new),len(changed),len(tickers)-len(new)-len(changed)))
+    databaseHandler.upsert_edgartickerindex(new,changed)
+    return set(tickers)
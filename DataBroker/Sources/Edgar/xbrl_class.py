@@ -1,25 +1,42 @@
 from bs4 import BeautifulSoup
+from lxml import etree
+import io
 import re
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import unicodedata
-
-headers = {
-    'User-Agent': 'FTC edward@ftc.com',
-}
+from .xbrl_concepts import FUNDAMENTAL_CONCEPTS
+from .sec_client import fetch
+
+# Version of the rules XBRL reads fields with. Bump it whenever a change to
+# this class would give a filing different fields, so parsed filings cached
+# by ParseCache are parsed again. Changes to FUNDAMENTAL_CONCEPTS are picked
+# up on their own
+PARSER_VERSION = 1
+
+# Cover page elements read by XBRL.GetBaseInformation
+HEADER_CONCEPTS = [
+    'dei:EntityRegistrantName',
+    'dei:CurrentFiscalYearEndDate',
+    'dei:EntityCentralIndexKey',
+    'dei:EntityFilerCategory',
+    'dei:TradingSymbol',
+    'dei:DocumentFiscalYearFocus',
+    'dei:DocumentFiscalPeriodFocus',
+    'dei:DocumentType'
+]
+
+def local_name(name):
+    return str(name).split(':')[-1]
+
+def is_context(tag):
+    return local_name(tag.name) == 'context'
 
 def has_segment_and_explicitmember(tag):
-        for child in tag.children:
-            x = re.compile('segment')
-            if x.match(str(child.name)):
-                explicitMembers = len(child.find_all(re.compile('explicitMember')))
-                if explicitMembers > 0:
+    for child in tag.find_all(True):
+        if local_name(child.name) == 'segment':
+            for member in child.find_all(True):
+                if local_name(member.name) == 'explicitMember':
                     return True
-                else:
-                    return False
-            else:
-                return False
+    return False
 
 def has_nil_attr(tag):
     if len(tag.attrs) > 0:
@@ -28,42 +45,298 @@ def has_nil_attr(tag):
                 if tag[key] == "true":
                     return True
 
+def etree_local_name(tag):
+    return etree.QName(tag).localname
+
+def etree_has_nil_attr(elem):
+    for key, value in elem.attrib.items():
+        if key.endswith('nil') and value == "true":
+            return True
+    return False
+
+class CountingReader:
+    def __init__(self,raw,keep=False):
+        '''
+        File like wrapper that counts how many bytes have been read from a stream.
+        raw -> (file like object) stream to read from
+        keep -> (boolean) keep the bytes read so readAll works on a stream \
+                that cannot seek
+        '''
+        self.raw = raw
+        self.bytesRead = 0
+        self.keep = keep
+        self.chunks = []
+
+    def read(self,size=-1):
+        data = self.raw.read(size)
+        self.bytesRead += len(data)
+        if self.keep:
+            self.chunks.append(data)
+        return data
+
+    def readAll(self):
+        '''
+        Return the whole stream from its start, including what was already read.
+        '''
+        if self.keep:
+            start = b''.join(self.chunks)
+        else:
+            self.raw.seek(0)
+            start = b''
+            self.bytesRead = 0
+        return start + self.read()
+
 class XBRL:
     def __init__(self,xbrlurl=None,xbrl_content=None,tradingsymbol=True,\
-        logger=None):
+        logger=None,parser='lxml-xml'):
         '''
         Initiate XBRL class object to parse filings.
         xbrlurl -> (string) url to xbrl filing to parse
-        xbrl_content -> (GET request) get request from requests library
-        tradingsymbol -> (boolean) only get basic info such as ticker
+        xbrl_content -> (GET request) get request from requests library. A \
+                    response fetched with stream=True is read from its raw \
+                    stream and closed
+        tradingsymbol -> (boolean) only get basic info such as ticker. The \
+                    document is streamed and reading stops once the dei cover \
+                    page has been seen
+        parser -> ('lxml-xml' or 'iterparse') build a full BeautifulSoup tree \
+                    or stream the document with lxml iterparse and only keep \
+                    contexts, units and facts
         '''
         self.fields = {}
         self.logger = logger
-        session = requests.Session()
-        retry = Retry(connect=3, backoff_factor=0.5)
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        if xbrlurl is not None:
-            self.xbrlurl = xbrlurl
-            xbrl_res = session.get(xbrlurl,headers=headers)
-            xbrl_str = xbrl_res.content
-            self.parsedXbrl = BeautifulSoup(xbrl_str,'lxml-xml')
-        elif xbrl_content is not None:
-            xbrl_str = xbrl_content.content
-            self.xbrlurl = xbrl_content.url
-            self.parsedXbrl = BeautifulSoup(xbrl_str,'lxml-xml')
+        # Whether a header only parse had to read past the cover page like a full parse
+        self.headerFallback = False
+        if tradingsymbol:
+            # Only the cover page is needed so there is no reason to build a tree
+            parser = 'iterparse'
+        if parser == 'iterparse':
+            self.parsedXbrl = None
+            if xbrlurl is not None:
+                self.xbrlurl = xbrlurl
+                xbrl_res = fetch(xbrlurl,stream=True)
+                xbrl_res.raw.decode_content = True
+                source = CountingReader(xbrl_res.raw,keep=True)
+                self.parseStream(source,headerOnly=tradingsymbol)
+                xbrl_res.close()
+            elif xbrl_content is not None:
+                self.xbrlurl = xbrl_content.url
+                if getattr(xbrl_content,'_content_consumed',True):
+                    source = CountingReader(io.BytesIO(xbrl_content.content))
+                    self.parseStream(source,headerOnly=tradingsymbol)
+                else:
+                    # Fetched with stream=True, e.g. by fetchMany, so stop reading after the cover page here too
+                    xbrl_content.raw.decode_content = True
+                    source = CountingReader(xbrl_content.raw,keep=True)
+                    self.parseStream(source,headerOnly=tradingsymbol)
+                    xbrl_content.close()
+            self.bytesRead = source.bytesRead
+        elif parser == 'lxml-xml':
+            if xbrlurl is not None:
+                self.xbrlurl = xbrlurl
+                xbrl_res = fetch(xbrlurl)
+                xbrl_str = xbrl_res.content
+                self.parsedXbrl = BeautifulSoup(xbrl_str,'lxml-xml')
+            elif xbrl_content is not None:
+                xbrl_str = xbrl_content.content
+                self.xbrlurl = xbrl_content.url
+                self.parsedXbrl = BeautifulSoup(xbrl_str,'lxml-xml')
+            self.bytesRead = len(xbrl_str)
+            self.buildFactIndex()
+            self.buildContextTable()
+        else:
+            raise Exception("Unknown XBRL parser: %s" % parser)
         if tradingsymbol:
             self.GetBaseInformation()
         else:
             self.GetBaseInformation()
             self.getData()
-        
+
+    @classmethod
+    def fromFacts(cls,factIndex,fields,logger=None):
+        '''
+        Run the fundamental accounting concepts over facts that were already \
+        resolved to one instant and one duration context, such as facts from \
+        SEC's companyfacts data, without parsing an instance document.
+        factIndex -> (dict) (concept, contextRef) -> (raw value, nil flag)
+        fields -> (dict) dei fields, BalanceSheetDate, IncomeStatementPeriodYTD, \
+                  ContextForInstants and ContextForDurations of the filing
+        logger -> (logging object)
+        '''
+        xbrl = cls.__new__(cls)
+        xbrl.logger = logger
+        xbrl.headerFallback = False
+        xbrl.parsedXbrl = None
+        xbrl.xbrlurl = None
+        xbrl.bytesRead = 0
+        xbrl.factIndex = factIndex
+        xbrl.factContexts = {}
+        xbrl.contextTable = {}
+        xbrl.fields = dict(fields)
+        xbrl.fundamentalAccountingConcepts()
+        return xbrl
+
+    def buildFactIndex(self):
+        '''
+        Walk the parsed document once and index every fact by concept and context ref so lookups don't search the whole tree again.
+        '''
+        # (concept, contextRef) -> (raw text, nil flag), first fact in the document wins like find()
+        self.factIndex = {}
+        # concept -> [(position in document, contextRef)] for every fact of that concept
+        self.factContexts = {}
+        position = 0
+        for oNode in self.parsedXbrl.find_all(attrs={'contextRef': True}):
+            if oNode.prefix:
+                concept = '%s:%s' % (oNode.prefix,oNode.name)
+            else:
+                concept = oNode.name
+            contextRef = oNode['contextRef']
+            key = (concept,contextRef)
+            if key not in self.factIndex:
+                self.factIndex[key] = (oNode.text, bool(has_nil_attr(oNode)))
+            self.factContexts.setdefault(concept,[]).append((position,contextRef))
+            position += 1
+
+    def buildContextTable(self):
+        '''
+        Walk the contexts of the parsed document once and keep the period and whether the context has dimensions for each context id.
+        Handles both the unprefixed context and the prefixed xbrli:context forms.
+        '''
+        # id -> {'instant','startDate','endDate','hasDimensions'}
+        self.contextTable = {}
+        for oNode in self.parsedXbrl.find_all(is_context):
+            context = {
+                'instant': None,
+                'startDate': None,
+                'endDate': None,
+                'hasDimensions': has_segment_and_explicitmember(oNode)
+            }
+            for periodNode in oNode.find_all(True):
+                name = local_name(periodNode.name)
+                if name in ('instant','startDate','endDate'):
+                    context[name] = periodNode.text.strip()
+            self.contextTable[oNode['id']] = context
+
+    def parseStream(self,source,headerOnly=False):
+        '''
+        Parse the instance document with iterparseXbrl, or with BeautifulSoup \
+        like the lxml-xml parser when it is not well formed XML, such as an \
+        SEC error page or a document cut off before its namespaces. \
+        BeautifulSoup reads what it can and leaves the rest Not Provided.
+        source -> (CountingReader) instance document bytes
+        headerOnly -> (boolean) see iterparseXbrl
+        '''
+        try:
+            self.iterparseXbrl(source,headerOnly=headerOnly)
+        except (etree.XMLSyntaxError, ValueError) as error:
+            if self.logger is not None:
+                self.logger.warning('Not well formed XML at %s, parsing it like lxml-xml: %s' % (self.xbrlurl,error))
+            self.headerFallback = True
+            self.parsedXbrl = BeautifulSoup(source.readAll(),'lxml-xml')
+            self.buildFactIndex()
+            self.buildContextTable()
+
+    def iterparseXbrl(self,source,headerOnly=False):
+        '''
+        Stream the instance document with lxml iterparse and fill the fact index, context table and unit table without keeping the tree.
+        Top level elements are freed as soon as they have been read.
+        source -> (file like object) instance document bytes
+        headerOnly -> (boolean) stop reading once the dei cover page block \
+                        has been read. If other facts come before the block \
+                        or it ends without a trading symbol, reading goes on \
+                        like a full parse and headerFallback is set
+        '''
+        headerSeen = set()
+        self.factIndex = {}
+        self.factContexts = {}
+        self.contextTable = {}
+        # id -> measure(s) of the unit, divide units are joined with '/'
+        self.unitTable = {}
+        position = 0
+        for event, elem in etree.iterparse(source,events=('end',),huge_tree=True):
+            if not isinstance(elem.tag,str):
+                continue
+            name = etree_local_name(elem.tag)
+            if name == 'context':
+                context = {
+                    'instant': None,
+                    'startDate': None,
+                    'endDate': None,
+                    'hasDimensions': False
+                }
+                for child in elem.iter():
+                    if not isinstance(child.tag,str):
+                        continue
+                    childName = etree_local_name(child.tag)
+                    if childName in ('instant','startDate','endDate'):
+                        context[childName] = (child.text or '').strip()
+                    elif childName == 'segment':
+                        for member in child.iter():
+                            if isinstance(member.tag,str) and etree_local_name(member.tag) == 'explicitMember':
+                                context['hasDimensions'] = True
+                self.contextTable[elem.get('id')] = context
+            elif name == 'unit':
+                measures = [(child.text or '').strip() for child in elem.iter() if isinstance(child.tag,str) and etree_local_name(child.tag) == 'measure']
+                self.unitTable[elem.get('id')] = '/'.join(measures)
+            elif elem.get('contextRef') is not None:
+                if elem.prefix:
+                    concept = '%s:%s' % (elem.prefix,name)
+                else:
+                    concept = name
+                contextRef = elem.get('contextRef')
+                key = (concept,contextRef)
+                if key not in self.factIndex:
+                    self.factIndex[key] = (''.join(elem.itertext()), etree_has_nil_attr(elem))
+                self.factContexts.setdefault(concept,[]).append((position,contextRef))
+                position += 1
+                if headerOnly:
+                    if concept in HEADER_CONCEPTS:
+                        headerSeen.add(concept)
+                    if len(headerSeen) == len(HEADER_CONCEPTS):
+                        return
+                    if not concept.startswith('dei:'):
+                        if 'dei:TradingSymbol' in headerSeen:
+                            # Past the cover page block
+                            return
+                        # Cover page isn't at the top so keep reading like a full parse
+                        self.headerFallback = True
+            parent = elem.getparent()
+            if parent is not None and parent.getparent() is None:
+                # Free top level elements once read, children stay until their parent is done
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+        if headerOnly:
+            self.headerFallback = True
+
+    def GetFactContexts(self,concepts):
+        '''
+        Get the context refs of every fact for the given concepts in document order.
+        concepts -> (list) Concepts to look up in the fact index
+        '''
+        found = []
+        for concept in concepts:
+            found += self.factContexts.get(concept,[])
+        found.sort()
+        return [contextRef for position, contextRef in found]
+
+    def GetFirstFactText(self,concept):
+        '''
+        Get the raw text of the first fact for a concept regardless of context, or None if the concept isn't in the filing.
+        concept -> (str) Concept to look up in the fact index
+        '''
+        contexts = self.factContexts.get(concept)
+        if not contexts:
+            return None
+        return self.factIndex[(concept,contexts[0][1])][0]
+
     def getData(self):
         '''
         Gets the ending date of this filing period to be able to get the current context ref of the filing and finally pull data.
         '''
-        currentEnd = self.parsedXbrl.find('dei:DocumentPeriodEndDate').text
+        currentEnd = self.GetFirstFactText('dei:DocumentPeriodEndDate')
+        if currentEnd is None:
+            self.logger.debug('No dei:DocumentPeriodEndDate in filing')
+            return
         asdate = re.match('\s*(\d{4})-(\d{2})-(\d{2})\s*', currentEnd)
         if asdate:
             thisend = '%s-%s-%s' % (asdate.groups()[0],asdate.groups()[1],asdate.groups()[2])                    
@@ -94,84 +367,117 @@ class XBRL:
             return None
 
 
-        oNode = self.parsedXbrl.find(str(SeekConcept),attrs={'contextRef':str(ContextReference)})
-        if oNode is not None:                    
-            factValue = oNode.text
-            if has_nil_attr(oNode):
-                factValue=0
-            try:
-                factValue = float(factValue)
-            except:
-                self.logger.error('couldnt convert %s=%s to string' % (SeekConcept,factValue))
-                factValue = None
-                pass
+        fact = self.factIndex.get((str(SeekConcept),str(ContextReference)))
+        if fact is not None:
+            factValue = self.ParseFactValue(SeekConcept,fact)
             
         return factValue   
 
+    def ParseFactValue(self,SeekConcept,fact):
+        '''
+        Convert a fact from the fact index to a float. Nil facts are 0 and facts that aren't numbers are None.
+        SeekConcept -> (str) Concept of the fact, used for logging
+        fact -> (tuple) raw text and nil flag from the fact index
+        '''
+        factValue, nil = fact
+        if nil:
+            factValue=0
+        try:
+            factValue = float(factValue)
+        except:
+            self.logger.error('couldnt convert %s=%s to string' % (SeekConcept,factValue))
+            factValue = None
+        return factValue
+
+    def ResolveConcepts(self,conceptMap=FUNDAMENTAL_CONCEPTS):
+        '''
+        Resolve every field of a concept map against the fact index. For each field the first concept reported in the field's context is used, otherwise the field's default.
+        conceptMap -> (dict) field -> periodType, ordered concepts and default, see xbrl_concepts.py
+        '''
+        contexts = {
+            'Instant': self.fields['ContextForInstants'],
+            'Duration': self.fields['ContextForDurations']
+        }
+        values = {}
+        for field, spec in conceptMap.items():
+            ContextReference = contexts[spec['periodType']]
+            factValue = None
+            if ContextReference:
+                for concept in spec['concepts']:
+                    fact = self.factIndex.get((concept,str(ContextReference)))
+                    if fact is not None:
+                        factValue = self.ParseFactValue(concept,fact)
+                        if factValue is not None:
+                            break
+            if factValue is None:
+                factValue = spec['default']
+            values[field] = factValue
+        return values
+
     def GetBaseInformation(self):
         '''
         Get basic information that doesn't depend on context ref. In other words information that doesnn't change frequently like entity name.
         '''               
         #Registered Name
-        oNode = self.parsedXbrl.find('dei:EntityRegistrantName')
-        if oNode is not None:
-            self.fields['EntityRegistrantName'] = oNode.text
+        factText = self.GetFirstFactText('dei:EntityRegistrantName')
+        if factText is not None:
+            self.fields['EntityRegistrantName'] = factText
             unicodedata.normalize('NFD', self.fields['EntityRegistrantName']).encode('ascii', 'ignore')
         else:
             self.fields['EntityRegistrantName'] = "NULL"
 
         #Fiscal year
-        oNode = self.parsedXbrl.find('dei:CurrentFiscalYearEndDate')     
-        if oNode is not None:
-            self.fields['FiscalYear'] = oNode.text
+        factText = self.GetFirstFactText('dei:CurrentFiscalYearEndDate')     
+        if factText is not None:
+            self.fields['FiscalYear'] = factText
             unicodedata.normalize('NFD', self.fields['FiscalYear']).encode('ascii', 'ignore')
         else:
             self.fields['FiscalYear'] = "NULL"
 
         #EntityCentralIndexKey
-        oNode = self.parsedXbrl.find("dei:EntityCentralIndexKey")
-        if oNode is not None:
-            self.fields['EntityCentralIndexKey'] = oNode.text
+        factText = self.GetFirstFactText('dei:EntityCentralIndexKey')
+        if factText is not None:
+            self.fields['EntityCentralIndexKey'] = factText
             unicodedata.normalize('NFD', self.fields['EntityCentralIndexKey']).encode('ascii', 'ignore')
         else:
             self.fields['EntityCentralIndexKey'] = "NULL"
 
         #EntityFilerCategory
-        oNode = self.parsedXbrl.find("dei:EntityFilerCategory")
-        if oNode is not None:
-            self.fields['EntityFilerCategory'] = oNode.text
+        factText = self.GetFirstFactText('dei:EntityFilerCategory')
+        if factText is not None:
+            self.fields['EntityFilerCategory'] = factText
             unicodedata.normalize('NFD', self.fields['EntityFilerCategory']).encode('ascii', 'ignore')
         else:
             self.fields['EntityFilerCategory'] = "NULL"
 
         #TradingSymbol
-        oNode = self.parsedXbrl.find("dei:TradingSymbol")
-        if oNode is not None:
-            self.fields['TradingSymbol'] = oNode.text
+        factText = self.GetFirstFactText('dei:TradingSymbol')
+        if factText is not None:
+            self.fields['TradingSymbol'] = factText
             unicodedata.normalize('NFD', self.fields['TradingSymbol']).encode('ascii', 'ignore')
         else:
             self.fields['TradingSymbol'] = "Not Provided"
 
         #DocumentFiscalYearFocus
-        oNode = self.parsedXbrl.find("dei:DocumentFiscalYearFocus")
-        if oNode is not None:
-            self.fields['DocumentFiscalYearFocus'] = oNode.text
+        factText = self.GetFirstFactText('dei:DocumentFiscalYearFocus')
+        if factText is not None:
+            self.fields['DocumentFiscalYearFocus'] = factText
             unicodedata.normalize('NFD', self.fields['DocumentFiscalYearFocus']).encode('ascii', 'ignore')
         else:
             self.fields['DocumentFiscalYearFocus'] = "NULL"
 
         #DocumentFiscalPeriodFocus
-        oNode = self.parsedXbrl.find("dei:DocumentFiscalPeriodFocus")
-        if oNode is not None:
-            self.fields['DocumentFiscalPeriodFocus'] = oNode.text
+        factText = self.GetFirstFactText('dei:DocumentFiscalPeriodFocus')
+        if factText is not None:
+            self.fields['DocumentFiscalPeriodFocus'] = factText
             unicodedata.normalize('NFD', self.fields['DocumentFiscalPeriodFocus']).encode('ascii', 'ignore')
         else:
             self.fields['DocumentFiscalPeriodFocus'] = "NULL"
         
         #DocumentType
-        oNode = self.parsedXbrl.find("dei:DocumentType")
-        if oNode is not None:
-            self.fields['DocumentType'] = oNode.text
+        factText = self.GetFirstFactText('dei:DocumentType')
+        if factText is not None:
+            self.fields['DocumentType'] = factText
             unicodedata.normalize('NFD', self.fields['DocumentType']).encode('ascii', 'ignore')
         else:
             self.fields['DocumentType'] = "NULL"
@@ -206,26 +512,21 @@ class XBRL:
         UseContext = "ERROR"
 
         #This is the <instant> or the <endDate>
-        oNodelist2 = self.parsedXbrl.find_all(['us-gaap:Assets', 'us-gaap:AssetsCurrent', 'us-gaap:LiabilitiesAndStockholdersEquity'])
-
-        #Nodelist of all the facts which are us-gaap:Assets
-        for i in oNodelist2:            
-            ContextID = i['contextRef']
-            #Nodelist of all the contexts of the fact us-gaap:Assets
-            oNodelist3 = self.parsedXbrl.find_all('context',attrs={'id': ContextID})
-            if len(oNodelist3) == 0:
-                oNodelist4 = self.parsedXbrl.find_all('xbrli:context',attrs={'id': ContextID})
-            if len(oNodelist3) == 0:
-                    if len(oNodelist4) > 0:
-                        self.logger.debug("xbrli:period: " + str(oNodelist4[0]))
-
-            for j in oNodelist3:
-                #Nodes with the right period
-                if j.period.instant is not None and j.period.instant.text==EndDate:
-                    
-                    oNode4 = j.find_all(has_segment_and_explicitmember)
-                    if not len(oNode4):
-                        UseContext = ContextID
+        oNodelist2 = self.GetFactContexts(['us-gaap:Assets', 'us-gaap:AssetsCurrent', 'us-gaap:LiabilitiesAndStockholdersEquity'])
+
+        #Context refs of all the facts which are us-gaap:Assets
+        for ContextID in oNodelist2:
+            #Context of the fact us-gaap:Assets
+            context = self.contextTable.get(ContextID)
+            if context is None:
+                self.logger.debug("No context found for: " + str(ContextID))
+                continue
+
+            #Contexts with the right period
+            if context['instant']==EndDate:
+
+                if not context['hasDimensions']:
+                    UseContext = ContextID
         
         ContextForInstants = UseContext
         self.fields['ContextForInstants'] = ContextForInstants
@@ -234,60 +535,54 @@ class XBRL:
         ###This finds the duration context
         ###This may work incorrectly for fiscal year ends because the dates cross calendar years
         #Get context ID of durations and the start date for the database table
-        oNodelist2 = self.parsedXbrl.find_all(['us-gaap:CashAndCashEquivalentsPeriodIncreaseDecrease','us-gaap:CashPeriodIncreaseDecrease', 'us-gaap:NetIncomeLoss', 'dei:DocumentPeriodEndDate'])
+        oNodelist2 = self.GetFactContexts(['us-gaap:CashAndCashEquivalentsPeriodIncreaseDecrease','us-gaap:CashPeriodIncreaseDecrease', 'us-gaap:NetIncomeLoss', 'dei:DocumentPeriodEndDate'])
 
         StartDate = "ERROR"
         StartDateYTD = "2099-01-01"
         UseContext = "ERROR"
 
-        for i in oNodelist2:
-            
-            ContextID = i['contextRef']
+        for ContextID in oNodelist2:
             
-            #Nodelist of all the contexts of the fact us-gaap:Assets
-            oNodelist3 = self.parsedXbrl.find_all('context',attrs={'id': ContextID})
-            if len(oNodelist3) == 0:
-                oNodelist4 = self.parsedXbrl.find_all('xbrli:context',attrs={'id': ContextID})
-            if len(oNodelist3) == 0:
-                    if len(oNodelist4) > 0:
-                        self.logger.debug("xbrli:period: " + str(oNodelist4[0]))
-
-            for j in oNodelist3:
-                #Nodes with the right period
-                if j.period.endDate.text==EndDate:
-                    
-                    oNode4 = j.find_all(has_segment_and_explicitmember)
-                    if not len(oNode4): 
+            #Context of the fact
+            context = self.contextTable.get(ContextID)
+            if context is None:
+                self.logger.debug("No context found for: " + str(ContextID))
+                continue
+
+            #Contexts with the right period
+            if context['endDate']==EndDate and context['startDate'] is not None:
+                
+                if not context['hasDimensions']: 
+                
+                    #Get the year-to-date context, not the current period
+                    StartDate = context['startDate']
+                    self.logger.debug("Context start date: " + StartDate)
+                    self.logger.debug("YTD start date: " + StartDateYTD)
                     
-                        #Get the year-to-date context, not the current period
-                        StartDate = j.period.startDate.text
+                    if StartDate <= StartDateYTD:
+                        #MsgBox "YTD is greater"
+                        #Start date is for quarter
+                        self.logger.debug("Context start date is less than current year to date, replace")
                         self.logger.debug("Context start date: " + StartDate)
-                        self.logger.debug("YTD start date: " + StartDateYTD)
+                        self.logger.debug("Current min: " + StartDateYTD)
                         
-                        if StartDate <= StartDateYTD:
-                            #MsgBox "YTD is greater"
-                            #Start date is for quarter
-                            self.logger.debug("Context start date is less than current year to date, replace")
-                            self.logger.debug("Context start date: " + StartDate)
-                            self.logger.debug("Current min: " + StartDateYTD)
-                            
-                            StartDateYTD = StartDate
-                            UseContext = j['id']
-                        else:
-                            #MsgBox "Context is greater"
-                            #Start date is for year
-                            self.logger.debug("Context start date is greater than YTD, keep current YTD")
-                            self.logger.debug("Context start date: " + StartDate)
-                            
-                            StartDateYTD = StartDateYTD
+                        StartDateYTD = StartDate
+                        UseContext = ContextID
+                    else:
+                        #MsgBox "Context is greater"
+                        #Start date is for year
+                        self.logger.debug("Context start date is greater than YTD, keep current YTD")
+                        self.logger.debug("Context start date: " + StartDate)
+                        
+                        StartDateYTD = StartDateYTD
 
+                    
+                    self.logger.debug("Use context ID: " + UseContext)
+                    self.logger.debug("Current min: " + StartDateYTD)
+                    self.logger.debug(" ")
+                                    
+                    self.logger.debug("Use context: " + UseContext)
                         
-                        self.logger.debug("Use context ID: " + UseContext)
-                        self.logger.debug("Current min: " + StartDateYTD)
-                        self.logger.debug(" ")
-                                        
-                        self.logger.debug("Use context: " + UseContext)
-                            
 
         #Balance sheet date of current period
         self.fields['BalanceSheetDate'] = EndDate
@@ -313,24 +608,22 @@ class XBRL:
         #This deals with the situation where instance context has no dimensions            
         something = None
         
-        #See if there are any nodes with the document period focus date
-        oNodeList_Alt = self.parsedXbrl.find_all('instant',string=self.fields['BalanceSheetDate'])
+        #See if there are any contexts with the document period focus date
+        oNodeList_Alt = [ContextID for ContextID, context in self.contextTable.items() if context['instant']==self.fields['BalanceSheetDate']]
         self.logger.debug("Possible Contexts: " + str(len(oNodeList_Alt)))
 
         #MsgBox "Node list length: " + oNodeList_Alt.length
-        for oNode_Alt in oNodeList_Alt:
-            if oNode_Alt.parent.parent.name == 'context':
-                context = oNode_Alt.parent.parent
-            self.logger.debug("Possible ID: " + context['id'])
+        for ContextID in oNodeList_Alt:
+            self.logger.debug("Possible ID: " + ContextID)
             
             #Found possible contexts
             #MsgBox context.selectSingleNode("@id").text
-            something = self.parsedXbrl.find('us-gaap:Assets',attrs={'contextRef': context["id"]})
+            something = ('us-gaap:Assets',ContextID) in self.factIndex
 
             if something:
                 #MsgBox "Use this context: " + context.selectSingleNode("@id").text
-                self.logger.debug("Alternative Context ID: " + context['id'])
-                return context['id']
+                self.logger.debug("Alternative Context ID: " + ContextID)
+                return ContextID
             else:
                 return False
 
@@ -346,118 +639,30 @@ class XBRL:
         self.logger.debug(" ")
 
         
-        #Assets
-        self.fields['Assets'] = self.GetFactValue("us-gaap:Assets", "Instant")
-        if self.fields['Assets']== None:
-            self.fields['Assets'] = 0
-
-        #Current Assets
-        self.fields['CurrentAssets'] = self.GetFactValue("us-gaap:AssetsCurrent", "Instant")
-        if self.fields['CurrentAssets']== None:
-            self.fields['CurrentAssets'] = 0
-                
+        #Every field's priority list of concepts, looked up in one pass over the fact index
+        self.fields.update(self.ResolveConcepts(FUNDAMENTAL_CONCEPTS))
+        RedeemableNoncontrollingInterest = self.fields.pop('RedeemableNoncontrollingInterest')
+
         #Noncurrent Assets
-        self.fields['NoncurrentAssets'] = self.GetFactValue("us-gaap:AssetsNoncurrent", "Instant")
         if self.fields['NoncurrentAssets']==None:
             if self.fields['Assets'] and self.fields['CurrentAssets']:
                 self.fields['NoncurrentAssets'] = self.fields['Assets'] - self.fields['CurrentAssets']
             else:
                 self.fields['NoncurrentAssets'] = 0
-                
-        #LiabilitiesAndEquity
-        self.fields['LiabilitiesAndEquity'] = self.GetFactValue("us-gaap:LiabilitiesAndStockholdersEquity", "Instant")
-        if self.fields['LiabilitiesAndEquity']== None:
-            self.fields['LiabilitiesAndEquity'] = self.GetFactValue("us-gaap:LiabilitiesAndPartnersCapital", "Instant")
-            if self.fields['LiabilitiesAndEquity']== None:
-                self.fields['LiabilitiesAndEquity'] = 0
-        
-        #Liabilities
-        self.fields['Liabilities'] = self.GetFactValue("us-gaap:Liabilities", "Instant")
-        if self.fields['Liabilities']== None:
-            self.fields['Liabilities'] = 0
-                
-        #CurrentLiabilities
-        self.fields['CurrentLiabilities'] = self.GetFactValue("us-gaap:LiabilitiesCurrent", "Instant")
-        if self.fields['CurrentLiabilities']== None:
-            self.fields['CurrentLiabilities'] = 0
-                
+
         #Noncurrent Liabilities
-        self.fields['NoncurrentLiabilities'] = self.GetFactValue("us-gaap:LiabilitiesNoncurrent", "Instant")
         if self.fields['NoncurrentLiabilities']== None:
             if self.fields['Liabilities'] and self.fields['CurrentLiabilities']:
                 self.fields['NoncurrentLiabilities'] = self.fields['Liabilities'] - self.fields['CurrentLiabilities']
             else:
                 self.fields['NoncurrentLiabilities'] = 0
-                
-        #CommitmentsAndContingencies
-        self.fields['CommitmentsAndContingencies'] = self.GetFactValue("us-gaap:CommitmentsAndContingencies", "Instant")
-        if self.fields['CommitmentsAndContingencies']== None:
-            self.fields['CommitmentsAndContingencies'] = 0
-                
-        #TemporaryEquity
-        self.fields['TemporaryEquity'] = self.GetFactValue("us-gaap:TemporaryEquityRedemptionValue", "Instant")
-        if self.fields['TemporaryEquity'] == None:
-            self.fields['TemporaryEquity'] = self.GetFactValue("us-gaap:RedeemablePreferredStockCarryingAmount", "Instant")
-            if self.fields['TemporaryEquity'] == None:
-                self.fields['TemporaryEquity'] = self.GetFactValue("us-gaap:TemporaryEquityCarryingAmount", "Instant")
-                if self.fields['TemporaryEquity'] == None:
-                    self.fields['TemporaryEquity'] = self.GetFactValue("us-gaap:TemporaryEquityValueExcludingAdditionalPaidInCapital", "Instant")
-                    if self.fields['TemporaryEquity'] == None:
-                        self.fields['TemporaryEquity'] = self.GetFactValue("us-gaap:TemporaryEquityCarryingAmountAttributableToParent", "Instant")
-                        if self.fields['TemporaryEquity'] == None:
-                            self.fields['TemporaryEquity'] = self.GetFactValue("us-gaap:RedeemableNoncontrollingInterestEquityFairValue", "Instant")
-                            if self.fields['TemporaryEquity'] == None:
-                                self.fields['TemporaryEquity'] = 0
-                    
-        #RedeemableNoncontrollingInterest (added to temporary equity)
-        RedeemableNoncontrollingInterest = None
-        
-        RedeemableNoncontrollingInterest = self.GetFactValue("us-gaap:RedeemableNoncontrollingInterestEquityCarryingAmount", "Instant")
-        if RedeemableNoncontrollingInterest == None:
-            RedeemableNoncontrollingInterest = self.GetFactValue("us-gaap:RedeemableNoncontrollingInterestEquityCommonCarryingAmount", "Instant")
-            if RedeemableNoncontrollingInterest == None:
-                RedeemableNoncontrollingInterest = 0
+
 
         #This adds redeemable noncontrolling interest and temporary equity which are rare, but can be reported seperately
         if self.fields['TemporaryEquity']:
             self.fields['TemporaryEquity'] = float(self.fields['TemporaryEquity']) + float(RedeemableNoncontrollingInterest)
 
 
-        #Equity
-        self.fields['Equity'] = self.GetFactValue("us-gaap:StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest", "Instant")
-        if self.fields['Equity'] == None:
-            self.fields['Equity'] = self.GetFactValue("us-gaap:StockholdersEquity", "Instant")
-            if self.fields['Equity'] == None:
-                self.fields['Equity'] = self.GetFactValue("us-gaap:PartnersCapitalIncludingPortionAttributableToNoncontrollingInterest", "Instant")
-                if self.fields['Equity'] == None:
-                    self.fields['Equity'] = self.GetFactValue("us-gaap:PartnersCapital", "Instant")
-                    if self.fields['Equity'] == None:
-                        self.fields['Equity'] = self.GetFactValue("us-gaap:CommonStockholdersEquity", "Instant")
-                        if self.fields['Equity'] == None:
-                            self.fields['Equity'] = self.GetFactValue("us-gaap:MemberEquity", "Instant")
-                            if self.fields['Equity'] == None:
-                                self.fields['Equity'] = self.GetFactValue("us-gaap:AssetsNet", "Instant")
-                                if self.fields['Equity'] == None:
-                                    self.fields['Equity'] = 0
-        
-
-        #EquityAttributableToNoncontrollingInterest
-        self.fields['EquityAttributableToNoncontrollingInterest'] = self.GetFactValue("us-gaap:MinorityInterest", "Instant")
-        if self.fields['EquityAttributableToNoncontrollingInterest'] == None:
-            self.fields['EquityAttributableToNoncontrollingInterest'] = self.GetFactValue("us-gaap:PartnersCapitalAttributableToNoncontrollingInterest", "Instant")
-            if self.fields['EquityAttributableToNoncontrollingInterest'] == None:
-                self.fields['EquityAttributableToNoncontrollingInterest'] = 0
-        
-        #EquityAttributableToParent
-        self.fields['EquityAttributableToParent'] = self.GetFactValue("us-gaap:StockholdersEquity", "Instant")
-        if self.fields['EquityAttributableToParent'] == None:
-            self.fields['EquityAttributableToParent'] = self.GetFactValue("us-gaap:LiabilitiesAndPartnersCapital", "Instant")
-            if self.fields['EquityAttributableToParent'] == None:
-                self.fields['EquityAttributableToParent'] = 0
-
-
-
-
         #BS Adjustments
         #if total assets is missing, try using current assets
         if self.fields['Assets'] == 0 and self.fields['Assets'] == self.fields['LiabilitiesAndEquity'] and self.fields['CurrentAssets'] == self.fields['LiabilitiesAndEquity']:
@@ -539,210 +744,6 @@ class XBRL:
 
         #Income statement
 
-        #Revenues
-        self.fields['Revenues'] = self.GetFactValue("us-gaap:Revenues", "Duration")
-        if self.fields['Revenues'] == None:
-            self.fields['Revenues'] = self.GetFactValue("us-gaap:SalesRevenueNet", "Duration")
-            if self.fields['Revenues'] == None:
-                self.fields['Revenues'] = self.GetFactValue("us-gaap:SalesRevenueServicesNet", "Duration")
-                if self.fields['Revenues'] == None:
-                    self.fields['Revenues'] = self.GetFactValue("us-gaap:RevenuesNetOfInterestExpense", "Duration")
-                    if self.fields['Revenues'] == None:
-                        self.fields['Revenues'] = self.GetFactValue("us-gaap:RegulatedAndUnregulatedOperatingRevenue", "Duration")
-                        if self.fields['Revenues'] == None:
-                            self.fields['Revenues'] = self.GetFactValue("us-gaap:HealthCareOrganizationRevenue", "Duration")
-                            if self.fields['Revenues'] == None:
-                                self.fields['Revenues'] = self.GetFactValue("us-gaap:InterestAndDividendIncomeOperating", "Duration")
-                                if self.fields['Revenues'] == None:
-                                    self.fields['Revenues'] = self.GetFactValue("us-gaap:RealEstateRevenueNet", "Duration")
-                                    if self.fields['Revenues'] == None:
-                                        self.fields['Revenues'] = self.GetFactValue("us-gaap:RevenueMineralSales", "Duration")
-                                        if self.fields['Revenues'] == None:
-                                            self.fields['Revenues'] = self.GetFactValue("us-gaap:OilAndGasRevenue", "Duration")
-                                            if self.fields['Revenues'] == None:
-                                                self.fields['Revenues'] = self.GetFactValue("us-gaap:FinancialServicesRevenue", "Duration")
-                                                if self.fields['Revenues'] == None:
-                                                    self.fields['Revenues'] = self.GetFactValue("us-gaap:RegulatedAndUnregulatedOperatingRevenue", "Duration")                                                
-                                                    if self.fields['Revenues'] == None:
-                                                        self.fields['Revenues'] = 0
-
-
-        #CostOfRevenue
-        self.fields['CostOfRevenue'] = self.GetFactValue("us-gaap:CostOfRevenue", "Duration")
-        if self.fields['CostOfRevenue'] == None:
-            self.fields['CostOfRevenue'] = self.GetFactValue("us-gaap:CostOfServices", "Duration")
-            if self.fields['CostOfRevenue'] == None:
-                self.fields['CostOfRevenue'] = self.GetFactValue("us-gaap:CostOfGoodsSold", "Duration")
-                if self.fields['CostOfRevenue'] == None:
-                    self.fields['CostOfRevenue'] = self.GetFactValue("us-gaap:CostOfGoodsAndServicesSold", "Duration")
-                    if self.fields['CostOfRevenue'] == None:
-                        self.fields['CostOfRevenue'] = 0
-        
-        #GrossProfit
-        self.fields['GrossProfit'] = self.GetFactValue("us-gaap:GrossProfit", "Duration")
-        if self.fields['GrossProfit'] == None:
-            self.fields['GrossProfit'] = self.GetFactValue("us-gaap:GrossProfit", "Duration")
-            if self.fields['GrossProfit'] == None:
-                self.fields['GrossProfit'] = 0
-        
-        #OperatingExpenses
-        self.fields['OperatingExpenses'] = self.GetFactValue("us-gaap:OperatingExpenses", "Duration")
-        if self.fields['OperatingExpenses'] == None:
-            self.fields['OperatingExpenses'] = self.GetFactValue("us-gaap:OperatingCostsAndExpenses", "Duration")  #This concept seems incorrect.
-            if self.fields['OperatingExpenses'] == None:
-                self.fields['OperatingExpenses'] = 0
-
-        #CostsAndExpenses
-        self.fields['CostsAndExpenses'] = self.GetFactValue("us-gaap:CostsAndExpenses", "Duration")
-        if self.fields['CostsAndExpenses'] == None:
-            self.fields['CostsAndExpenses'] = self.GetFactValue("us-gaap:CostsAndExpenses", "Duration")
-            if self.fields['CostsAndExpenses'] == None:
-                self.fields['CostsAndExpenses'] = 0
-        
-        #OtherOperatingIncome
-        self.fields['OtherOperatingIncome'] = self.GetFactValue("us-gaap:OtherOperatingIncome", "Duration")
-        if self.fields['OtherOperatingIncome'] == None:
-            self.fields['OtherOperatingIncome'] = self.GetFactValue("us-gaap:OtherOperatingIncome", "Duration")
-            if self.fields['OtherOperatingIncome'] == None:
-                self.fields['OtherOperatingIncome'] = 0
-        
-        #OperatingIncomeLoss
-        self.fields['OperatingIncomeLoss'] = self.GetFactValue("us-gaap:OperatingIncomeLoss", "Duration")
-        if self.fields['OperatingIncomeLoss'] == None:
-            self.fields['OperatingIncomeLoss'] = self.GetFactValue("us-gaap:OperatingIncomeLoss", "Duration")
-            if self.fields['OperatingIncomeLoss'] == None:
-                self.fields['OperatingIncomeLoss'] = 0
-        
-        #NonoperatingIncomeLoss
-        self.fields['NonoperatingIncomeLoss'] = self.GetFactValue("us-gaap:NonoperatingIncomeExpense", "Duration")
-        if self.fields['NonoperatingIncomeLoss'] == None:
-            self.fields['NonoperatingIncomeLoss'] = self.GetFactValue("us-gaap:NonoperatingIncomeExpense", "Duration")
-            if self.fields['NonoperatingIncomeLoss'] == None:
-                self.fields['NonoperatingIncomeLoss'] = 0
-
-        #InterestAndDebtExpense
-        self.fields['InterestAndDebtExpense'] = self.GetFactValue("us-gaap:InterestAndDebtExpense", "Duration")
-        if self.fields['InterestAndDebtExpense'] == None:
-            self.fields['InterestAndDebtExpense'] = self.GetFactValue("us-gaap:InterestAndDebtExpense", "Duration")
-            if self.fields['InterestAndDebtExpense'] == None:
-                self.fields['InterestAndDebtExpense'] = 0
-
-        #IncomeBeforeEquityMethodInvestments
-        self.fields['IncomeBeforeEquityMethodInvestments'] = self.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments", "Duration")
-        if self.fields['IncomeBeforeEquityMethodInvestments'] == None:
-            self.fields['IncomeBeforeEquityMethodInvestments'] = self.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments", "Duration")
-            if self.fields['IncomeBeforeEquityMethodInvestments'] == None:
-                self.fields['IncomeBeforeEquityMethodInvestments'] = 0
-        
-        #IncomeFromEquityMethodInvestments
-        self.fields['IncomeFromEquityMethodInvestments'] = self.GetFactValue("us-gaap:IncomeLossFromEquityMethodInvestments", "Duration")
-        if self.fields['IncomeFromEquityMethodInvestments'] == None:
-            self.fields['IncomeFromEquityMethodInvestments'] = self.GetFactValue("us-gaap:IncomeLossFromEquityMethodInvestments", "Duration")
-            if self.fields['IncomeFromEquityMethodInvestments'] == None:
-                self.fields['IncomeFromEquityMethodInvestments'] = 0
-        
-        #IncomeFromContinuingOperationsBeforeTax
-        self.fields['IncomeFromContinuingOperationsBeforeTax'] = self.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments", "Duration")
-        if self.fields['IncomeFromContinuingOperationsBeforeTax'] == None:
-            self.fields['IncomeFromContinuingOperationsBeforeTax'] = self.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest", "Duration")
-            if self.fields['IncomeFromContinuingOperationsBeforeTax'] == None:
-                self.fields['IncomeFromContinuingOperationsBeforeTax'] = 0
-        
-        #IncomeTaxExpenseBenefit
-        self.fields['IncomeTaxExpenseBenefit'] = self.GetFactValue("us-gaap:IncomeTaxExpenseBenefit", "Duration")
-        if self.fields['IncomeTaxExpenseBenefit'] == None:
-            self.fields['IncomeTaxExpenseBenefit'] = self.GetFactValue("us-gaap:IncomeTaxExpenseBenefitContinuingOperations", "Duration")
-            if self.fields['IncomeTaxExpenseBenefit'] == None:
-                self.fields['IncomeTaxExpenseBenefit'] = 0
-        
-        #IncomeFromContinuingOperationsAfterTax
-        self.fields['IncomeFromContinuingOperationsAfterTax'] = self.GetFactValue("us-gaap:IncomeLossBeforeExtraordinaryItemsAndCumulativeEffectOfChangeInAccountingPrinciple", "Duration")
-        if self.fields['IncomeFromContinuingOperationsAfterTax'] == None:
-            self.fields['IncomeFromContinuingOperationsAfterTax'] = self.GetFactValue("us-gaap:IncomeLossBeforeExtraordinaryItemsAndCumulativeEffectOfChangeInAccountingPrinciple", "Duration")
-            if self.fields['IncomeFromContinuingOperationsAfterTax'] == None:
-                self.fields['IncomeFromContinuingOperationsAfterTax'] = 0
-
-        #IncomeFromDiscontinuedOperations
-        self.fields['IncomeFromDiscontinuedOperations'] = self.GetFactValue("us-gaap:IncomeLossFromDiscontinuedOperationsNetOfTax", "Duration")
-        if self.fields['IncomeFromDiscontinuedOperations']== None:
-            self.fields['IncomeFromDiscontinuedOperations'] = self.GetFactValue("us-gaap:DiscontinuedOperationGainLossOnDisposalOfDiscontinuedOperationNetOfTax", "Duration")
-            if self.fields['IncomeFromDiscontinuedOperations']== None:
-                self.fields['IncomeFromDiscontinuedOperations'] = self.GetFactValue("us-gaap:IncomeLossFromDiscontinuedOperationsNetOfTaxAttributableToReportingEntity", "Duration")
-                if self.fields['IncomeFromDiscontinuedOperations']== None:
-                    self.fields['IncomeFromDiscontinuedOperations'] = 0
-
-        #ExtraordaryItemsGainLoss
-        self.fields['ExtraordaryItemsGainLoss'] = self.GetFactValue("us-gaap:ExtraordinaryItemNetOfTax", "Duration")
-        if self.fields['ExtraordaryItemsGainLoss']== None:
-            self.fields['ExtraordaryItemsGainLoss'] = self.GetFactValue("us-gaap:ExtraordinaryItemNetOfTax", "Duration")
-            if self.fields['ExtraordaryItemsGainLoss']== None:
-                self.fields['ExtraordaryItemsGainLoss'] = 0
-
-        #NetIncomeLoss
-        self.fields['NetIncomeLoss'] = self.GetFactValue("us-gaap:ProfitLoss", "Duration")
-        if self.fields['NetIncomeLoss']== None:
-            self.fields['NetIncomeLoss'] = self.GetFactValue("us-gaap:NetIncomeLoss", "Duration")
-            if self.fields['NetIncomeLoss']== None:
-                self.fields['NetIncomeLoss'] = self.GetFactValue("us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic", "Duration")
-                if self.fields['NetIncomeLoss']== None:
-                    self.fields['NetIncomeLoss'] = self.GetFactValue("us-gaap:IncomeLossFromContinuingOperations", "Duration")
-                    if self.fields['NetIncomeLoss']== None:
-                        self.fields['NetIncomeLoss'] = self.GetFactValue("us-gaap:IncomeLossAttributableToParent", "Duration")
-                        if self.fields['NetIncomeLoss']== None:
-                            self.fields['NetIncomeLoss'] = self.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsIncludingPortionAttributableToNoncontrollingInterest", "Duration")
-                            if self.fields['NetIncomeLoss']== None:
-                                self.fields['NetIncomeLoss'] = 0
-
-        #NetIncomeAvailableToCommonStockholdersBasic
-        self.fields['NetIncomeAvailableToCommonStockholdersBasic'] = self.GetFactValue("us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic", "Duration")
-        if self.fields['NetIncomeAvailableToCommonStockholdersBasic']== None:
-            self.fields['NetIncomeAvailableToCommonStockholdersBasic'] = 0
-                
-        #PreferredStockDividendsAndOtherAdjustments
-        self.fields['PreferredStockDividendsAndOtherAdjustments'] = self.GetFactValue("us-gaap:PreferredStockDividendsAndOtherAdjustments", "Duration")
-        if self.fields['PreferredStockDividendsAndOtherAdjustments']== None:
-            self.fields['PreferredStockDividendsAndOtherAdjustments'] = 0
-                
-        #NetIncomeAttributableToNoncontrollingInterest
-        self.fields['NetIncomeAttributableToNoncontrollingInterest'] = self.GetFactValue("us-gaap:NetIncomeLossAttributableToNoncontrollingInterest", "Duration")
-        if self.fields['NetIncomeAttributableToNoncontrollingInterest']== None:
-            self.fields['NetIncomeAttributableToNoncontrollingInterest'] = 0
-                
-        #NetIncomeAttributableToParent
-        self.fields['NetIncomeAttributableToParent'] = self.GetFactValue("us-gaap:NetIncomeLoss", "Duration")
-        if self.fields['NetIncomeAttributableToParent']== None:
-            self.fields['NetIncomeAttributableToParent'] = 0
-
-        #OtherComprehensiveIncome
-        self.fields['OtherComprehensiveIncome'] = self.GetFactValue("us-gaap:OtherComprehensiveIncomeLossNetOfTax", "Duration")
-        if self.fields['OtherComprehensiveIncome']== None:
-            self.fields['OtherComprehensiveIncome'] = self.GetFactValue("us-gaap:OtherComprehensiveIncomeLossNetOfTax", "Duration")
-            if self.fields['OtherComprehensiveIncome']== None:
-                self.fields['OtherComprehensiveIncome'] = 0
-
-        #ComprehensiveIncome
-        self.fields['ComprehensiveIncome'] = self.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTaxIncludingPortionAttributableToNoncontrollingInterest", "Duration")
-        if self.fields['ComprehensiveIncome']== None:
-            self.fields['ComprehensiveIncome'] = self.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTax", "Duration")
-            if self.fields['ComprehensiveIncome']== None:
-                self.fields['ComprehensiveIncome'] = 0
-
-        #ComprehensiveIncomeAttributableToParent
-        self.fields['ComprehensiveIncomeAttributableToParent'] = self.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTax", "Duration")
-        if self.fields['ComprehensiveIncomeAttributableToParent']== None:
-            self.fields['ComprehensiveIncomeAttributableToParent'] = self.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTax", "Duration")
-            if self.fields['ComprehensiveIncomeAttributableToParent']== None:
-                self.fields['ComprehensiveIncomeAttributableToParent'] = 0
-        
-        #ComprehensiveIncomeAttributableToNoncontrollingInterest
-        self.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest'] = self.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTaxAttributableToNoncontrollingInterest", "Duration")
-        if self.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest']==None:
-            self.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest'] = self.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTaxAttributableToNoncontrollingInterest", "Duration")
-            if self.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest']==None:
-                self.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest'] = 0
-
-
-
         #########'Adjustments to income statement information
         #Impute: NonoperatingIncomeLossPlusInterestAndDebtExpense
         self.fields['NonoperatingIncomeLossPlusInterestAndDebtExpense'] = self.fields['NonoperatingIncomeLoss'] + self.fields['InterestAndDebtExpense']
@@ -900,74 +901,6 @@ class XBRL:
 
         ###Cash flow statement
 
-        #NetCashFlow
-        self.fields['NetCashFlow'] = self.GetFactValue("us-gaap:CashAndCashEquivalentsPeriodIncreaseDecrease", "Duration")
-        if self.fields['NetCashFlow']== None:
-            self.fields['NetCashFlow'] = self.GetFactValue("us-gaap:CashPeriodIncreaseDecrease", "Duration")
-            if self.fields['NetCashFlow']== None:
-                self.fields['NetCashFlow'] = self.GetFactValue("us-gaap:NetCashProvidedByUsedInContinuingOperations", "Duration")
-                if self.fields['NetCashFlow']== None:
-                    self.fields['NetCashFlow'] = 0
-                
-        #NetCashFlowsOperating
-        self.fields['NetCashFlowsOperating'] = self.GetFactValue("us-gaap:NetCashProvidedByUsedInOperatingActivities", "Duration")
-        if self.fields['NetCashFlowsOperating']== None:
-            self.fields['NetCashFlowsOperating'] = 0
-                
-        #NetCashFlowsInvesting
-        self.fields['NetCashFlowsInvesting'] = self.GetFactValue("us-gaap:NetCashProvidedByUsedInInvestingActivities", "Duration")
-        if self.fields['NetCashFlowsInvesting']== None:
-            self.fields['NetCashFlowsInvesting'] = 0
-                
-        #NetCashFlowsFinancing
-        self.fields['NetCashFlowsFinancing'] = self.GetFactValue("us-gaap:NetCashProvidedByUsedInFinancingActivities", "Duration")
-        if self.fields['NetCashFlowsFinancing']== None:
-            self.fields['NetCashFlowsFinancing'] = 0
-                
-        #NetCashFlowsOperatingContinuing
-        self.fields['NetCashFlowsOperatingContinuing'] = self.GetFactValue("us-gaap:NetCashProvidedByUsedInOperatingActivitiesContinuingOperations", "Duration")
-        if self.fields['NetCashFlowsOperatingContinuing']== None:
-            self.fields['NetCashFlowsOperatingContinuing'] = 0
-                
-        #NetCashFlowsInvestingContinuing
-        self.fields['NetCashFlowsInvestingContinuing'] = self.GetFactValue("us-gaap:NetCashProvidedByUsedInInvestingActivitiesContinuingOperations", "Duration")
-        if self.fields['NetCashFlowsInvestingContinuing']== None:
-            self.fields['NetCashFlowsInvestingContinuing'] = 0
-                
-        #NetCashFlowsFinancingContinuing
-        self.fields['NetCashFlowsFinancingContinuing'] = self.GetFactValue("us-gaap:NetCashProvidedByUsedInFinancingActivitiesContinuingOperations", "Duration")
-        if self.fields['NetCashFlowsFinancingContinuing']== None:
-            self.fields['NetCashFlowsFinancingContinuing'] = 0
-                
-        #NetCashFlowsOperatingDiscontinued
-        self.fields['NetCashFlowsOperatingDiscontinued'] = self.GetFactValue("us-gaap:CashProvidedByUsedInOperatingActivitiesDiscontinuedOperations", "Duration")
-        if self.fields['NetCashFlowsOperatingDiscontinued']==None:
-            self.fields['NetCashFlowsOperatingDiscontinued'] = 0
-                
-        #NetCashFlowsInvestingDiscontinued
-        self.fields['NetCashFlowsInvestingDiscontinued'] = self.GetFactValue("us-gaap:CashProvidedByUsedInInvestingActivitiesDiscontinuedOperations", "Duration")
-        if self.fields['NetCashFlowsInvestingDiscontinued']== None:
-            self.fields['NetCashFlowsInvestingDiscontinued'] = 0
-                
-        #NetCashFlowsFinancingDiscontinued
-        self.fields['NetCashFlowsFinancingDiscontinued'] = self.GetFactValue("us-gaap:CashProvidedByUsedInFinancingActivitiesDiscontinuedOperations", "Duration")
-        if self.fields['NetCashFlowsFinancingDiscontinued']== None:
-            self.fields['NetCashFlowsFinancingDiscontinued'] = 0
-                
-        #NetCashFlowsDiscontinued
-        self.fields['NetCashFlowsDiscontinued'] = self.GetFactValue("us-gaap:NetCashProvidedByUsedInDiscontinuedOperations", "Duration")
-        if self.fields['NetCashFlowsDiscontinued']== None:
-            self.fields['NetCashFlowsDiscontinued'] = 0
-                
-        #ExchangeGainsLosses
-        self.fields['ExchangeGainsLosses'] = self.GetFactValue("us-gaap:EffectOfExchangeRateOnCashAndCashEquivalents", "Duration")
-        if self.fields['ExchangeGainsLosses']== None:
-            self.fields['ExchangeGainsLosses'] = self.GetFactValue("us-gaap:EffectOfExchangeRateOnCashAndCashEquivalentsContinuingOperations", "Duration")
-            if self.fields['ExchangeGainsLosses']== None:
-                self.fields['ExchangeGainsLosses'] = self.GetFactValue("us-gaap:CashProvidedByUsedInFinancingActivitiesDiscontinuedOperations", "Duration")
-                if self.fields['ExchangeGainsLosses']== None:
-                    self.fields['ExchangeGainsLosses'] = 0
-
         ####Adjustments
         #Impute: total net cash flows discontinued if not reported
         if self.fields['NetCashFlowsDiscontinued']==0:
@@ -0,0 +1,341 @@
+'''
+Priority lists of US-GAAP concepts for each fundamental field.
+
+Each entry maps a field in XBRL.fields to the period type of the context it
+is read from, the concepts to try in order and the value to use when none of
+them are reported.
+'''
+
+FUNDAMENTAL_CONCEPTS = {
+    # Balance sheet
+    'Assets': {
+        'periodType': 'Instant',
+        'concepts': ['us-gaap:Assets'],
+        'default': 0
+    },
+    'CurrentAssets': {
+        'periodType': 'Instant',
+        'concepts': ['us-gaap:AssetsCurrent'],
+        'default': 0
+    },
+    # None so it can be imputed from Assets and CurrentAssets
+    'NoncurrentAssets': {
+        'periodType': 'Instant',
+        'concepts': ['us-gaap:AssetsNoncurrent'],
+        'default': None
+    },
+    'LiabilitiesAndEquity': {
+        'periodType': 'Instant',
+        'concepts': [
+            'us-gaap:LiabilitiesAndStockholdersEquity',
+            'us-gaap:LiabilitiesAndPartnersCapital'
+        ],
+        'default': 0
+    },
+    'Liabilities': {
+        'periodType': 'Instant',
+        'concepts': ['us-gaap:Liabilities'],
+        'default': 0
+    },
+    'CurrentLiabilities': {
+        'periodType': 'Instant',
+        'concepts': ['us-gaap:LiabilitiesCurrent'],
+        'default': 0
+    },
+    # None so it can be imputed from Liabilities and CurrentLiabilities
+    'NoncurrentLiabilities': {
+        'periodType': 'Instant',
+        'concepts': ['us-gaap:LiabilitiesNoncurrent'],
+        'default': None
+    },
+    'CommitmentsAndContingencies': {
+        'periodType': 'Instant',
+        'concepts': ['us-gaap:CommitmentsAndContingencies'],
+        'default': 0
+    },
+    'TemporaryEquity': {
+        'periodType': 'Instant',
+        'concepts': [
+            'us-gaap:TemporaryEquityRedemptionValue',
+            'us-gaap:RedeemablePreferredStockCarryingAmount',
+            'us-gaap:TemporaryEquityCarryingAmount',
+            'us-gaap:TemporaryEquityValueExcludingAdditionalPaidInCapital',
+            'us-gaap:TemporaryEquityCarryingAmountAttributableToParent',
+            'us-gaap:RedeemableNoncontrollingInterestEquityFairValue'
+        ],
+        'default': 0
+    },
+    # Not a field on its own, added to TemporaryEquity
+    'RedeemableNoncontrollingInterest': {
+        'periodType': 'Instant',
+        'concepts': [
+            'us-gaap:RedeemableNoncontrollingInterestEquityCarryingAmount',
+            'us-gaap:RedeemableNoncontrollingInterestEquityCommonCarryingAmount'
+        ],
+        'default': 0
+    },
+    'Equity': {
+        'periodType': 'Instant',
+        'concepts': [
+            'us-gaap:StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest',
+            'us-gaap:StockholdersEquity',
+            'us-gaap:PartnersCapitalIncludingPortionAttributableToNoncontrollingInterest',
+            'us-gaap:PartnersCapital',
+            'us-gaap:CommonStockholdersEquity',
+            'us-gaap:MemberEquity',
+            'us-gaap:AssetsNet'
+        ],
+        'default': 0
+    },
+    'EquityAttributableToNoncontrollingInterest': {
+        'periodType': 'Instant',
+        'concepts': [
+            'us-gaap:MinorityInterest',
+            'us-gaap:PartnersCapitalAttributableToNoncontrollingInterest'
+        ],
+        'default': 0
+    },
+    'EquityAttributableToParent': {
+        'periodType': 'Instant',
+        'concepts': [
+            'us-gaap:StockholdersEquity',
+            'us-gaap:LiabilitiesAndPartnersCapital'
+        ],
+        'default': 0
+    },
+    # Income statement
+    'Revenues': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:Revenues',
+            'us-gaap:SalesRevenueNet',
+            'us-gaap:SalesRevenueServicesNet',
+            'us-gaap:RevenuesNetOfInterestExpense',
+            'us-gaap:RegulatedAndUnregulatedOperatingRevenue',
+            'us-gaap:HealthCareOrganizationRevenue',
+            'us-gaap:InterestAndDividendIncomeOperating',
+            'us-gaap:RealEstateRevenueNet',
+            'us-gaap:RevenueMineralSales',
+            'us-gaap:OilAndGasRevenue',
+            'us-gaap:FinancialServicesRevenue'
+        ],
+        'default': 0
+    },
+    'CostOfRevenue': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:CostOfRevenue',
+            'us-gaap:CostOfServices',
+            'us-gaap:CostOfGoodsSold',
+            'us-gaap:CostOfGoodsAndServicesSold'
+        ],
+        'default': 0
+    },
+    'GrossProfit': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:GrossProfit'],
+        'default': 0
+    },
+    'OperatingExpenses': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:OperatingExpenses',
+            'us-gaap:OperatingCostsAndExpenses'
+        ],
+        'default': 0
+    },
+    'CostsAndExpenses': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:CostsAndExpenses'],
+        'default': 0
+    },
+    'OtherOperatingIncome': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:OtherOperatingIncome'],
+        'default': 0
+    },
+    'OperatingIncomeLoss': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:OperatingIncomeLoss'],
+        'default': 0
+    },
+    'NonoperatingIncomeLoss': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NonoperatingIncomeExpense'],
+        'default': 0
+    },
+    'InterestAndDebtExpense': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:InterestAndDebtExpense'],
+        'default': 0
+    },
+    'IncomeBeforeEquityMethodInvestments': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments'],
+        'default': 0
+    },
+    'IncomeFromEquityMethodInvestments': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:IncomeLossFromEquityMethodInvestments'],
+        'default': 0
+    },
+    'IncomeFromContinuingOperationsBeforeTax': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments',
+            'us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest'
+        ],
+        'default': 0
+    },
+    'IncomeTaxExpenseBenefit': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:IncomeTaxExpenseBenefit',
+            'us-gaap:IncomeTaxExpenseBenefitContinuingOperations'
+        ],
+        'default': 0
+    },
+    'IncomeFromContinuingOperationsAfterTax': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:IncomeLossBeforeExtraordinaryItemsAndCumulativeEffectOfChangeInAccountingPrinciple'],
+        'default': 0
+    },
+    'IncomeFromDiscontinuedOperations': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:IncomeLossFromDiscontinuedOperationsNetOfTax',
+            'us-gaap:DiscontinuedOperationGainLossOnDisposalOfDiscontinuedOperationNetOfTax',
+            'us-gaap:IncomeLossFromDiscontinuedOperationsNetOfTaxAttributableToReportingEntity'
+        ],
+        'default': 0
+    },
+    'ExtraordaryItemsGainLoss': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:ExtraordinaryItemNetOfTax'],
+        'default': 0
+    },
+    'NetIncomeLoss': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:ProfitLoss',
+            'us-gaap:NetIncomeLoss',
+            'us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic',
+            'us-gaap:IncomeLossFromContinuingOperations',
+            'us-gaap:IncomeLossAttributableToParent',
+            'us-gaap:IncomeLossFromContinuingOperationsIncludingPortionAttributableToNoncontrollingInterest'
+        ],
+        'default': 0
+    },
+    'NetIncomeAvailableToCommonStockholdersBasic': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic'],
+        'default': 0
+    },
+    'PreferredStockDividendsAndOtherAdjustments': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:PreferredStockDividendsAndOtherAdjustments'],
+        'default': 0
+    },
+    'NetIncomeAttributableToNoncontrollingInterest': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetIncomeLossAttributableToNoncontrollingInterest'],
+        'default': 0
+    },
+    'NetIncomeAttributableToParent': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetIncomeLoss'],
+        'default': 0
+    },
+    'OtherComprehensiveIncome': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:OtherComprehensiveIncomeLossNetOfTax'],
+        'default': 0
+    },
+    'ComprehensiveIncome': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:ComprehensiveIncomeNetOfTaxIncludingPortionAttributableToNoncontrollingInterest',
+            'us-gaap:ComprehensiveIncomeNetOfTax'
+        ],
+        'default': 0
+    },
+    'ComprehensiveIncomeAttributableToParent': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:ComprehensiveIncomeNetOfTax'],
+        'default': 0
+    },
+    'ComprehensiveIncomeAttributableToNoncontrollingInterest': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:ComprehensiveIncomeNetOfTaxAttributableToNoncontrollingInterest'],
+        'default': 0
+    },
+    # Cash flow statement
+    'NetCashFlow': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:CashAndCashEquivalentsPeriodIncreaseDecrease',
+            'us-gaap:CashPeriodIncreaseDecrease',
+            'us-gaap:NetCashProvidedByUsedInContinuingOperations'
+        ],
+        'default': 0
+    },
+    'NetCashFlowsOperating': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetCashProvidedByUsedInOperatingActivities'],
+        'default': 0
+    },
+    'NetCashFlowsInvesting': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetCashProvidedByUsedInInvestingActivities'],
+        'default': 0
+    },
+    'NetCashFlowsFinancing': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetCashProvidedByUsedInFinancingActivities'],
+        'default': 0
+    },
+    'NetCashFlowsOperatingContinuing': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetCashProvidedByUsedInOperatingActivitiesContinuingOperations'],
+        'default': 0
+    },
+    'NetCashFlowsInvestingContinuing': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetCashProvidedByUsedInInvestingActivitiesContinuingOperations'],
+        'default': 0
+    },
+    'NetCashFlowsFinancingContinuing': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetCashProvidedByUsedInFinancingActivitiesContinuingOperations'],
+        'default': 0
+    },
+    'NetCashFlowsOperatingDiscontinued': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:CashProvidedByUsedInOperatingActivitiesDiscontinuedOperations'],
+        'default': 0
+    },
+    'NetCashFlowsInvestingDiscontinued': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:CashProvidedByUsedInInvestingActivitiesDiscontinuedOperations'],
+        'default': 0
+    },
+    'NetCashFlowsFinancingDiscontinued': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:CashProvidedByUsedInFinancingActivitiesDiscontinuedOperations'],
+        'default': 0
+    },
+    'NetCashFlowsDiscontinued': {
+        'periodType': 'Duration',
+        'concepts': ['us-gaap:NetCashProvidedByUsedInDiscontinuedOperations'],
+        'default': 0
+    },
+    'ExchangeGainsLosses': {
+        'periodType': 'Duration',
+        'concepts': [
+            'us-gaap:EffectOfExchangeRateOnCashAndCashEquivalents',
+            'us-gaap:EffectOfExchangeRateOnCashAndCashEquivalentsContinuingOperations',
+            'us-gaap:CashProvidedByUsedInFinancingActivitiesDiscontinuedOperations'
+        ],
+        'default': 0
+    }
+}
@@ -1,3 +1,5 @@
+from .xbrl_concepts import FUNDAMENTAL_CONCEPTS
+
 class FundamentalAccountingConcepts:               
 
     def __init__(self,xbrl):
@@ -14,118 +16,30 @@ class FundamentalAccountingConcepts:
         xbrl.logger.debug(" ")
 
        
-        #Assets
-        self.xbrl.fields['Assets'] = self.xbrl.GetFactValue("us-gaap:Assets", "Instant")
-        if self.xbrl.fields['Assets']== None:
-            self.xbrl.fields['Assets'] = 0
+        #Every field's priority list of concepts, looked up in one pass over the fact index
+        self.xbrl.fields.update(self.xbrl.ResolveConcepts(FUNDAMENTAL_CONCEPTS))
+        RedeemableNoncontrollingInterest = self.xbrl.fields.pop('RedeemableNoncontrollingInterest')
 
-        #Current Assets
-        self.xbrl.fields['CurrentAssets'] = self.xbrl.GetFactValue("us-gaap:AssetsCurrent", "Instant")
-        if self.xbrl.fields['CurrentAssets']== None:
-            self.xbrl.fields['CurrentAssets'] = 0
-                
         #Noncurrent Assets
-        self.xbrl.fields['NoncurrentAssets'] = self.xbrl.GetFactValue("us-gaap:AssetsNoncurrent", "Instant")
         if self.xbrl.fields['NoncurrentAssets']==None:
             if self.xbrl.fields['Assets'] and self.xbrl.fields['CurrentAssets']:
                 self.xbrl.fields['NoncurrentAssets'] = self.xbrl.fields['Assets'] - self.xbrl.fields['CurrentAssets']
             else:
                 self.xbrl.fields['NoncurrentAssets'] = 0
-                
-        #LiabilitiesAndEquity
-        self.xbrl.fields['LiabilitiesAndEquity'] = self.xbrl.GetFactValue("us-gaap:LiabilitiesAndStockholdersEquity", "Instant")
-        if self.xbrl.fields['LiabilitiesAndEquity']== None:
-            self.xbrl.fields['LiabilitiesAndEquity'] = self.xbrl.GetFactValue("us-gaap:LiabilitiesAndPartnersCapital", "Instant")
-            if self.xbrl.fields['LiabilitiesAndEquity']== None:
-                self.xbrl.fields['LiabilitiesAndEquity'] = 0
-        
-        #Liabilities
-        self.xbrl.fields['Liabilities'] = self.xbrl.GetFactValue("us-gaap:Liabilities", "Instant")
-        if self.xbrl.fields['Liabilities']== None:
-            self.xbrl.fields['Liabilities'] = 0
-                
-        #CurrentLiabilities
-        self.xbrl.fields['CurrentLiabilities'] = self.xbrl.GetFactValue("us-gaap:LiabilitiesCurrent", "Instant")
-        if self.xbrl.fields['CurrentLiabilities']== None:
-            self.xbrl.fields['CurrentLiabilities'] = 0
-                
+
         #Noncurrent Liabilities
-        self.xbrl.fields['NoncurrentLiabilities'] = self.xbrl.GetFactValue("us-gaap:LiabilitiesNoncurrent", "Instant")
         if self.xbrl.fields['NoncurrentLiabilities']== None:
             if self.xbrl.fields['Liabilities'] and self.xbrl.fields['CurrentLiabilities']:
                 self.xbrl.fields['NoncurrentLiabilities'] = self.xbrl.fields['Liabilities'] - self.xbrl.fields['CurrentLiabilities']
             else:
                 self.xbrl.fields['NoncurrentLiabilities'] = 0
-                
-        #CommitmentsAndContingencies
-        self.xbrl.fields['CommitmentsAndContingencies'] = self.xbrl.GetFactValue("us-gaap:CommitmentsAndContingencies", "Instant")
-        if self.xbrl.fields['CommitmentsAndContingencies']== None:
-            self.xbrl.fields['CommitmentsAndContingencies'] = 0
-                
-        #TemporaryEquity
-        self.xbrl.fields['TemporaryEquity'] = self.xbrl.GetFactValue("us-gaap:TemporaryEquityRedemptionValue", "Instant")
-        if self.xbrl.fields['TemporaryEquity'] == None:
-            self.xbrl.fields['TemporaryEquity'] = self.xbrl.GetFactValue("us-gaap:RedeemablePreferredStockCarryingAmount", "Instant")
-            if self.xbrl.fields['TemporaryEquity'] == None:
-                self.xbrl.fields['TemporaryEquity'] = self.xbrl.GetFactValue("us-gaap:TemporaryEquityCarryingAmount", "Instant")
-                if self.xbrl.fields['TemporaryEquity'] == None:
-                    self.xbrl.fields['TemporaryEquity'] = self.xbrl.GetFactValue("us-gaap:TemporaryEquityValueExcludingAdditionalPaidInCapital", "Instant")
-                    if self.xbrl.fields['TemporaryEquity'] == None:
-                        self.xbrl.fields['TemporaryEquity'] = self.xbrl.GetFactValue("us-gaap:TemporaryEquityCarryingAmountAttributableToParent", "Instant")
-                        if self.xbrl.fields['TemporaryEquity'] == None:
-                            self.xbrl.fields['TemporaryEquity'] = self.xbrl.GetFactValue("us-gaap:RedeemableNoncontrollingInterestEquityFairValue", "Instant")
-                            if self.xbrl.fields['TemporaryEquity'] == None:
-                                self.xbrl.fields['TemporaryEquity'] = 0
-                 
-        #RedeemableNoncontrollingInterest (added to temporary equity)
-        RedeemableNoncontrollingInterest = None
-        
-        RedeemableNoncontrollingInterest = self.xbrl.GetFactValue("us-gaap:RedeemableNoncontrollingInterestEquityCarryingAmount", "Instant")
-        if RedeemableNoncontrollingInterest == None:
-            RedeemableNoncontrollingInterest = self.xbrl.GetFactValue("us-gaap:RedeemableNoncontrollingInterestEquityCommonCarryingAmount", "Instant")
-            if RedeemableNoncontrollingInterest == None:
-                RedeemableNoncontrollingInterest = 0
+
 
         #This adds redeemable noncontrolling interest and temporary equity which are rare, but can be reported seperately
         if self.xbrl.fields['TemporaryEquity']:
             self.xbrl.fields['TemporaryEquity'] = float(self.xbrl.fields['TemporaryEquity']) + float(RedeemableNoncontrollingInterest)
 
 
-        #Equity
-        self.xbrl.fields['Equity'] = self.xbrl.GetFactValue("us-gaap:StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest", "Instant")
-        if self.xbrl.fields['Equity'] == None:
-            self.xbrl.fields['Equity'] = self.xbrl.GetFactValue("us-gaap:StockholdersEquity", "Instant")
-            if self.xbrl.fields['Equity'] == None:
-                self.xbrl.fields['Equity'] = self.xbrl.GetFactValue("us-gaap:PartnersCapitalIncludingPortionAttributableToNoncontrollingInterest", "Instant")
-                if self.xbrl.fields['Equity'] == None:
-                    self.xbrl.fields['Equity'] = self.xbrl.GetFactValue("us-gaap:PartnersCapital", "Instant")
-                    if self.xbrl.fields['Equity'] == None:
-                        self.xbrl.fields['Equity'] = self.xbrl.GetFactValue("us-gaap:CommonStockholdersEquity", "Instant")
-                        if self.xbrl.fields['Equity'] == None:
-                            self.xbrl.fields['Equity'] = self.xbrl.GetFactValue("us-gaap:MemberEquity", "Instant")
-                            if self.xbrl.fields['Equity'] == None:
-                                self.xbrl.fields['Equity'] = self.xbrl.GetFactValue("us-gaap:AssetsNet", "Instant")
-                                if self.xbrl.fields['Equity'] == None:
-                                    self.xbrl.fields['Equity'] = 0
-        
-
-        #EquityAttributableToNoncontrollingInterest
-        self.xbrl.fields['EquityAttributableToNoncontrollingInterest'] = self.xbrl.GetFactValue("us-gaap:MinorityInterest", "Instant")
-        if self.xbrl.fields['EquityAttributableToNoncontrollingInterest'] == None:
-            self.xbrl.fields['EquityAttributableToNoncontrollingInterest'] = self.xbrl.GetFactValue("us-gaap:PartnersCapitalAttributableToNoncontrollingInterest", "Instant")
-            if self.xbrl.fields['EquityAttributableToNoncontrollingInterest'] == None:
-                self.xbrl.fields['EquityAttributableToNoncontrollingInterest'] = 0
-        
-        #EquityAttributableToParent
-        self.xbrl.fields['EquityAttributableToParent'] = self.xbrl.GetFactValue("us-gaap:StockholdersEquity", "Instant")
-        if self.xbrl.fields['EquityAttributableToParent'] == None:
-            self.xbrl.fields['EquityAttributableToParent'] = self.xbrl.GetFactValue("us-gaap:LiabilitiesAndPartnersCapital", "Instant")
-            if self.xbrl.fields['EquityAttributableToParent'] == None:
-                self.xbrl.fields['EquityAttributableToParent'] = 0
-
-
-
-
         #BS Adjustments
         #if total assets is missing, try using current assets
         if self.xbrl.fields['Assets'] == 0 and self.xbrl.fields['Assets'] == self.xbrl.fields['LiabilitiesAndEquity'] and self.xbrl.fields['CurrentAssets'] == self.xbrl.fields['LiabilitiesAndEquity']:
@@ -207,210 +121,6 @@ class FundamentalAccountingConcepts:
 
         #Income statement
 
-        #Revenues
-        self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:Revenues", "Duration")
-        if self.xbrl.fields['Revenues'] == None:
-            self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:SalesRevenueNet", "Duration")
-            if self.xbrl.fields['Revenues'] == None:
-                self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:SalesRevenueServicesNet", "Duration")
-                if self.xbrl.fields['Revenues'] == None:
-                    self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:RevenuesNetOfInterestExpense", "Duration")
-                    if self.xbrl.fields['Revenues'] == None:
-                        self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:RegulatedAndUnregulatedOperatingRevenue", "Duration")
-                        if self.xbrl.fields['Revenues'] == None:
-                            self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:HealthCareOrganizationRevenue", "Duration")
-                            if self.xbrl.fields['Revenues'] == None:
-                                self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:InterestAndDividendIncomeOperating", "Duration")
-                                if self.xbrl.fields['Revenues'] == None:
-                                    self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:RealEstateRevenueNet", "Duration")
-                                    if self.xbrl.fields['Revenues'] == None:
-                                        self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:RevenueMineralSales", "Duration")
-                                        if self.xbrl.fields['Revenues'] == None:
-                                            self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:OilAndGasRevenue", "Duration")
-                                            if self.xbrl.fields['Revenues'] == None:
-                                                self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:FinancialServicesRevenue", "Duration")
-                                                if self.xbrl.fields['Revenues'] == None:
-                                                    self.xbrl.fields['Revenues'] = self.xbrl.GetFactValue("us-gaap:RegulatedAndUnregulatedOperatingRevenue", "Duration")                                                
-                                                    if self.xbrl.fields['Revenues'] == None:
-                                                        self.xbrl.fields['Revenues'] = 0
-
-
-        #CostOfRevenue
-        self.xbrl.fields['CostOfRevenue'] = self.xbrl.GetFactValue("us-gaap:CostOfRevenue", "Duration")
-        if self.xbrl.fields['CostOfRevenue'] == None:
-            self.xbrl.fields['CostOfRevenue'] = self.xbrl.GetFactValue("us-gaap:CostOfServices", "Duration")
-            if self.xbrl.fields['CostOfRevenue'] == None:
-                self.xbrl.fields['CostOfRevenue'] = self.xbrl.GetFactValue("us-gaap:CostOfGoodsSold", "Duration")
-                if self.xbrl.fields['CostOfRevenue'] == None:
-                    self.xbrl.fields['CostOfRevenue'] = self.xbrl.GetFactValue("us-gaap:CostOfGoodsAndServicesSold", "Duration")
-                    if self.xbrl.fields['CostOfRevenue'] == None:
-                        self.xbrl.fields['CostOfRevenue'] = 0
-     
-        #GrossProfit
-        self.xbrl.fields['GrossProfit'] = self.xbrl.GetFactValue("us-gaap:GrossProfit", "Duration")
-        if self.xbrl.fields['GrossProfit'] == None:
-            self.xbrl.fields['GrossProfit'] = self.xbrl.GetFactValue("us-gaap:GrossProfit", "Duration")
-            if self.xbrl.fields['GrossProfit'] == None:
-                self.xbrl.fields['GrossProfit'] = 0
-     
-        #OperatingExpenses
-        self.xbrl.fields['OperatingExpenses'] = self.xbrl.GetFactValue("us-gaap:OperatingExpenses", "Duration")
-        if self.xbrl.fields['OperatingExpenses'] == None:
-            self.xbrl.fields['OperatingExpenses'] = self.xbrl.GetFactValue("us-gaap:OperatingCostsAndExpenses", "Duration")  #This concept seems incorrect.
-            if self.xbrl.fields['OperatingExpenses'] == None:
-                self.xbrl.fields['OperatingExpenses'] = 0
-
-        #CostsAndExpenses
-        self.xbrl.fields['CostsAndExpenses'] = self.xbrl.GetFactValue("us-gaap:CostsAndExpenses", "Duration")
-        if self.xbrl.fields['CostsAndExpenses'] == None:
-            self.xbrl.fields['CostsAndExpenses'] = self.xbrl.GetFactValue("us-gaap:CostsAndExpenses", "Duration")
-            if self.xbrl.fields['CostsAndExpenses'] == None:
-                self.xbrl.fields['CostsAndExpenses'] = 0
-     
-        #OtherOperatingIncome
-        self.xbrl.fields['OtherOperatingIncome'] = self.xbrl.GetFactValue("us-gaap:OtherOperatingIncome", "Duration")
-        if self.xbrl.fields['OtherOperatingIncome'] == None:
-            self.xbrl.fields['OtherOperatingIncome'] = self.xbrl.GetFactValue("us-gaap:OtherOperatingIncome", "Duration")
-            if self.xbrl.fields['OtherOperatingIncome'] == None:
-                self.xbrl.fields['OtherOperatingIncome'] = 0
-     
-        #OperatingIncomeLoss
-        self.xbrl.fields['OperatingIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:OperatingIncomeLoss", "Duration")
-        if self.xbrl.fields['OperatingIncomeLoss'] == None:
-            self.xbrl.fields['OperatingIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:OperatingIncomeLoss", "Duration")
-            if self.xbrl.fields['OperatingIncomeLoss'] == None:
-                self.xbrl.fields['OperatingIncomeLoss'] = 0
-     
-        #NonoperatingIncomeLoss
-        self.xbrl.fields['NonoperatingIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:NonoperatingIncomeExpense", "Duration")
-        if self.xbrl.fields['NonoperatingIncomeLoss'] == None:
-            self.xbrl.fields['NonoperatingIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:NonoperatingIncomeExpense", "Duration")
-            if self.xbrl.fields['NonoperatingIncomeLoss'] == None:
-                self.xbrl.fields['NonoperatingIncomeLoss'] = 0
-
-        #InterestAndDebtExpense
-        self.xbrl.fields['InterestAndDebtExpense'] = self.xbrl.GetFactValue("us-gaap:InterestAndDebtExpense", "Duration")
-        if self.xbrl.fields['InterestAndDebtExpense'] == None:
-            self.xbrl.fields['InterestAndDebtExpense'] = self.xbrl.GetFactValue("us-gaap:InterestAndDebtExpense", "Duration")
-            if self.xbrl.fields['InterestAndDebtExpense'] == None:
-                self.xbrl.fields['InterestAndDebtExpense'] = 0
-
-        #IncomeBeforeEquityMethodInvestments
-        self.xbrl.fields['IncomeBeforeEquityMethodInvestments'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments", "Duration")
-        if self.xbrl.fields['IncomeBeforeEquityMethodInvestments'] == None:
-            self.xbrl.fields['IncomeBeforeEquityMethodInvestments'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments", "Duration")
-            if self.xbrl.fields['IncomeBeforeEquityMethodInvestments'] == None:
-                self.xbrl.fields['IncomeBeforeEquityMethodInvestments'] = 0
-     
-        #IncomeFromEquityMethodInvestments
-        self.xbrl.fields['IncomeFromEquityMethodInvestments'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromEquityMethodInvestments", "Duration")
-        if self.xbrl.fields['IncomeFromEquityMethodInvestments'] == None:
-            self.xbrl.fields['IncomeFromEquityMethodInvestments'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromEquityMethodInvestments", "Duration")
-            if self.xbrl.fields['IncomeFromEquityMethodInvestments'] == None:
-                self.xbrl.fields['IncomeFromEquityMethodInvestments'] = 0
-     
-        #IncomeFromContinuingOperationsBeforeTax
-        self.xbrl.fields['IncomeFromContinuingOperationsBeforeTax'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments", "Duration")
-        if self.xbrl.fields['IncomeFromContinuingOperationsBeforeTax'] == None:
-            self.xbrl.fields['IncomeFromContinuingOperationsBeforeTax'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest", "Duration")
-            if self.xbrl.fields['IncomeFromContinuingOperationsBeforeTax'] == None:
-                self.xbrl.fields['IncomeFromContinuingOperationsBeforeTax'] = 0
-     
-        #IncomeTaxExpenseBenefit
-        self.xbrl.fields['IncomeTaxExpenseBenefit'] = self.xbrl.GetFactValue("us-gaap:IncomeTaxExpenseBenefit", "Duration")
-        if self.xbrl.fields['IncomeTaxExpenseBenefit'] == None:
-            self.xbrl.fields['IncomeTaxExpenseBenefit'] = self.xbrl.GetFactValue("us-gaap:IncomeTaxExpenseBenefitContinuingOperations", "Duration")
-            if self.xbrl.fields['IncomeTaxExpenseBenefit'] == None:
-                self.xbrl.fields['IncomeTaxExpenseBenefit'] = 0
-     
-        #IncomeFromContinuingOperationsAfterTax
-        self.xbrl.fields['IncomeFromContinuingOperationsAfterTax'] = self.xbrl.GetFactValue("us-gaap:IncomeLossBeforeExtraordinaryItemsAndCumulativeEffectOfChangeInAccountingPrinciple", "Duration")
-        if self.xbrl.fields['IncomeFromContinuingOperationsAfterTax'] == None:
-            self.xbrl.fields['IncomeFromContinuingOperationsAfterTax'] = self.xbrl.GetFactValue("us-gaap:IncomeLossBeforeExtraordinaryItemsAndCumulativeEffectOfChangeInAccountingPrinciple", "Duration")
-            if self.xbrl.fields['IncomeFromContinuingOperationsAfterTax'] == None:
-                self.xbrl.fields['IncomeFromContinuingOperationsAfterTax'] = 0
-
-        #IncomeFromDiscontinuedOperations
-        self.xbrl.fields['IncomeFromDiscontinuedOperations'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromDiscontinuedOperationsNetOfTax", "Duration")
-        if self.xbrl.fields['IncomeFromDiscontinuedOperations']== None:
-            self.xbrl.fields['IncomeFromDiscontinuedOperations'] = self.xbrl.GetFactValue("us-gaap:DiscontinuedOperationGainLossOnDisposalOfDiscontinuedOperationNetOfTax", "Duration")
-            if self.xbrl.fields['IncomeFromDiscontinuedOperations']== None:
-                self.xbrl.fields['IncomeFromDiscontinuedOperations'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromDiscontinuedOperationsNetOfTaxAttributableToReportingEntity", "Duration")
-                if self.xbrl.fields['IncomeFromDiscontinuedOperations']== None:
-                    self.xbrl.fields['IncomeFromDiscontinuedOperations'] = 0
-
-        #ExtraordaryItemsGainLoss
-        self.xbrl.fields['ExtraordaryItemsGainLoss'] = self.xbrl.GetFactValue("us-gaap:ExtraordinaryItemNetOfTax", "Duration")
-        if self.xbrl.fields['ExtraordaryItemsGainLoss']== None:
-            self.xbrl.fields['ExtraordaryItemsGainLoss'] = self.xbrl.GetFactValue("us-gaap:ExtraordinaryItemNetOfTax", "Duration")
-            if self.xbrl.fields['ExtraordaryItemsGainLoss']== None:
-                self.xbrl.fields['ExtraordaryItemsGainLoss'] = 0
-
-        #NetIncomeLoss
-        self.xbrl.fields['NetIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:ProfitLoss", "Duration")
-        if self.xbrl.fields['NetIncomeLoss']== None:
-            self.xbrl.fields['NetIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:NetIncomeLoss", "Duration")
-            if self.xbrl.fields['NetIncomeLoss']== None:
-                self.xbrl.fields['NetIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic", "Duration")
-                if self.xbrl.fields['NetIncomeLoss']== None:
-                    self.xbrl.fields['NetIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromContinuingOperations", "Duration")
-                    if self.xbrl.fields['NetIncomeLoss']== None:
-                        self.xbrl.fields['NetIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:IncomeLossAttributableToParent", "Duration")
-                        if self.xbrl.fields['NetIncomeLoss']== None:
-                            self.xbrl.fields['NetIncomeLoss'] = self.xbrl.GetFactValue("us-gaap:IncomeLossFromContinuingOperationsIncludingPortionAttributableToNoncontrollingInterest", "Duration")
-                            if self.xbrl.fields['NetIncomeLoss']== None:
-                                self.xbrl.fields['NetIncomeLoss'] = 0
-
-        #NetIncomeAvailableToCommonStockholdersBasic
-        self.xbrl.fields['NetIncomeAvailableToCommonStockholdersBasic'] = self.xbrl.GetFactValue("us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic", "Duration")
-        if self.xbrl.fields['NetIncomeAvailableToCommonStockholdersBasic']== None:
-            self.xbrl.fields['NetIncomeAvailableToCommonStockholdersBasic'] = 0
-                
-        #PreferredStockDividendsAndOtherAdjustments
-        self.xbrl.fields['PreferredStockDividendsAndOtherAdjustments'] = self.xbrl.GetFactValue("us-gaap:PreferredStockDividendsAndOtherAdjustments", "Duration")
-        if self.xbrl.fields['PreferredStockDividendsAndOtherAdjustments']== None:
-            self.xbrl.fields['PreferredStockDividendsAndOtherAdjustments'] = 0
-                
-        #NetIncomeAttributableToNoncontrollingInterest
-        self.xbrl.fields['NetIncomeAttributableToNoncontrollingInterest'] = self.xbrl.GetFactValue("us-gaap:NetIncomeLossAttributableToNoncontrollingInterest", "Duration")
-        if self.xbrl.fields['NetIncomeAttributableToNoncontrollingInterest']== None:
-            self.xbrl.fields['NetIncomeAttributableToNoncontrollingInterest'] = 0
-                
-        #NetIncomeAttributableToParent
-        self.xbrl.fields['NetIncomeAttributableToParent'] = self.xbrl.GetFactValue("us-gaap:NetIncomeLoss", "Duration")
-        if self.xbrl.fields['NetIncomeAttributableToParent']== None:
-            self.xbrl.fields['NetIncomeAttributableToParent'] = 0
-
-        #OtherComprehensiveIncome
-        self.xbrl.fields['OtherComprehensiveIncome'] = self.xbrl.GetFactValue("us-gaap:OtherComprehensiveIncomeLossNetOfTax", "Duration")
-        if self.xbrl.fields['OtherComprehensiveIncome']== None:
-            self.xbrl.fields['OtherComprehensiveIncome'] = self.xbrl.GetFactValue("us-gaap:OtherComprehensiveIncomeLossNetOfTax", "Duration")
-            if self.xbrl.fields['OtherComprehensiveIncome']== None:
-                self.xbrl.fields['OtherComprehensiveIncome'] = 0
-
-        #ComprehensiveIncome
-        self.xbrl.fields['ComprehensiveIncome'] = self.xbrl.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTaxIncludingPortionAttributableToNoncontrollingInterest", "Duration")
-        if self.xbrl.fields['ComprehensiveIncome']== None:
-            self.xbrl.fields['ComprehensiveIncome'] = self.xbrl.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTax", "Duration")
-            if self.xbrl.fields['ComprehensiveIncome']== None:
-                self.xbrl.fields['ComprehensiveIncome'] = 0
-
-        #ComprehensiveIncomeAttributableToParent
-        self.xbrl.fields['ComprehensiveIncomeAttributableToParent'] = self.xbrl.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTax", "Duration")
-        if self.xbrl.fields['ComprehensiveIncomeAttributableToParent']== None:
-            self.xbrl.fields['ComprehensiveIncomeAttributableToParent'] = self.xbrl.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTax", "Duration")
-            if self.xbrl.fields['ComprehensiveIncomeAttributableToParent']== None:
-                self.xbrl.fields['ComprehensiveIncomeAttributableToParent'] = 0
-     
-        #ComprehensiveIncomeAttributableToNoncontrollingInterest
-        self.xbrl.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest'] = self.xbrl.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTaxAttributableToNoncontrollingInterest", "Duration")
-        if self.xbrl.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest']==None:
-            self.xbrl.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest'] = self.xbrl.GetFactValue("us-gaap:ComprehensiveIncomeNetOfTaxAttributableToNoncontrollingInterest", "Duration")
-            if self.xbrl.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest']==None:
-                self.xbrl.fields['ComprehensiveIncomeAttributableToNoncontrollingInterest'] = 0
-
-
-
         #########'Adjustments to income statement information
         #Impute: NonoperatingIncomeLossPlusInterestAndDebtExpense
         self.xbrl.fields['NonoperatingIncomeLossPlusInterestAndDebtExpense'] = self.xbrl.fields['NonoperatingIncomeLoss'] + self.xbrl.fields['InterestAndDebtExpense']
@@ -568,74 +278,6 @@ class FundamentalAccountingConcepts:
 
         ###Cash flow statement
 
-        #NetCashFlow
-        self.xbrl.fields['NetCashFlow'] = self.xbrl.GetFactValue("us-gaap:CashAndCashEquivalentsPeriodIncreaseDecrease", "Duration")
-        if self.xbrl.fields['NetCashFlow']== None:
-            self.xbrl.fields['NetCashFlow'] = self.xbrl.GetFactValue("us-gaap:CashPeriodIncreaseDecrease", "Duration")
-            if self.xbrl.fields['NetCashFlow']== None:
-                self.xbrl.fields['NetCashFlow'] = self.xbrl.GetFactValue("us-gaap:NetCashProvidedByUsedInContinuingOperations", "Duration")
-                if self.xbrl.fields['NetCashFlow']== None:
-                    self.xbrl.fields['NetCashFlow'] = 0
-                
-        #NetCashFlowsOperating
-        self.xbrl.fields['NetCashFlowsOperating'] = self.xbrl.GetFactValue("us-gaap:NetCashProvidedByUsedInOperatingActivities", "Duration")
-        if self.xbrl.fields['NetCashFlowsOperating']== None:
-            self.xbrl.fields['NetCashFlowsOperating'] = 0
-                
-        #NetCashFlowsInvesting
-        self.xbrl.fields['NetCashFlowsInvesting'] = self.xbrl.GetFactValue("us-gaap:NetCashProvidedByUsedInInvestingActivities", "Duration")
-        if self.xbrl.fields['NetCashFlowsInvesting']== None:
-            self.xbrl.fields['NetCashFlowsInvesting'] = 0
-                
-        #NetCashFlowsFinancing
-        self.xbrl.fields['NetCashFlowsFinancing'] = self.xbrl.GetFactValue("us-gaap:NetCashProvidedByUsedInFinancingActivities", "Duration")
-        if self.xbrl.fields['NetCashFlowsFinancing']== None:
-            self.xbrl.fields['NetCashFlowsFinancing'] = 0
-                
-        #NetCashFlowsOperatingContinuing
-        self.xbrl.fields['NetCashFlowsOperatingContinuing'] = self.xbrl.GetFactValue("us-gaap:NetCashProvidedByUsedInOperatingActivitiesContinuingOperations", "Duration")
-        if self.xbrl.fields['NetCashFlowsOperatingContinuing']== None:
-            self.xbrl.fields['NetCashFlowsOperatingContinuing'] = 0
-                
-        #NetCashFlowsInvestingContinuing
-        self.xbrl.fields['NetCashFlowsInvestingContinuing'] = self.xbrl.GetFactValue("us-gaap:NetCashProvidedByUsedInInvestingActivitiesContinuingOperations", "Duration")
-        if self.xbrl.fields['NetCashFlowsInvestingContinuing']== None:
-            self.xbrl.fields['NetCashFlowsInvestingContinuing'] = 0
-                
-        #NetCashFlowsFinancingContinuing
-        self.xbrl.fields['NetCashFlowsFinancingContinuing'] = self.xbrl.GetFactValue("us-gaap:NetCashProvidedByUsedInFinancingActivitiesContinuingOperations", "Duration")
-        if self.xbrl.fields['NetCashFlowsFinancingContinuing']== None:
-            self.xbrl.fields['NetCashFlowsFinancingContinuing'] = 0
-                
-        #NetCashFlowsOperatingDiscontinued
-        self.xbrl.fields['NetCashFlowsOperatingDiscontinued'] = self.xbrl.GetFactValue("us-gaap:CashProvidedByUsedInOperatingActivitiesDiscontinuedOperations", "Duration")
-        if self.xbrl.fields['NetCashFlowsOperatingDiscontinued']==None:
-            self.xbrl.fields['NetCashFlowsOperatingDiscontinued'] = 0
-                
-        #NetCashFlowsInvestingDiscontinued
-        self.xbrl.fields['NetCashFlowsInvestingDiscontinued'] = self.xbrl.GetFactValue("us-gaap:CashProvidedByUsedInInvestingActivitiesDiscontinuedOperations", "Duration")
-        if self.xbrl.fields['NetCashFlowsInvestingDiscontinued']== None:
-            self.xbrl.fields['NetCashFlowsInvestingDiscontinued'] = 0
-                
-        #NetCashFlowsFinancingDiscontinued
-        self.xbrl.fields['NetCashFlowsFinancingDiscontinued'] = self.xbrl.GetFactValue("us-gaap:CashProvidedByUsedInFinancingActivitiesDiscontinuedOperations", "Duration")
-        if self.xbrl.fields['NetCashFlowsFinancingDiscontinued']== None:
-            self.xbrl.fields['NetCashFlowsFinancingDiscontinued'] = 0
-                
-        #NetCashFlowsDiscontinued
-        self.xbrl.fields['NetCashFlowsDiscontinued'] = self.xbrl.GetFactValue("us-gaap:NetCashProvidedByUsedInDiscontinuedOperations", "Duration")
-        if self.xbrl.fields['NetCashFlowsDiscontinued']== None:
-            self.xbrl.fields['NetCashFlowsDiscontinued'] = 0
-                
-        #ExchangeGainsLosses
-        self.xbrl.fields['ExchangeGainsLosses'] = self.xbrl.GetFactValue("us-gaap:EffectOfExchangeRateOnCashAndCashEquivalents", "Duration")
-        if self.xbrl.fields['ExchangeGainsLosses']== None:
-            self.xbrl.fields['ExchangeGainsLosses'] = self.xbrl.GetFactValue("us-gaap:EffectOfExchangeRateOnCashAndCashEquivalentsContinuingOperations", "Duration")
-            if self.xbrl.fields['ExchangeGainsLosses']== None:
-                self.xbrl.fields['ExchangeGainsLosses'] = self.xbrl.GetFactValue("us-gaap:CashProvidedByUsedInFinancingActivitiesDiscontinuedOperations", "Duration")
-                if self.xbrl.fields['ExchangeGainsLosses']== None:
-                    self.xbrl.fields['ExchangeGainsLosses'] = 0
-
         ####Adjustments
         #Impute: total net cash flows discontinued if not reported
         if self.xbrl.fields['NetCashFlowsDiscontinued']==0:
@@ -1,34 +1,137 @@
+import logging
 from DataBroker.Sources.Edgar.secFunctions import secFunctions
+from DataBroker.Sources.Edgar.sec_client import configureRateLimit, configureHttpCache
+from DataBroker.Sources.Edgar.database import configurePool, databaseHandler
+from DataBroker.Sources.Edgar.migrations import migrate, checkHotQueries
 
-def getFyAndFq(params,debug,cik):
+def setRateLimit(params,mode='process',path='/tmp/edgar_rate_limit'):
+    '''
+    Wrapper function for sec_client.configureRateLimit().
+    mode -> ('process', 'file' or 'postgres') how the EDGAR rate limit is \
+            shared between processes
+    path -> (str) file holding the shared state in file mode
+    '''
+    configureRateLimit(mode=mode,path=path,postgresParams=params)
+    return
+
+def setDatabasePool(params,maxConnections=4):
+    '''
+    Wrapper function for database.configurePool().
+    maxConnections -> (int) most Postgres connections open at once
+    '''
+    configurePool(params,maxConnections,maxConnections)
+    return
+
+def migrateDatabase(params,partitionIndex=False):
+    '''
+    Wrapper function for migrations.migrate() and migrations.checkHotQueries(). \
+    Errors are logged so the app still starts while Postgres is down.
+    partitionIndex -> (boolean) Whether to partition edgarindex by year
+    '''
+    logger = logging.getLogger(__name__)
+    try:
+        db = databaseHandler(params)
+    except Exception as error:
+        logger.error("Migrations skipped: %s" % error)
+        return
+    try:
+        migrate(db,partitionIndex,logger)
+        checkHotQueries(db,logger)
+    finally:
+        db.exit()
+    return
+
+def setHttpCache(directory=None,maxBytes=2*1024*1024*1024):
+    '''
+    Wrapper function for sec_client.configureHttpCache().
+    directory -> (str) folder for the on-disk cache of EDGAR responses, no \
+                 cache if None
+    maxBytes -> (int) size limit of the cache in bytes
+    '''
+    configureHttpCache(directory,maxBytes)
+    return
+
+def getFyAndFq(params,debug,cik,parseWorkers=1,parseCacheDir=None,parseCacheSize=512*1024*1024,force=False):
     '''
     Wrapper function for secFunctions.getFyAndFqReports().
     debug -> (boolean) Whether to record debug logs
     cik -> (str) Central Index Key from SEC
+    parseWorkers -> (int) Number of processes to parse filings in
+    parseCacheDir -> (str) Folder for the on-disk cache of parsed filings
+    parseCacheSize -> (int) Size limit of the parse cache in bytes
+    force -> (boolean) Process filings already in edgarfilings again
     '''
-    secApi = secFunctions(postgresParams=params,debug=debug)
-    secApi.getFyAndFqReports(cik,False,True)
+    secApi = secFunctions(postgresParams=params,debug=debug,parseWorkers=parseWorkers,parseCacheDir=parseCacheDir,parseCacheSize=parseCacheSize)
+    try:
+        secApi.getFyAndFqReports(cik,False,True,force)
+    finally:
+        # A flow that fails before its exit() still gives its connection back to the pool
+        secApi.db.release()
     return
 
-def getFyAndFqList(params,debug,ciks):
+def getFyAndFqList(params,debug,ciks,parseWorkers=1,parseCacheDir=None,parseCacheSize=512*1024*1024,force=False):
     '''
     Wrapper function for secFunctions.getFyAndFqReports().
     debug -> (boolean) Whether to record debug logs
     cik -> (str) Central Index Key from SEC
+    parseWorkers -> (int) Number of processes to parse filings in
+    parseCacheDir -> (str) Folder for the on-disk cache of parsed filings
+    parseCacheSize -> (int) Size limit of the parse cache in bytes
+    force -> (boolean) Process filings already in edgarfilings again
+    '''
+    secApi = secFunctions(postgresParams=params,debug=debug,parseWorkers=parseWorkers,parseCacheDir=parseCacheDir,parseCacheSize=parseCacheSize)
+    try:
+        secApi.getFyAndFqReportsList(ciks,False,True,force)
+    finally:
+        # A flow that fails before its exit() still gives its connection back to the pool
+        secApi.db.release()
+    return
+
+def getCompanyFacts(params,debug,path,parseWorkers=1):
+    '''
+    Wrapper function for secFunctions.getCompanyFactsBulk().
+    debug -> (boolean) Whether to record debug logs
+    path -> (str) location of SEC's companyfacts.zip
+    parseWorkers -> (int) Number of processes to read the archive in
+    '''
+    secApi = secFunctions(postgresParams=params,debug=debug,parseWorkers=parseWorkers)
+    try:
+        secApi.getCompanyFactsBulk(path)
+    finally:
+        # A flow that fails before its exit() still gives its connection back to the pool
+        secApi.db.release()
+    return
+
+def getStatementDatasets(params,debug,path):
+    '''
+    Wrapper function for secFunctions.getStatementDatasets().
+    debug -> (boolean) Whether to record debug logs
+    path -> (str) one quarter's Financial Statement Data Set zip or a \
+            folder of them
     '''
     secApi = secFunctions(postgresParams=params,debug=debug)
-    secApi.getFyAndFqReportsList(ciks,False,True)
+    try:
+        secApi.getStatementDatasets(path)
+    finally:
+        # A flow that fails before its exit() still gives its connection back to the pool
+        secApi.db.release()
     return
 
-def getMissingTickers(params,debug,date):
+def getMissingTickers(params,debug,date,tickerFile=None):
     '''
     Wrapper function for secFunctions.getTickersNotInDb().
     debug -> (boolean) Whether to record debug logs
     date -> (str) "YYYY-MM-dd" Earliest date of filings to parse in \
                 edgarindex
+    tickerFile -> (str) local submissions.zip or company_tickers_exchange.json \
+                  to refresh the ticker map from first
     '''
     secApi = secFunctions(postgresParams=params,debug=debug)
-    secApi.getTickersNotInDb(date=date)
+    try:
+        secApi.getTickersNotInDb(date=date,tickerFile=tickerFile)
+    finally:
+        # A flow that fails before its exit() still gives its connection back to the pool
+        secApi.db.release()
     return
 
 def getMissingFilingsIndex(params,debug,year,endYear=None):
@@ -38,5 +141,23 @@ def getMissingFilingsIndex(params,debug,year,endYear=None):
     year -> (int) cut off year to look for missing filing entries
     '''
     secApi = secFunctions(postgresParams=params,debug=debug)
-    secApi.getIndexEntriesOfFilingsMissing(year,endYear)
+    try:
+        secApi.getIndexEntriesOfFilingsMissing(year,endYear)
+    finally:
+        # A flow that fails before its exit() still gives its connection back to the pool
+        secApi.db.release()
+    return
+
+def getDailyFilingsIndex(params,debug,maxDays=14):
+    '''
+    Wrapper function for secFunctions.getDailyIndexEntries().
+    debug -> (boolean) Whether to record debug logs
+    maxDays -> (int) most days to catch up on from the daily index
+    '''
+    secApi = secFunctions(postgresParams=params,debug=debug)
+    try:
+        secApi.getDailyIndexEntries(maxDays)
+    finally:
+        # A flow that fails before its exit() still gives its connection back to the pool
+        secApi.db.release()
     return
\ No newline at end of file
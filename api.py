@@ -19,10 +19,10 @@ from flask_apscheduler import APScheduler
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.executors.pool import ThreadPoolExecutor
 
-from constants import POSTGRES_LOCATION, POSTGRES_PORT, POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, DEBUG
+from constants import POSTGRES_LOCATION, POSTGRES_PORT, POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_POOL_SIZE, PARTITION_INDEX, DEBUG, PARSE_WORKERS, PARSE_CACHE_DIR, PARSE_CACHE_MB, RATE_LIMIT_MODE, RATE_LIMIT_FILE, HTTP_CACHE_DIR, HTTP_CACHE_MB, COMPANYFACTS_PATH, STATEMENT_DATASETS_PATH, TICKER_MAP_PATH
 from database import db
 
-from DataBroker.edgar import getFyAndFq, getFyAndFqList, getMissingFilingsIndex, getMissingTickers
+from DataBroker.edgar import getFyAndFq, getFyAndFqList, getMissingFilingsIndex, getDailyFilingsIndex, getMissingTickers, getCompanyFacts, getStatementDatasets, setRateLimit, setHttpCache, setDatabasePool, migrateDatabase
 
 # set configuration values
 class Config:
@@ -67,9 +67,21 @@ def create_app():
             "user": f'{POSTGRES_USER}',
             "password": f'{POSTGRES_PASSWORD}'
         }
+    # Share the SEC request limit with the other workers and jobs
+    setRateLimit(params,RATE_LIMIT_MODE,RATE_LIMIT_FILE)
+    setHttpCache(HTTP_CACHE_DIR,HTTP_CACHE_MB*1024*1024)
+    # Jobs borrow warm connections instead of connecting every run
+    setDatabasePool(params,POSTGRES_POOL_SIZE)
+    # Bring the tables and their indexes up to date before any job runs
+    migrateDatabase(params,PARTITION_INDEX)
         
     @scheduler.task('cron', id='edgar_missing_entries', minute='30', hour='23', day_of_week='mon-fri', timezone='America/New_York')
     def edgar_scheduledDownload():
+        getDailyFilingsIndex(params,DEBUG)
+        return
+
+    @scheduler.task('cron', id='edgar_reconcile_entries', minute='0', hour='6', day_of_week='sat', timezone='America/New_York')
+    def edgar_scheduledReconcile():
         msg = datetime.date.today().year
         getMissingFilingsIndex(params,DEBUG,msg)
         return
@@ -90,7 +102,8 @@ def create_app():
     @app.route("/manual_edgar_missing_tickers", methods=['POST'])
     def edgar_getMissingTickers():
         msg = request.args.get('date',"2020-01-01")
-        addGetMissingTickers(scheduler,[params,DEBUG,msg])
+        tickerFile = request.args.get('file',TICKER_MAP_PATH)
+        addGetMissingTickers(scheduler,[params,DEBUG,msg,tickerFile])
         logger.info(msg)
         return json.dumps({
             'status':'success',
@@ -102,8 +115,9 @@ def create_app():
     def edgar_getFyAndFq():
         msg = request.args.get('cik',"1390777")
         delay = int(request.args.get('delay',"30"))
+        force = request.args.get('force',"false").lower() == "true"
         logger.info(msg)
-        addGetFyAndFq(scheduler,[params,DEBUG,[msg,delay]])
+        addGetFyAndFq(scheduler,[params,DEBUG,[msg,delay],PARSE_WORKERS,PARSE_CACHE_DIR,PARSE_CACHE_MB*1024*1024,force])
         return json.dumps({
             'status':'success',
             'function': 'edgar_getfy_fq',
@@ -114,14 +128,37 @@ def create_app():
     def edgar_getFyAndFqList():
         getList = list(request.json['ciks'])
         delay = int(request.args.get('delay',"30"))
+        force = request.args.get('force',"false").lower() == "true"
         logger.info(len(list(getList)))
-        addGetFyAndFqList(scheduler,[params,DEBUG,[getList,delay]])
+        addGetFyAndFqList(scheduler,[params,DEBUG,[getList,delay],PARSE_WORKERS,PARSE_CACHE_DIR,PARSE_CACHE_MB*1024*1024,force])
         return json.dumps({
             'status':'success',
             'function': 'edgar_getFyAndFqList',
             'res': len(list(getList)),
         })
 
+    @app.route("/manual_edgar_companyfacts", methods=['POST'])
+    def edgar_getCompanyFacts():
+        msg = request.args.get('path',COMPANYFACTS_PATH)
+        logger.info(msg)
+        addGetCompanyFacts(scheduler,[params,DEBUG,msg,PARSE_WORKERS])
+        return json.dumps({
+            'status':'success',
+            'function': 'edgar_companyfacts',
+            'res': msg,
+        })
+
+    @app.route("/manual_edgar_financial_statements", methods=['POST'])
+    def edgar_getStatementDatasets():
+        msg = request.args.get('path',STATEMENT_DATASETS_PATH)
+        logger.info(msg)
+        addGetStatementDatasets(scheduler,[params,DEBUG,msg])
+        return json.dumps({
+            'status':'success',
+            'function': 'edgar_financial_statements',
+            'res': msg,
+        })
+
     scheduler.start()
     return app
 
@@ -129,11 +166,13 @@ def addGetFyAndFq(scheduler=APScheduler,args=[]):
     '''
     Add paring 10-K and 10-Q flow to AP Scheduler.
     scheduler -> APScheduler Object
-    args -> (list) list containing params dict, debug boolean \
-            and msg, a string to include in response
+    args -> (list) list containing params dict, debug boolean, \
+            [cik, delay], the number of parse workers, the parse cache \
+            folder, the parse cache size in bytes and whether to process \
+            filings already in edgarfilings again
     '''
     delay = args[2][1]
-    args = [args[0],args[1],args[2][0]]
+    args = [args[0],args[1],args[2][0]] + args[3:]
     logger = logging.getLogger(__name__)
     scheduled_time = datetime.datetime.now() + datetime.timedelta(seconds=delay)
     logger.info('Getting 10-Ks and 10-Qs Job Added')
@@ -144,24 +183,53 @@ def addGetFyAndFqList(scheduler=APScheduler,args=[]):
     '''
     Add paring 10-K and 10-Q flow to AP Scheduler.
     scheduler -> APScheduler Object
-    args -> (list) list containing params dict, debug boolean \
-            and msg, a string to include in response
+    args -> (list) list containing params dict, debug boolean, \
+            [ciks, delay], the number of parse workers, the parse cache \
+            folder, the parse cache size in bytes and whether to process \
+            filings already in edgarfilings again
     '''
     delay = args[2][1]
-    args = [args[0],args[1],args[2][0]]
+    args = [args[0],args[1],args[2][0]] + args[3:]
     logger = logging.getLogger(__name__)
     scheduled_time = datetime.datetime.now() + datetime.timedelta(seconds=delay)
     logger.info('Getting 10-Ks and 10-Qs %s tickers job added' % str(len(args[2])))
     scheduler.add_job('Getting 10-Ks and 10-Qs %s tickers' % str(len(args[2])),getFyAndFqList,args=args,trigger='date',run_date=scheduled_time)
     return 
 
+def addGetCompanyFacts(scheduler=APScheduler,args=[]):
+    '''
+    Add companyfacts bulk load flow to AP Scheduler.
+    scheduler -> APScheduler Object
+    args -> (list) list containing params dict, debug boolean, \
+            the path of companyfacts.zip and the number of parse workers
+    '''
+    logger = logging.getLogger(__name__)
+    scheduled_time = datetime.datetime.now() + datetime.timedelta(seconds=30)
+    logger.info('Companyfacts Bulk Load Job Added')
+    scheduler.add_job('Companyfacts Bulk Load',getCompanyFacts,args=args,trigger='date',run_date=scheduled_time)
+    return 
+
+def addGetStatementDatasets(scheduler=APScheduler,args=[]):
+    '''
+    Add Financial Statement Data Sets load flow to AP Scheduler.
+    scheduler -> APScheduler Object
+    args -> (list) list containing params dict, debug boolean \
+            and the path of a quarter's zip or a folder of them
+    '''
+    logger = logging.getLogger(__name__)
+    scheduled_time = datetime.datetime.now() + datetime.timedelta(seconds=30)
+    logger.info('Financial Statement Data Sets Job Added')
+    scheduler.add_job('Financial Statement Data Sets',getStatementDatasets,args=args,trigger='date',run_date=scheduled_time)
+    return 
+
 def addGetMissingTickers(scheduler=APScheduler,args=[]):
     '''
     Add missing tickers flow to AP Scheduler.
     scheduler -> APScheduler Object
 
-    args -> (list) list containing params dict, debug boolean \
-            and msg, a string to include in response
+    args -> (list) list containing params dict, debug boolean, \
+            msg, a string to include in response, and the bulk ticker \
+            file or None
     '''
     logger = logging.getLogger(__name__)
     scheduled_time = datetime.datetime.now() + datetime.timedelta(seconds=30)
@@ -0,0 +1,149 @@
+'''
+Synthetic XBRL instance documents for the benchmarks.
+
+The repo ships no recorded filings, so the benchmarks build instance documents
+shaped like SEC's: a dei cover page, a few thousand contexts with and without
+segments, the us-gaap concepts CompanyData reads and many filler facts. The
+same seed always gives the same document.
+
+statementDataset writes a quarterly Financial Statement Data Set zip the same
+way, with a sub.txt and num.txt shaped like SEC's.
+'''
+import random
+import zipfile
+
+CONCEPTS = [
+    'Assets','AssetsCurrent','LiabilitiesAndStockholdersEquity','Liabilities','LiabilitiesCurrent','StockholdersEquity',
+    'Revenues','CostOfRevenue','GrossProfit','OperatingExpenses','OperatingIncomeLoss','NetIncomeLoss','IncomeTaxExpenseBenefit',
+    'CashAndCashEquivalentsPeriodIncreaseDecrease','NetCashProvidedByUsedInOperatingActivities','NetCashProvidedByUsedInInvestingActivities',
+    'NetCashProvidedByUsedInFinancingActivities','ComprehensiveIncomeNetOfTax','MinorityInterest','CommitmentsAndContingencies'
+]
+
+# Balance sheet concepts are reported for an instant, the others for a duration
+INSTANT_CONCEPTS = {'Assets','AssetsCurrent','LiabilitiesAndStockholdersEquity','Liabilities','LiabilitiesCurrent','StockholdersEquity','MinorityInterest','CommitmentsAndContingencies'}
+
+COVER_PAGE = [
+    ('DocumentType','10-K'),
+    ('DocumentPeriodEndDate','2021-12-31'),
+    ('EntityRegistrantName','Example Corp'),
+    ('TradingSymbol','EXMP'),
+    ('EntityCentralIndexKey','0000000001'),
+    ('DocumentFiscalYearFocus','2021'),
+    ('DocumentFiscalPeriodFocus','FY'),
+    ('EntityFilerCategory','Large Accelerated Filer'),
+    ('CurrentFiscalYearEndDate','--12-31')
+]
+
+class FakeResponse:
+    def __init__(self,content,url):
+        '''
+        Stand in for the requests response XBRL(xbrl_content=...) reads.
+        content -> (bytes) body of the instance document
+        url -> (str) address the document would come from
+        '''
+        self.content = content
+        self.url = url
+
+def instanceDocument(contexts=2000,facts=20000,seed=0,prefix='xbrli:',coverPageLast=False):
+    '''
+    Build a synthetic XBRL instance document.
+    contexts -> (int) number of contexts, all but the first three with a segment
+    facts -> (int) number of filler facts, a third of them for the concepts \
+             CompanyData reads
+    seed -> (int) seed of the random values
+    prefix -> (str) namespace prefix of the instance elements, '' for the \
+              default namespace
+    coverPageLast -> (boolean) put the dei cover page at the end of the \
+                     document instead of before the facts
+    Returns the document as bytes.
+    '''
+    rand = random.Random(seed)
+    p = prefix
+    out = ['<?xml version="1.0" encoding="utf-8"?>',
+        '<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns="http://www.xbrl.org/2003/instance" '
+        'xmlns:us-gaap="http://fasb.org/us-gaap/2021" xmlns:dei="http://xbrl.sec.gov/dei/2021" '
+        'xmlns:xbrldi="http://xbrl.org/2006/xbrldi" xmlns:iso4217="http://www.xbrl.org/2003/iso4217" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">']
+    instant = '<{p}instant>2021-12-31</{p}instant>'.format(p=p)
+    yearToDate = '<{p}startDate>2021-01-01</{p}startDate><{p}endDate>2021-12-31</{p}endDate>'.format(p=p)
+    quarter = '<{p}startDate>2021-10-01</{p}startDate><{p}endDate>2021-12-31</{p}endDate>'.format(p=p)
+
+    def context(i,period,segment):
+        member = '<{p}segment><xbrldi:explicitMember dimension="us-gaap:X">us-gaap:M{i}</xbrldi:explicitMember></{p}segment>'.format(p=p,i=i) if segment else ''
+        return ('<{p}context id="c{i}"><{p}entity><{p}identifier scheme="http://www.sec.gov/CIK">0000000001</{p}identifier>{member}</{p}entity>'
+            '<{p}period>{period}</{p}period></{p}context>').format(p=p,i=i,member=member,period=period)
+
+    def fact(concept,contextId):
+        return '<us-gaap:{c} contextRef="c{i}" unitRef="usd" decimals="-3">{v}</us-gaap:{c}>'.format(c=concept,i=contextId,v=rand.randint(1,10**9))
+
+    coverPage = ['<dei:{0} contextRef="c1">{1}</dei:{0}>'.format(name,value) for name, value in COVER_PAGE]
+    out.append(context(0,instant,False))
+    out.append(context(1,yearToDate,False))
+    out.append(context(2,quarter,False))
+    for i in range(3,contexts):
+        out.append(context(i,instant if i % 2 else yearToDate,True))
+    out.append('<{p}unit id="usd"><{p}measure>iso4217:USD</{p}measure></{p}unit>'.format(p=p))
+    if not coverPageLast:
+        out.extend(coverPage)
+    for concept in CONCEPTS:
+        if concept in INSTANT_CONCEPTS:
+            out.append(fact(concept,0))
+        else:
+            out.append(fact(concept,1))
+            out.append(fact(concept,2))
+    out.append('<us-gaap:EffectOfExchangeRateOnCashAndCashEquivalents contextRef="c1" unitRef="usd" xsi:nil="true"/>')
+    for k in range(facts):
+        concept = CONCEPTS[k % len(CONCEPTS)] if k % 3 == 0 else 'Filler%d' % (k % 500)
+        contextId = 3 + k % (contexts - 3)
+        # Odd contexts are instants, keep each concept on its kind of period
+        if (concept in INSTANT_CONCEPTS) != bool(contextId % 2):
+            contextId = contextId + 1 if contextId + 1 < contexts else contextId - 1
+        out.append(fact(concept,contextId))
+    if coverPageLast:
+        out.extend(coverPage)
+    out.append('</xbrli:xbrl>')
+    return '\n'.join(out).encode()
+
+SUB_HEADER = ['adsh','cik','name','sic','countryba','stprba','cityba','afs','wksi','fye','form','period','fy','fp','filed','accepted','prevrpt','detail','instance','nciks','aciks']
+
+NUM_HEADER = ['adsh','tag','version','ddate','qtrs','uom','segments','coreg','value','footnote']
+
+def statementDataset(path,tags,filings=6500,factsPerFiling=480,seed=0):
+    '''
+    Write a synthetic quarterly Financial Statement Data Set zip.
+    path -> (str) zip file to write
+    tags -> (list) us-gaap tags the loader keeps, a third of the facts use \
+            them and the rest are filler tags
+    filings -> (int) submissions in sub.txt, mostly 10-Q and 10-K with some \
+               other forms the loader skips
+    factsPerFiling -> (int) num.txt rows of each submission, some of them \
+                      for the prior year, with segments or for a co-registrant
+    seed -> (int) seed of the random values
+    Returns the number of num.txt rows written.
+    '''
+    rand = random.Random(seed)
+    tags = sorted(tags)
+    filler = ['OtherTag%d' % i for i in range(400)]
+    forms = ['10-Q']*6 + ['10-K']*2 + ['8-K','S-1']
+    sub = ['\t'.join(SUB_HEADER)]
+    num = ['\t'.join(NUM_HEADER)]
+    for i in range(filings):
+        adsh = '%010d-23-%06d' % (1000+i,i)
+        form = rand.choice(forms)
+        quarter = rand.randint(1,3)
+        period = '2023%02d%s' % (3*quarter,'30' if quarter in (2,3) else '31')
+        yearToDate = 4 if form == '10-K' else quarter
+        sub.append('\t'.join([adsh,str(1000+i),'COMPANY %d INC' % i,'1000','US','NY','NEW YORK','1-LAF','0','1231',form,period,'2023',
+            'FY' if form == '10-K' else 'Q%d' % quarter,'20231101','2023-11-01 16:00:00.0','0','0','x_htm.xml','1','']))
+        for j in range(factsPerFiling):
+            tag = rand.choice(tags) if j % 3 == 0 else rand.choice(filler)
+            kind = rand.random()
+            quarters = 0 if kind < 0.5 else (yearToDate if kind < 0.8 else 1)
+            date = period if rand.random() < 0.6 else '2022' + period[4:]
+            segments = '' if rand.random() < 0.8 else 'BusinessSegment=X;'
+            coreg = '' if rand.random() < 0.95 else 'SubCo'
+            num.append('%s\t%s\tus-gaap/2023\t%s\t%d\tUSD\t%s\t%s\t%d.0000\t' % (adsh,tag,date,quarters,segments,coreg,rand.randint(-10**9,10**10)))
+    with zipfile.ZipFile(path,'w',zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('sub.txt','\n'.join(sub) + '\n')
+        archive.writestr('num.txt','\n'.join(num) + '\n')
+    return len(num) - 1
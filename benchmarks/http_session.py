@@ -0,0 +1,102 @@
+'''
+Requests per second against a local stand-in for www.sec.gov, opening a new
+session for every request like the code before sec_client did, and through
+the shared sec_client session.
+
+The stand-in serves one instance document with keep-alive, gzip compressed
+when asked. Give --cert and --key to serve it over TLS, where every new
+session also pays for a handshake:
+
+    openssl req -x509 -newkey rsa:2048 -nodes -subj /CN=localhost \
+        -addext subjectAltName=DNS:localhost -keyout key.pem -out cert.pem -days 1
+    python benchmarks/http_session.py --cert cert.pem --key key.pem
+
+The rate limit is lifted for the benchmark, EDGAR itself allows 10 requests
+per second.
+'''
+import os
+import sys
+import ssl
+import gzip
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from fixtures import instanceDocument
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from DataBroker.Sources.Edgar import sec_client
+
+def standInServer(body,certFile=None,keyFile=None):
+    '''
+    Start a threaded HTTP server returning body for every GET and return its base url.
+    body -> (bytes) document to serve
+    certFile -> (str) certificate to serve TLS with, plain http if None
+    keyFile -> (str) private key of the certificate
+    '''
+    compressed = gzip.compress(body)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            useGzip = 'gzip' in self.headers.get('Accept-Encoding','')
+            data = compressed if useGzip else body
+            self.send_response(200)
+            self.send_header('Content-Length',str(len(data)))
+            if useGzip:
+                self.send_header('Content-Encoding','gzip')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self,*args):
+            pass
+
+    server = ThreadingHTTPServer(('localhost',0),Handler)
+    scheme = 'http'
+    if certFile is not None:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certFile,keyFile)
+        server.socket = context.wrap_socket(server.socket,server_side=True)
+        # Trust the stand-in's certificate in both clients
+        os.environ['REQUESTS_CA_BUNDLE'] = certFile
+        scheme = 'https'
+    threading.Thread(target=server.serve_forever,daemon=True).start()
+    return '%s://localhost:%s' % (scheme,server.server_address[1])
+
+def newSessionGet(url):
+    '''
+    GET with a session of its own, like the modules did before sec_client.
+    url -> (str) address to request
+    '''
+    session = requests.Session()
+    adapter = HTTPAdapter(max_retries=Retry(connect=3,backoff_factor=0.5))
+    session.mount('http://',adapter)
+    session.mount('https://',adapter)
+    return session.get(url,headers={'User-Agent': sec_client.USER_AGENT})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests',type=int,default=300,help='requests per client')
+    parser.add_argument('--cert',default=None,help='certificate to serve TLS with')
+    parser.add_argument('--key',default=None,help='private key of the certificate')
+    args = parser.parse_args()
+    body = instanceDocument(100,500)
+    url = standInServer(body,args.cert,args.key) + '/Archives/edgar/data/1/benchmark.xml'
+    sec_client.configureRateLimit('process',rate=1e9)
+    print('%s, %.0f KB document' % (url.split(':')[0],len(body)/1e3))
+    for name, get in [('new session per request',newSessionGet),('shared sec_client',sec_client.fetch)]:
+        get(url)
+        startTime = time.time()
+        received = 0
+        for _ in range(args.requests):
+            received += len(get(url).content)
+        duration = time.time() - startTime
+        print('%-24s %7.1f req/s  bodies ok %s' % (name,args.requests/duration,received == args.requests*len(body)))
+
+if __name__ == '__main__':
+    main()
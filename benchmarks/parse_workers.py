@@ -0,0 +1,75 @@
+'''
+Throughput of parsing filings in a process pool while downloads continue.
+
+Each filing is "downloaded" with a fixed delay and handed to parseFiling in a
+ProcessPoolExecutor the way CompanyData.research does, then rows are
+collected in filing order. One worker parses inline like a run without an
+executor. The rows of every worker count are checked against the inline run.
+
+    python benchmarks/parse_workers.py --workers 1 2 4 8
+'''
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from fixtures import instanceDocument
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from DataBroker.Sources.Edgar.filing_batch import FilingBatch, parseFiling
+
+def makeFilings(count):
+    '''
+    Synthetic instance documents from about 0.3 MB to 3 MB, as (accession, content, url).
+    count -> (int) number of filings
+    '''
+    filings = []
+    for i in range(count):
+        scale = 1 + i % 10
+        content = instanceDocument(200*scale,3000*scale,seed=i)
+        filings.append(('%018d' % i,content,'https://www.sec.gov/Archives/edgar/data/1/%s.xml' % i))
+    return filings
+
+def run(filings,workers,downloadDelay):
+    '''
+    Download and parse every filing, returning (seconds, FilingBatch).
+    filings -> (list) (accession, content, url) of each filing
+    workers -> (int) parse processes, 1 parses inline
+    downloadDelay -> (float) seconds each download takes
+    '''
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    batch = FilingBatch()
+    startTime = time.time()
+    try:
+        pending = []
+        for accession, content, url in filings:
+            time.sleep(downloadDelay)
+            if executor is not None:
+                pending.append((accession,executor.submit(parseFiling,content,url)))
+            else:
+                batch.append(parseFiling(content,url),accession)
+        for accession, future in pending:
+            batch.append(future.result(),accession)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return time.time() - startTime, batch
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers',type=int,nargs='+',default=[1,2,4,8],help='worker counts to time')
+    parser.add_argument('--filings',type=int,default=16,help='number of filings')
+    parser.add_argument('--delay',type=float,default=0.5,help='seconds each download takes')
+    args = parser.parse_args()
+    filings = makeFilings(args.filings)
+    print('%s filings, %.1f MB, %s CPUs' % (len(filings),sum(len(content) for _, content, _ in filings)/1e6,os.cpu_count()))
+    expected = None
+    for workers in args.workers:
+        duration, batch = run(filings,workers,args.delay)
+        rows = batch.toRows()
+        if expected is None:
+            expected = rows
+        print('workers %s: %5.1fs (%.2f filings/s) rows match %s' % (workers,duration,len(filings)/duration,rows == expected))
+
+if __name__ == '__main__':
+    main()
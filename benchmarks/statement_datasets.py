@@ -0,0 +1,90 @@
+'''
+Rows per second of loading a Financial Statement Data Set quarter.
+
+A synthetic quarter is written to a temporary zip and loaded with
+loadStatementDataset. The time spent reading, filtering and building the
+FilingBatch is reported apart from the COPY into edgarfilings. Without
+--database the COPY buffer is only built, not sent. With --database the
+batch is copied into that database's edgarfilings and the synthetic filings
+are deleted again afterwards, so point it at a scratch database:
+
+    python benchmarks/statement_datasets.py --filings 6500 --facts 480
+    python benchmarks/statement_datasets.py --host localhost --database scratch --user postgres
+'''
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from fixtures import statementDataset
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from DataBroker.Sources.Edgar.database import databaseHandler
+from DataBroker.Sources.Edgar.statement_datasets import NEEDED_TAGS, loadStatementDataset
+
+class BufferOnly:
+    def __init__(self):
+        '''
+        Stands in for the databaseHandler when there is no database, building the COPY buffer without sending it.
+        '''
+        self.copySeconds = 0
+        self.accessions = []
+
+    def copy_edgarfilings(self,batch):
+        startTime = time.perf_counter()
+        batch.toCopyBuffer(nullValue='NULL')
+        self.copySeconds += time.perf_counter() - startTime
+        self.accessions += list(batch.column('Accession'))
+        return len(batch)
+
+class TimedHandler(databaseHandler):
+    def __init__(self,params_dic):
+        '''
+        databaseHandler that times its COPY into edgarfilings.
+        params_dic -> Dict with keys host, port, database, user, password
+        '''
+        super().__init__(params_dic)
+        self.copySeconds = 0
+        self.accessions = []
+
+    def copy_edgarfilings(self,batch,update=False):
+        startTime = time.perf_counter()
+        inserted = super().copy_edgarfilings(batch,update)
+        self.copySeconds += time.perf_counter() - startTime
+        self.accessions += list(batch.column('Accession'))
+        return inserted
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filings',type=int,default=6500,help='submissions in the quarter')
+    parser.add_argument('--facts',type=int,default=480,help='num.txt rows per submission')
+    parser.add_argument('--host',default='localhost',help='Postgres host')
+    parser.add_argument('--port',default='5432',help='Postgres port')
+    parser.add_argument('--database',default=None,help='scratch database to COPY into, the COPY buffer is only built if not given')
+    parser.add_argument('--user',default='postgres',help='Postgres user')
+    parser.add_argument('--password',default='',help='Postgres password')
+    args = parser.parse_args()
+    logger = logging.getLogger('benchmark')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory,'2023q3.zip')
+        rows = statementDataset(path,NEEDED_TAGS,args.filings,args.facts)
+        print('%s filings, %s num.txt rows, %.1f MB zip' % (args.filings,rows,os.path.getsize(path)/1e6),flush=True)
+        if args.database is None:
+            handler = BufferOnly()
+        else:
+            handler = TimedHandler({'host': args.host,'port': args.port,'database': args.database,'user': args.user,'password': args.password})
+        startTime = time.perf_counter()
+        rows, filings = loadStatementDataset(path,handler,logger)
+        duration = time.perf_counter() - startTime
+    parse = duration - handler.copySeconds
+    print('read and build %6.2fs %9.0f rows/s' % (parse,rows/parse))
+    print('%-14s %6.2fs %9.0f filings/s' % ('copy' if args.database else 'copy buffer',handler.copySeconds,filings/handler.copySeconds if handler.copySeconds > 0 else 0))
+    print('total          %6.2fs %9.0f rows/s, %s filings' % (duration,rows/duration,filings))
+    if args.database is not None:
+        # Take the synthetic filings out of the scratch table again
+        handler.cur.execute('DELETE FROM public.edgarfilings WHERE "Accession" = ANY(%s);',(handler.accessions,))
+        handler.conn.commit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+'''
+Time a full XBRL(tradingsymbol=False) parse of synthetic instance documents.
+
+Compare two versions of the parser by checking the older one out next to
+this one and pointing --root at it, e.g.
+
+    git worktree add /tmp/baseline <commit>
+    python benchmarks/xbrl_parse.py --root /tmp/baseline
+    python benchmarks/xbrl_parse.py
+
+The fields of each document are written to --fields so the outputs of both
+runs can be compared.
+'''
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from fixtures import instanceDocument, FakeResponse
+
+# (name, contexts, filler facts) of each document
+DOCUMENTS = [
+    ('2k facts',200,2000),
+    ('5k facts',500,5000),
+    ('10k facts',1000,10000)
+]
+
+def bestOf(parse,repeat):
+    '''
+    Run parse repeat times and return (best seconds, last result).
+    '''
+    best = None
+    for _ in range(repeat):
+        startTime = time.perf_counter()
+        result = parse()
+        duration = time.perf_counter() - startTime
+        best = duration if best is None else min(best,duration)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root',default=os.path.join(os.path.dirname(__file__),'..'),help='checkout to import DataBroker from')
+    parser.add_argument('--repeat',type=int,default=2,help='runs per document, the best is kept')
+    parser.add_argument('--fields',default=None,help='file to write the parsed fields to as JSON')
+    args = parser.parse_args()
+    sys.path.insert(0,os.path.abspath(args.root))
+    from DataBroker.Sources.Edgar.xbrl_class import XBRL
+    logger = logging.getLogger('benchmark')
+    fields = {}
+    for name, contexts, facts in DOCUMENTS:
+        content = instanceDocument(contexts,facts)
+        response = FakeResponse(content,'https://www.sec.gov/Archives/edgar/data/1/benchmark.xml')
+        duration, data = bestOf(lambda: XBRL(xbrl_content=response,tradingsymbol=False,logger=logger),args.repeat)
+        fields[name] = data.fields
+        print('%-10s %5.1f MB  %6.2fs' % (name,len(content)/1e6,duration),flush=True)
+    if args.fields is not None:
+        with open(args.fields,'w') as file:
+            json.dump(fields,file,sort_keys=True,default=str,indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -7,4 +7,16 @@ POSTGRES_PORT = environ['POSTGRES_PORT']
 POSTGRES_DB = environ['POSTGRES_DB']
 POSTGRES_USER = environ['POSTGRES_USER']
 POSTGRES_PASSWORD = environ['POSTGRES_PASSWORD']
-DEBUG = json.loads(environ['DEBUG_BOOL'].lower()) if len(environ['DEBUG_BOOL']) > 0 else False
\ No newline at end of file
+POSTGRES_POOL_SIZE = int(environ.get('POSTGRES_POOL_SIZE','4') or 4)
+PARTITION_INDEX = json.loads((environ.get('EDGAR_PARTITION_INDEX') or 'false').lower())
+DEBUG = json.loads(environ['DEBUG_BOOL'].lower()) if len(environ['DEBUG_BOOL']) > 0 else False
+PARSE_WORKERS = int(environ.get('EDGAR_PARSE_WORKERS','1') or 1)
+PARSE_CACHE_DIR = environ.get('EDGAR_PARSE_CACHE_DIR') or None
+PARSE_CACHE_MB = int(environ.get('EDGAR_PARSE_CACHE_MB','512') or 512)
+RATE_LIMIT_MODE = environ.get('EDGAR_RATE_LIMIT_MODE') or 'process'
+RATE_LIMIT_FILE = environ.get('EDGAR_RATE_LIMIT_FILE') or '/tmp/edgar_rate_limit'
+HTTP_CACHE_DIR = environ.get('EDGAR_HTTP_CACHE_DIR') or None
+HTTP_CACHE_MB = int(environ.get('EDGAR_HTTP_CACHE_MB','2048') or 2048)
+COMPANYFACTS_PATH = environ.get('EDGAR_COMPANYFACTS_PATH') or './index/companyfacts.zip'
+STATEMENT_DATASETS_PATH = environ.get('EDGAR_STATEMENT_DATASETS_PATH') or './index/financial_statements'
+TICKER_MAP_PATH = environ.get('EDGAR_TICKER_MAP_PATH') or None
\ No newline at end of file
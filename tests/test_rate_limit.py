@@ -0,0 +1,117 @@
+'''
+The EDGAR rate limit shared by several processes.
+
+Worker processes fetch from a local stand-in for www.sec.gov through
+sec_client, each with its own limiter configured the way a job would. The
+stand-in records when every request arrives so the combined rate can be
+checked against EDGAR's 10 requests per second.
+
+The postgres case uses the POSTGRES_* variables the app reads and is skipped
+when they are not set or no server answers.
+'''
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+import psycopg2
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from DataBroker.Sources.Edgar import sec_client
+
+PROCESSES = 4
+REQUESTS_PER_PROCESS = 8
+
+def standInServer():
+    '''
+    Start a threaded HTTP server that records the arrival time of every GET. Returns (server, url, arrivals).
+    '''
+    arrivals = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            with lock:
+                arrivals.append(time.time())
+            body = b'ok'
+            self.send_response(200)
+            self.send_header('Content-Length',str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self,*args):
+            pass
+
+    server = ThreadingHTTPServer(('localhost',0),Handler)
+    threading.Thread(target=server.serve_forever,daemon=True).start()
+    return server, 'http://localhost:%s/Archives/edgar/data/1/index.json' % server.server_address[1], arrivals
+
+def fetchWorker(url,mode,path,postgresParams,start):
+    '''
+    Configure the limiter like a job would, wait for the others and make REQUESTS_PER_PROCESS requests.
+    '''
+    sec_client.configureRateLimit(mode,path=path,postgresParams=postgresParams)
+    start.wait()
+    for _ in range(REQUESTS_PER_PROCESS):
+        sec_client.fetch(url).content
+
+def combinedRate(mode,path='/tmp/edgar_rate_limit',postgresParams={}):
+    '''
+    Run PROCESSES workers against the stand-in and return (requests received, requests per second).
+    '''
+    server, url, arrivals = standInServer()
+    context = multiprocessing.get_context('fork')
+    start = context.Barrier(PROCESSES)
+    workers = [context.Process(target=fetchWorker,args=(url,mode,path,postgresParams,start)) for _ in range(PROCESSES)]
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            assert worker.exitcode == 0
+    finally:
+        server.shutdown()
+    arrivals.sort()
+    return len(arrivals), (len(arrivals)-1)/(arrivals[-1]-arrivals[0])
+
+def postgresParams():
+    '''
+    Connection parameters from the POSTGRES_* variables, or None if they are not set.
+    '''
+    if 'POSTGRES_LOCATION' not in os.environ:
+        return None
+    return {
+        'host': os.environ['POSTGRES_LOCATION'],
+        'port': os.environ.get('POSTGRES_PORT','5432'),
+        'database': os.environ.get('POSTGRES_DB','postgres'),
+        'user': os.environ.get('POSTGRES_USER','postgres'),
+        'password': os.environ.get('POSTGRES_PASSWORD','')
+    }
+
+def test_file_mode_shares_limit_between_processes(tmp_path):
+    received, rate = combinedRate('file',path=str(tmp_path / 'edgar_rate_limit'))
+    assert received == PROCESSES*REQUESTS_PER_PROCESS
+    # Small allowance for when the stand-in's threads record the arrivals
+    assert rate <= sec_client.EDGAR_RATE_LIMIT*1.02
+
+def test_process_mode_does_not_share_limit(tmp_path):
+    # Without a shared limiter each process gets the full rate, which is what file mode fixes
+    received, rate = combinedRate('process')
+    assert received == PROCESSES*REQUESTS_PER_PROCESS
+    assert rate > sec_client.EDGAR_RATE_LIMIT*1.5
+
+def test_postgres_mode_shares_limit_between_processes():
+    params = postgresParams()
+    if params is None:
+        pytest.skip('POSTGRES_LOCATION is not set')
+    try:
+        psycopg2.connect(**params).close()
+    except psycopg2.OperationalError as error:
+        pytest.skip('No Postgres server: %s' % error)
+    received, rate = combinedRate('postgres',postgresParams=params)
+    assert received == PROCESSES*REQUESTS_PER_PROCESS
+    assert rate <= sec_client.EDGAR_RATE_LIMIT*1.02
@@ -0,0 +1,81 @@
+'''
+Header only parses of documents that are not well formed XML.
+
+recentTickers reads the dei cover page of many instance documents with a
+streaming parse. SEC answers some of those requests with an HTML error page,
+and a download can be cut off. Both have to give Not Provided fields like the
+lxml-xml parse did instead of stopping the run.
+'''
+import io
+import os
+import sys
+import logging
+import requests
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from DataBroker.Sources.Edgar.xbrl_class import XBRL
+from DataBroker.Sources.Edgar.filing_batch import parseFiling, hasFilingData
+
+URL = 'https://www.sec.gov/Archives/edgar/data/1/000000000123000001/example.xml'
+
+INSTANCE = b'''<?xml version="1.0" encoding="utf-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:dei="http://xbrl.sec.gov/dei/2021" xmlns:us-gaap="http://fasb.org/us-gaap/2021">
+<xbrli:context id="c1"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">0000000001</xbrli:identifier></xbrli:entity>
+<xbrli:period><xbrli:startDate>2021-01-01</xbrli:startDate><xbrli:endDate>2021-12-31</xbrli:endDate></xbrli:period></xbrli:context>
+<dei:DocumentType contextRef="c1">10-K</dei:DocumentType>
+<dei:EntityRegistrantName contextRef="c1">Example Corp</dei:EntityRegistrantName>
+<dei:TradingSymbol contextRef="c1">EXMP</dei:TradingSymbol>
+<us-gaap:Assets contextRef="c1" unitRef="usd" decimals="-3">1000</us-gaap:Assets>
+</xbrli:xbrl>
+'''
+
+# What www.sec.gov sends instead of a document once a client goes over the rate limit
+RATE_LIMIT_PAGE = b'''<!DOCTYPE html>
+<html><head><title>SEC.gov | Request Rate Threshold Exceeded</title></head>
+<body><h1>Your Request Originates from an Undeclared Automated Tool</h1>
+<p>To allow for equitable access to all users, SEC reserves the right to limit requests<br>
+originating from undeclared automated tools.</p></body></html>
+'''
+
+# Cut off after the cover page and before the namespace declarations of the root element
+TRUNCATED = INSTANCE[INSTANCE.index(b'<xbrli:context'):INSTANCE.index(b'<us-gaap:Assets')]
+
+def response(content,stream=False):
+    '''
+    A requests.Response with the given body, either read like fetch() returns it or left unread like fetchMany(stream=True) does.
+    '''
+    result = requests.Response()
+    result.status_code = 200
+    result.url = URL
+    result.raw = io.BytesIO(content)
+    if not stream:
+        result._content = content
+        result._content_consumed = True
+    return result
+
+def headerParse(content,stream=False):
+    return XBRL(xbrl_content=response(content,stream),tradingsymbol=True,logger=logging.getLogger(__name__))
+
+def test_instance_document():
+    for stream in (False,True):
+        data = headerParse(INSTANCE,stream)
+        assert data.fields['TradingSymbol'] == 'EXMP'
+        assert not data.headerFallback
+
+def test_rate_limit_page_is_not_provided():
+    for stream in (False,True):
+        data = headerParse(RATE_LIMIT_PAGE,stream)
+        assert data.fields['TradingSymbol'] == 'Not Provided'
+        assert data.headerFallback
+
+def test_truncated_instance_is_not_provided():
+    for stream in (False,True):
+        data = headerParse(TRUNCATED,stream)
+        assert data.fields['TradingSymbol'] == 'Not Provided'
+        assert data.headerFallback
+        assert data.bytesRead == len(TRUNCATED)
+
+def test_error_page_has_no_filing_data():
+    # research() does not cache a parse like this, so the filing is fetched again on the next run
+    assert not hasFilingData(parseFiling(RATE_LIMIT_PAGE,URL))
+    assert hasFilingData(parseFiling(INSTANCE,URL))